@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# WarBoard: Vengeance (v1) — AI players
+#
+# Notes:
+# - An agent picks one Engine.step action for a side: agent.choose(engine, key). It must not
+#   change the engine it is given.
+# - "heuristic" is Engine.ai_action; "mcts" searches the one-action-per-round game tree.
+# - MCTS respects fog of war: every iteration plays out on a copy where enemy units and
+#   defences the side hasn't seen (revealed/radar cover) are re-dealt onto unseen tiles.
+# - choose() may run on a worker thread; cancel() makes a search in flight return early.
+# - Search plays out on copies whose dice are reseeded from the agent's own stream, so it never
+#   moves the match's rules stream; how far it gets depends on the time budget, so pass
+#   iterations= (and budget=None) for reproducible runs.
+
+import math, random, time
+from engine import Unit, Static, UNIT_META, TOKEN_ATTR, PHASE_BATTLE
+
+class Agent:
+    name="agent"; cancelled=False
+    def __init__(self, budget=None): self.budget=budget   # seconds per decision, if it searches
+    def choose(self, engine, key): raise NotImplementedError
+    def reset(self): self.cancelled=False   # called when a new match starts
+    def cancel(self): self.cancelled=True   # from another thread: return as soon as possible
+
+class HeuristicAgent(Agent):
+    name="heuristic"
+    def choose(self, engine, key): return engine.ai_action(key)
+
+# ---- MCTS ----
+class Node:
+    # `action` led here from the parent and was played by `player`; value is from their side.
+    __slots__=("action","player","parent","children","untried","visits","value")
+
+class NodePool:
+    # Fixed budget of tree nodes. Nodes cut off by subtree reuse go back on the free list.
+    def __init__(self, capacity):
+        self.capacity=capacity; self.live=0; self.free=[]
+    def take(self, action, player, parent):
+        if self.live>=self.capacity: return None
+        n=self.free.pop() if self.free else Node()
+        n.action=action; n.player=player; n.parent=parent; n.children=[]; n.untried=None
+        n.visits=0; n.value=0.0; self.live+=1
+        return n
+    def release(self, node, keep=None):
+        stack=[node]
+        while stack:
+            n=stack.pop()
+            if n is keep: continue
+            stack.extend(n.children); n.children=None; n.parent=None
+            self.free.append(n); self.live-=1
+
+def other(key): return "p2" if key=="p1" else "p1"
+
+class MCTSAgent(Agent):
+    name="mcts"
+    def __init__(self, budget=0.25, iterations=None, max_nodes=20000, depth=8, shots=6, c=1.2, seed=None):
+        # Without either cap a search would never return.
+        if not (budget or iterations): raise ValueError("mcts needs a time budget or an iteration count")
+        super().__init__(budget); self.iterations=iterations; self.depth=depth; self.shots=shots; self.c=c
+        self.pool=NodePool(max_nodes); self.rng=random.Random(seed)
+        self.root=None; self.log_pos=0; self.stats={}
+
+    def reset(self):
+        super().reset()
+        if self.root: self.pool.release(self.root)
+        self.root=None; self.log_pos=0
+
+    # ---- actions ----
+    def candidates(self, e, key, shots, known):
+        # Tree actions for `key`: fire one of the best shots, advance or attack with one unit,
+        # place one token, or pass. ("advance", uid) is resolved against the sampled state.
+        side=e.side(key); acts=[("pass",)]
+        acts+=[("fire",)+s for s in shots[key]]
+        for u in side.units:
+            rng=UNIT_META[u.type]["range"]
+            if rng<=0: continue
+            if e.advance_path(key, u.id): acts.append(("advance", u.id))
+            for t in known[key]:
+                if abs(t[0]-u.pos[0])+abs(t[1]-u.pos[1])<=rng:
+                    path=e.move_path(key, u.id, t)
+                    if path: acts.append(("move", u.id, path))
+        for kind,attr in TOKEN_ATTR.items():
+            if getattr(side,attr)>0:
+                tile=self.front_tile(e, key)
+                if tile: acts.append(("place", kind, tile))
+        return acts
+
+    def front_tile(self, e, key):
+        cols=list(e.own_cols(key))
+        if key=="p1": cols.reverse()
+        rows=sorted(range(e.h), key=lambda y: abs(y-e.h//2))
+        for x in cols[1:]:
+            for y in rows:
+                if e.can_place(key, x, y): return (x,y)
+        return None
+
+    def concrete(self, e, action):
+        if action[0]!="advance": return action
+        u=e.side(e.turn).unit(action[1])
+        path=e.advance_path(e.turn, u.id) if u else []
+        return ("move", u.id, path) if path else ("pass",)
+
+    def rollout_action(self, e, key, shots):
+        side=e.side(key); rng=self.rng
+        if shots[key] and rng.random()<0.5: return ("fire",)+rng.choice(shots[key])
+        movable=[u for u in side.units if UNIT_META[u.type]["range"]>0]
+        if movable:
+            u=rng.choice(movable); path=e.advance_path(key, u.id)
+            if path: return ("move", u.id, path)
+        return ("pass",)
+
+    # ---- fog ----
+    def determinize(self, e, key):
+        # Copy of `e` with fresh dice and the unseen enemy units and defences moved to random
+        # unseen tiles of their half; what `key` has seen (and all facilities) stays put.
+        s=e.copy(seed=self.rng.getrandbits(64)); foe=s.enemy(key); seen=e.revealed(key)|e.radar_cover(key)
+        hidden=[x for x in foe.units if x.pos not in seen]+[x for x in foe.static if x.pos not in seen]
+        if not hidden: return s
+        taken={x.pos for x in foe.units if x.pos in seen}|{x.pos for x in foe.static if x.pos in seen}
+        # Rejection-sample the half rather than list it (that's a grid scan per iteration on a
+        # theatre map); only a crowded half falls back to picking the rest from the full list.
+        cols=s.own_cols(foe.key); spots=[]
+        for _ in range(8*len(hidden)):
+            t=(self.rng.choice(cols), self.rng.randrange(s.h))
+            if t not in seen and t not in taken and t not in spots:
+                spots.append(t)
+                if len(spots)==len(hidden): break
+        else:
+            free=[(x,y) for x in cols for y in range(s.h) if (x,y) not in seen and (x,y) not in taken and (x,y) not in spots]
+            spots+=self.rng.sample(free, min(len(free), len(hidden)-len(spots)))
+        moved={x.id:p for x,p in zip(hidden, spots)}
+        foe.set_units([Unit(u.id, u.type, moved.get(u.id, u.pos), u.dir) for u in foe.units])
+        foe.set_static([Static(st.id, st.type, moved.get(st.id, st.pos)) for st in foe.static])
+        s.rebuild_vision()
+        return s
+
+    # ---- search ----
+    def reward(self, e, key):
+        # Damage margin plus material: assets left on the board and units already pressing
+        # on the midline (their occupation damage is what the rollout horizon cuts off).
+        if e.over: return 1.0 if e.winner==key else 0.0
+        def worth(k):
+            s=e.side(k)
+            return -s.damage + 3*(len(s.units)+len(s.static)+len(s.facilities)) + sum(
+                UNIT_META[u.type]["power"] for u in s.units if abs(u.pos[0]-e.mid_x)<=1)
+        return min(1.0, max(0.0, 0.5+(worth(key)-worth(other(key)))/100))
+
+    def reuse_root(self, e, key):
+        # Walk the kept tree along the actions played since the last decision.
+        node=self.root
+        for k,a in e.log[self.log_pos:]:
+            if node is None: break
+            if a[0] in ("buy","intercept"): continue
+            nxt=None
+            for ch in node.children:
+                ca=ch.action
+                if ch.player==k and (ca==a or (ca[0]=="advance" and a[0]=="move" and ca[1]==a[1])): nxt=ch; break
+            node=nxt
+        if node is None or node.player==key:
+            if self.root: self.pool.release(self.root)
+            return self.pool.take(None, other(key), None)
+        self.pool.release(self.root, keep=node); node.parent=None
+        return node
+
+    def choose(self, engine, key):
+        if engine.phase!=PHASE_BATTLE or engine.turn!=key: return engine.ai_action(key)
+        t0=time.perf_counter(); deadline=t0+0.95*self.budget if self.budget else None
+        base=engine.copy()   # ai_shots draws from the AI stream; leave `engine`'s alone
+        shots={k:base.ai_shots(k, self.shots) for k in ("p1","p2")}
+        known={k:[u.pos for u in engine.enemy(k).units if u.pos in engine.revealed(k) or u.pos in engine.radar_cover(k)]
+               for k in ("p1","p2")}
+        root=self.root=self.reuse_root(engine, key)
+        n=0; slowest=0.0
+        while True:
+            if self.cancelled or (self.iterations and n>=self.iterations): break
+            now=time.perf_counter()
+            if deadline and n>0 and now+2*slowest>=deadline: break   # leave room to return
+            self.iterate(root, self.determinize(base, key), key, shots, known); n+=1
+            slowest=max(slowest, time.perf_counter()-now)
+            time.sleep(0)   # let a render thread waiting on the GIL in between iterations
+        best=max(root.children, key=lambda ch: ch.visits, default=None)
+        self.stats={"iterations":n, "nodes":self.pool.live, "root_visits":root.visits,
+                    "ms":round((time.perf_counter()-t0)*1000, 1)}
+        self.log_pos=len(engine.log)
+        if best is None: return engine.ai_action(key)
+        return self.concrete(engine, best.action)
+
+    def iterate(self, root, e, key, shots, known):
+        node=root; path=[root]
+        # Selection / expansion along actions that are still playable in this sample.
+        while not e.over:
+            if node.untried is None:
+                node.untried=self.candidates(e, e.turn, shots, known); self.rng.shuffle(node.untried)
+            if node.untried:
+                child=self.pool.take(node.untried[-1], e.turn, node)
+                if child:
+                    node.untried.pop(); node.children.append(child)
+                    e.step(self.concrete(e, child.action)); path.append(child)
+                    break
+            if not node.children: break
+            logn=math.log(node.visits+1)
+            node=max(node.children, key=lambda ch: ch.value/(ch.visits or 1)+self.c*math.sqrt(logn/(ch.visits+1e-9)))
+            e.step(self.concrete(e, node.action)); path.append(node)
+        # Rollout with the cheap policy, then score from `key`'s side.
+        for _ in range(self.depth):
+            if e.over: break
+            e.step(self.rollout_action(e, e.turn, shots))
+        r=self.reward(e, key)
+        for n in path:
+            n.visits+=1; n.value+= r if n.player==key else 1.0-r
+
+AGENTS={"heuristic":HeuristicAgent, "mcts":MCTSAgent}
+
+def make_agent(name, **kw):
+    if name not in AGENTS: raise ValueError(f"unknown AI {name!r} (choose from {', '.join(AGENTS)})")
+    return AGENTS[name](**kw)
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# WarBoard: Vengeance (v1) — benchmark suite for the rendering and rules hot paths
+#
+# Notes:
+# - Every case runs on a fixed, seeded scenario (same --seed => same boards, same dice), under
+#   SDL's dummy video driver unless SDL_VIDEODRIVER says otherwise, so runs are comparable
+#   across machines and commits without a window.
+# - Scenarios: "empty" (facilities only), "late" (a crowded late game: many AA/radar sites,
+#   units, reveals and wrecks), "strike" (a radius-2 missile into the densest enemy cluster),
+#   "market" (late game with the market overlay open), "ai" (late game, the AI to move) and
+#   "theatre" (the late-game mix spread over the theatre map, to show draw cost follows the view).
+# - Each case is timed per call with perf_counter_ns after a short warm-up; anything a call
+#   would consume (an engine copy, a fresh animation) is set up outside the timed region.
+# - Output is one JSON document: meta plus, per case, n / mean / min / p50 / p90 / p99 / max in
+#   microseconds. --compare BASELINE adds a per-case comparison on --metric and exits 1 when a
+#   case got slower than --tolerance allows (and by more than --floor-us), so a baseline saved
+#   from the last release flags regressions before the next build ships.
+#
+#   python bench.py                              # JSON to stdout
+#   python bench.py --out bench_baseline.json    # save a baseline
+#   python bench.py --compare bench_baseline.json --tolerance 0.25
+#   python bench.py --only late/ --repeat 500
+
+import os, sys, json, argparse, platform, random, time, math, gc
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy"); os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")   # stdout is the JSON
+import pygame
+import main
+from engine import Engine, Missile
+from ai import make_agent
+
+COUNTRIES = ("United States", "Russia")
+STATICS   = 16      # AA + radar sites per side in the late game
+UNITS     = 10      # mobile units per side in the late game
+WRECKS    = 20
+MCTS_ITERATIONS = 64
+
+def free_tile(e, key, rng):
+    cols=e.own_cols(key)
+    while True:
+        x,y=rng.choice(cols), rng.randrange(e.h)
+        if e.can_place(key, x, y): return (x,y)
+
+def empty_game(seed, scenario=None):
+    e=Engine(scenario); e.new_match(*COUNTRIES, p1_human=False, p2_human=False, seed=seed); e.start_battle()
+    for side in (e.p1, e.p2): side.set_units([]); side.set_static([])
+    e.rebuild_vision()
+    return e
+
+def late_game(seed, scenario=None):
+    # Both sides fully built up at round 40: alternating radar/AA sites, a mixed force, half of
+    # each side's pieces revealed to the other and a scatter of wrecks.
+    e=Engine(scenario); e.new_match(*COUNTRIES, p1_human=False, p2_human=False, seed=seed); e.start_battle()
+    rng=random.Random(seed)
+    for side in (e.p1, e.p2):
+        for i in range(STATICS): e.add_static(side, "AA" if i%2 else "Radar", free_tile(e, side.key, rng))
+        for i in range(UNITS): e.add_unit(side, rng.choice(("Tank","Troop","Jet")), free_tile(e, side.key, rng))
+    for key in ("p1","p2"):
+        foe=e.enemy(key); pieces=sorted({p.pos for p in foe.units}|{s.pos for s in foe.static})
+        e.revealed(key).update(rng.sample(pieces, len(pieces)//2))
+    e.destroyed_tiles.update((rng.randrange(e.w), rng.randrange(e.h)) for _ in range(WRECKS))
+    e.round=40; e.p1.damage=55; e.p2.damage=60
+    return e
+
+def strike(e):
+    # p1's radius-2 shot at the enemy tile with the most enemy pieces within two tiles.
+    foe=[p.pos for p in e.p2.units]+[s.pos for s in e.p2.static]
+    target=max(sorted(foe), key=lambda t: sum(abs(t[0]-x)+abs(t[1]-y)<=2 for x,y in foe))
+    return (e.mid_x-1, target[1]), target, Missile("Bench strike", 30*e.km_per_tile*e.w, 30, 2, km_per_tile=e.km_per_tile)
+
+def stats(ns):
+    s=sorted(ns); n=len(s); us=lambda v: round(v/1000, 1)
+    pct=lambda p: us(s[max(0, math.ceil(p/100*n)-1)])
+    return {"n":n, "mean_us":us(sum(s)/n), "min_us":us(s[0]), "p50_us":pct(50), "p90_us":pct(90),
+            "p99_us":pct(99), "max_us":us(s[-1])}
+
+def measure(fn, n, setup=None, warmup=3):
+    # Times fn(setup()) n times; setup runs outside the timed region.
+    for _ in range(warmup): fn(setup() if setup else None)
+    gc.collect(); out=[]
+    for _ in range(n):
+        arg=setup() if setup else None
+        t=time.perf_counter_ns(); fn(arg); out.append(time.perf_counter_ns()-t)
+    return stats(out)
+
+class Bench:
+    def __init__(self, seed, repeat):
+        main.REPLAY_DIR=None   # nothing here should finish a match, but never write one
+        self.seed=seed; self.repeat=repeat; self.g=main.Game(); self.g.ai=make_agent("heuristic")
+
+    def show(self, e, market=False):
+        # Put `e` on screen as the player's turn, without goto()'s autosave.
+        g=self.g; g.engine=e; g.board.set_size(e.w, e.h); g.state=main.STATE_PLAYER
+        g.market_open=market; g.selected_unit_id=g.selected_missile=g.range_center=None
+        g.anim={"missile":None,"moves":None,"intercept":None}; g.explosions.clear()
+        g.last_view=None; g.full_redraw=True; g.draw_scene()
+        return g
+
+    def cases(self):
+        # (name, fn, samples, setup) in run order.
+        seed=self.seed; n=self.repeat; out=[]
+        for name,e in (("empty", empty_game(seed)), ("late", late_game(seed))):
+            def draws(e=e, name=name):
+                g=self.show(e); return [
+                    (f"{name}/Board.draw", lambda _: g.board.draw(g.screen), n, None),
+                    (f"{name}/draw_player", lambda _: g.draw_player(), n, None),
+                    (f"{name}/frame", self.full_frame, n, None)]
+            out.append(draws)
+        late=late_game(seed)
+        def market():
+            g=self.show(late, market=True); return [
+                ("market/draw_market_overlay", lambda _: g.draw_market_overlay(), n, None),
+                ("market/draw_player", lambda _: g.draw_player(), n, None)]
+        def rules():
+            deff=late.p2; half=[(x,y) for x in late.own_cols("p2") for y in range(late.h)]
+            def sweep(_):
+                deff.intercepts.clear()
+                for x,y in half: late.find_interceptor(deff, x, y)
+            launch,target,m=strike(late)
+            return [
+                ("late/find_interceptor", sweep, n, None),
+                ("strike/resolve_missile", lambda c: c.resolve_missile(c.p1, c.p2, target, m), n, lambda: late.copy(seed=seed)),
+                ("strike/Game.update", lambda _: self.g.update(), n, self.strike_tick)]
+        def ai():
+            turn=late.copy(seed=seed); turn.turn="p2"
+            return [
+                ("ai/ai_turn_heuristic", lambda c: make_agent("heuristic").choose(c, "p2"), n, lambda: turn.copy(seed=seed)),
+                ("ai/ai_turn_mcts", lambda c: make_agent("mcts", budget=None, iterations=MCTS_ITERATIONS, seed=seed).choose(c, "p2"),
+                 max(5, n//20), lambda: turn.copy(seed=seed))]
+        def theatre():
+            g=self.show(late_game(seed, "theatre")); return [
+                ("theatre/draw_player", lambda _: g.draw_player(), n, None),
+                ("theatre/frame", self.full_frame, n, None)]
+        return out+[market, rules, ai, theatre]
+
+    def full_frame(self, _):
+        self.g.full_redraw=True; self.g.render()
+
+    def strike_tick(self):
+        # Keeps a missile in flight for Game.update: relaunch (on a fresh copy) before the tick
+        # that would land it, so no sample includes resolving the hit or starting the AI.
+        g=self.g; m=g.anim["missile"]; ip=g.anim["intercept"]
+        if g.state!=main.STATE_ANIM_MISSILE or m["idx"]>=m["steps"]-1 or (ip and ip["idx"]>=ip["steps"]-1):
+            e=self.show(self.strike_base).engine.copy(seed=self.seed); g.engine=e
+            g.launch_missile("p1", *strike(e))
+
+    def run(self, only=()):
+        self.strike_base=late_game(self.seed); results={}
+        for group in self.cases():
+            for name,fn,n,setup in group():
+                if only and not any(o in name for o in only): continue
+                results[name]=measure(fn, n, setup)
+                print(f"  {name:<30} p50 {results[name]['p50_us']:>10.1f} us   p90 {results[name]['p90_us']:>10.1f} us", file=sys.stderr)
+        return results
+
+def compare(results, baseline, metric, tolerance, floor_us):
+    # Per-case ratio against the baseline; a regression is slower by more than the tolerance
+    # and by more than floor_us (sub-microsecond jitter isn't a regression).
+    base=baseline.get("results", {}); cases={}; regressions=[]
+    for name,r in results.items():
+        if name not in base: cases[name]={"now":r[metric], "base":None, "ratio":None}; continue
+        b=base[name][metric]; ratio=round(r[metric]/b, 3) if b else None
+        cases[name]={"now":r[metric], "base":b, "ratio":ratio}
+        if ratio and ratio>1+tolerance and r[metric]-b>floor_us: regressions.append(name)
+    for name,c in cases.items():
+        flag="REGRESSION" if name in regressions else ("new" if c["base"] is None else "")
+        base_s="-" if c["base"] is None else f"{c['base']:.1f}"; ratio_s="-" if c["ratio"] is None else f"{c['ratio']:.2f}x"
+        print(f"  {name:<30} {base_s:>10} -> {c['now']:>10.1f} us  {ratio_s:>7}  {flag}", file=sys.stderr)
+    return {"metric":metric, "tolerance":tolerance, "floor_us":floor_us, "cases":cases, "regressions":regressions,
+            "missing":sorted(set(base)-set(results))}
+
+def main_cli(argv=None):
+    ap=argparse.ArgumentParser(description="Time the rendering and rules hot paths on seeded scenarios.")
+    ap.add_argument("--seed", type=int, default=1, help="scenario seed (default 1)")
+    ap.add_argument("--repeat", type=int, default=200, help="samples per case (MCTS turns take 1/20 of that)")
+    ap.add_argument("--only", action="append", default=[], help="run cases whose name contains this (repeatable)")
+    ap.add_argument("--out", help="write the JSON here instead of stdout")
+    ap.add_argument("--compare", metavar="BASELINE", help="compare against a saved run; exit 1 on regressions")
+    ap.add_argument("--metric", default="p50_us", choices=("mean_us","min_us","p50_us","p90_us","p99_us"))
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown as a fraction (default 0.25)")
+    ap.add_argument("--floor-us", type=float, default=5.0, help="ignore slowdowns smaller than this (default 5 us)")
+    args=ap.parse_args(argv)
+    baseline=None
+    if args.compare:
+        try:
+            with open(args.compare) as f: baseline=json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"{args.compare}: {e}", file=sys.stderr); return 2
+
+    results=Bench(args.seed, max(1, args.repeat)).run(args.only)
+    doc={"meta":{"seed":args.seed, "repeat":args.repeat, "python":platform.python_version(), "pygame":pygame.version.ver,
+                 "sdl_video":os.environ.get("SDL_VIDEODRIVER"), "platform":platform.platform(),
+                 "time":time.strftime("%Y-%m-%dT%H:%M:%S")},
+         "results":results}
+    if baseline is not None: doc["compare"]=compare(results, baseline, args.metric, args.tolerance, args.floor_us)
+    text=json.dumps(doc, indent=1)
+    if args.out:
+        with open(args.out, "w") as f: f.write(text+"\n")
+    else: print(text)
+    if baseline is not None and doc["compare"]["regressions"]:
+        print(f"{len(doc['compare']['regressions'])} case(s) regressed", file=sys.stderr); return 1
+    return 0
+
+if __name__=="__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# WarBoard: Vengeance (v1) — country and market catalog compiler
+#
+# Notes:
+# - compile_catalog() validates data/countries.json and precomputes everything the engine
+#   derives from it: each country's starting tokens and missile templates, and the market.
+#   Bad data fails here with every problem listed, not as a KeyError mid-match.
+# - load() returns the compiled catalog from a cache file next to the source. The cache is
+#   keyed on CATALOG_VERSION, the marshal format, and the source's size and mtime; if the stamp
+#   is stale but the content hash still matches (a fresh checkout, a copy) it is reused as is.
+#   Otherwise the source is recompiled and the cache rewritten (best effort: a read-only data
+#   directory just means compiling in memory each start).
+# - Bump CATALOG_VERSION whenever the compiled layout or any derivation below changes.
+#
+#   python catalog.py                       # validate and (re)build data/countries.catalog
+#   python catalog.py --check               # validate only; exit 1 listing every problem
+
+import os, sys, struct, marshal, hashlib, json, argparse
+
+CATALOG_VERSION = 1
+CACHE_MAGIC     = b"WBC"
+CACHE_HEAD      = struct.Struct("<3sBBQq32s")   # magic, version, marshal version, size, mtime_ns, sha256
+
+# Always on the market, ahead of one entry per distinct country missile.
+BASE_MARKET = (
+    {"name":"Tank","price":90},
+    {"name":"Troop","price":40},
+    {"name":"Jet","price":140},
+    {"name":"AA Battery","price":70, "grant":"AA"},
+    {"name":"Radar Station","price":80, "grant":"Radar"},
+    {"name":"Anti-Radar Missile (ARM)","price":130, "missile":("ARM", 800, 14, 1), "anti":True},
+    {"name":"Anti-Radar (AR) Missile","price":110, "missile":("AR Missile", 700, 12, 1), "anti":True},
+    {"name":"Akash Battery (India)","price":85, "grant":"AA", "perk":"akash"},
+    {"name":"S-400 Battery (Russia)","price":120, "grant":"AA", "perk":"s400"},
+    {"name":"Patriot PAC-3 (USA)","price":115, "grant":"AA", "perk":"patriot"},
+    {"name":"Iron Dome Launcher (Israel)","price":95, "grant":"AA", "perk":"irondome"},
+)
+
+# Field -> check for every country; missiles are checked separately.
+COUNT=lambda v: type(v) is int and v>=0
+SCHEMA = {
+    "build_points": COUNT,
+    "ground":  {"tanks":COUNT, "artillery":COUNT, "personnel":COUNT},
+    "air":     {"aircraft_total":COUNT, "fighters":COUNT, "bombers":COUNT},
+    "naval":   {"ships":COUNT, "carriers":COUNT, "subs":COUNT},
+    "defense": {"air_defense":lambda v: type(v) in (int,float) and 0<=v<=1},
+}
+COUNTRY_OPTIONAL = {"defense.air_defense":0.4}   # the default the engine used before this check
+MISSILE_SCHEMA = {
+    "name":     lambda v: isinstance(v,str) and 0<len(v.encode("utf-8"))<256,
+    "range_km": lambda v: type(v) is int and 0<v<65536,
+    "damage":   lambda v: type(v) is int and 0<v<256,
+    "radius":   lambda v: type(v) is int and 0<v<256,
+}
+MISSILE_OPTIONAL = {"damage":25, "radius":1}
+
+class CatalogError(ValueError):
+    def __init__(self, path, problems):
+        self.problems=problems
+        super().__init__(f"{path}: {len(problems)} problem(s)\n" + "\n".join("  "+p for p in problems))
+
+def check_fields(where, data, schema, problems, optional=()):
+    if not isinstance(data, dict): problems.append(f"{where}: expected an object"); return
+    for field,check in schema.items():
+        if field not in data:
+            if field not in optional: problems.append(f"{where}.{field}: missing")
+        elif isinstance(check, dict):
+            inner={k.split(".",1)[1]:v for k,v in dict(optional).items() if k.startswith(field+".")}
+            check_fields(f"{where}.{field}", data[field], check, problems, inner)
+        elif not check(data[field]): problems.append(f"{where}.{field}: bad value {data[field]!r}")
+
+def validate(raw):
+    problems=[]
+    if not isinstance(raw, dict) or not raw: return ["top level: expected an object of countries"]
+    for name,c in raw.items():
+        if not name or len(name.encode("utf-8"))>=256: problems.append(f"{name!r}: bad country name")
+        check_fields(name, c, SCHEMA, problems, COUNTRY_OPTIONAL)
+        ms=c.get("missiles") if isinstance(c, dict) else None
+        if not isinstance(ms, list) or not ms: problems.append(f"{name}.missiles: expected a non-empty list"); continue
+        for i,m in enumerate(ms): check_fields(f"{name}.missiles[{i}]", m, MISSILE_SCHEMA, problems, MISSILE_OPTIONAL)
+    return problems
+
+def missile_template(m):
+    return (m["name"], m["range_km"], m.get("damage", MISSILE_OPTIONAL["damage"]), m.get("radius", MISSILE_OPTIONAL["radius"]))
+
+def starting_tokens(c):
+    # (tank, troop, jet, AA, radar) tokens a side starts with.
+    g,a=c["ground"], c["air"]
+    return (max(0,min(3, g["tanks"]//3000)), max(1,min(4, g["personnel"]//500000)),
+            max(1,min(3, a["fighters"]//400)), max(1, int(c["defense"]["air_defense"]*4)), 1)
+
+def market(raw):
+    items=[dict(it) for it in BASE_MARKET]; seen=set()
+    for cname,c in raw.items():
+        for m in c["missiles"]:
+            key=missile_template(m)
+            if key in seen: continue
+            seen.add(key)
+            price = int(0.02*key[1] + 3.0*key[2] + 16*key[3])
+            items.append({"name":f"{m['name']} ({cname})", "price":price, "missile":key})
+    return items
+
+def with_defaults(c):
+    # The country with its optional fields filled in, so nothing downstream looks them up.
+    c=dict(c)
+    for dotted,v in COUNTRY_OPTIONAL.items():
+        group,field=dotted.split("."); c[group]={field:v, **c[group]}
+    return c
+
+def compile_catalog(raw, path="countries.json"):
+    problems=validate(raw)
+    if problems: raise CatalogError(path, problems)
+    raw={name:with_defaults(c) for name,c in raw.items()}
+    return {"countries":raw,
+            "tokens":{name:starting_tokens(c) for name,c in raw.items()},
+            "missiles":{name:tuple(missile_template(m) for m in c["missiles"]) for name,c in raw.items()},
+            "market":market(raw)}
+
+def cache_path(src): return os.path.splitext(src)[0]+".catalog"
+
+def read_cache(src, cache):
+    # The cached catalog if it matches `src`, else None.
+    try:
+        with open(cache, "rb") as f: blob=f.read()
+        magic,ver,mver,size,mtime,digest=CACHE_HEAD.unpack_from(blob)
+        st=os.stat(src)
+    except (OSError, struct.error): return None
+    if (magic,ver,mver)!=(CACHE_MAGIC,CATALOG_VERSION,marshal.version): return None
+    if (size,mtime)!=(st.st_size,st.st_mtime_ns):
+        with open(src, "rb") as f:
+            if hashlib.sha256(f.read()).digest()!=digest: return None
+    try: return marshal.loads(blob[CACHE_HEAD.size:])
+    except (EOFError, ValueError, TypeError): return None
+
+def build(src, cache=None):
+    # Compile `src` and write its cache; returns the catalog. Raises CatalogError on bad data.
+    with open(src, "rb") as f: data=f.read()
+    try: raw=json.loads(data)
+    except ValueError as e: raise CatalogError(src, [f"not valid JSON: {e}"]) from None
+    cat=compile_catalog(raw, src)
+    st=os.stat(src); cache=cache or cache_path(src); tmp=f"{cache}.{os.getpid()}.tmp"
+    blob=CACHE_HEAD.pack(CACHE_MAGIC, CATALOG_VERSION, marshal.version, st.st_size, st.st_mtime_ns,
+                         hashlib.sha256(data).digest()) + marshal.dumps(cat)
+    try:   # per-process temp name: tournament workers may all rebuild at once
+        with open(tmp, "wb") as f: f.write(blob)
+        os.replace(tmp, cache)
+    except OSError: pass
+    return cat
+
+def load(src, cache=None):
+    return read_cache(src, cache or cache_path(src)) or build(src, cache)
+
+def main(argv=None):
+    ap=argparse.ArgumentParser(description="Validate the country data and build its compiled catalog.")
+    ap.add_argument("source", nargs="?", default=os.path.join("data", "countries.json"))
+    ap.add_argument("--check", action="store_true", help="validate only, write nothing")
+    args=ap.parse_args(argv)
+    try:
+        if args.check:
+            with open(args.source, "rb") as f: raw=json.loads(f.read())
+            cat=compile_catalog(raw, args.source)
+        else: cat=build(args.source)
+    except (CatalogError, ValueError, OSError) as e:
+        print(e, file=sys.stderr); return 1
+    out="" if args.check else f" -> {cache_path(args.source)}"
+    print(f"{args.source}: {len(cat['countries'])} countries, {len(cat['market'])} market items{out}")
+    return 0
+
+if __name__=="__main__":
+    sys.exit(main())
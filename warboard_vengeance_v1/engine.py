@@ -0,0 +1,1040 @@
+#!/usr/bin/env python3
+# WarBoard: Vengeance (v1) — rules engine
+#
+# Notes:
+# - Pure Python, no pygame: import this to run matches headless (balance tests, AI work).
+# - main.Game drives an Engine and animates what it does; Engine.step(action) resolves a
+#   whole action at once for tools that don't render.
+# - Sides are keyed "p1" (left half, fires right) and "p2" (right half, fires left).
+# - Rule side effects the UI cares about (explosions, info text) are queued on Engine.events.
+# - Randomness comes from two per-match streams seeded by new_match(seed=...): Engine.rng for
+#   the rules (setup, clashes, misses) and Engine.ai_rng for AI decisions. Engine.log records
+#   every action plus each AA engagement, so replay(engine.replay_bytes()) re-runs the match.
+#   Engine(record=False) keeps neither the log nor the events, for training loops that only
+#   read the state; such a match can't be saved or replayed.
+# - The board is a Scenario: the built-in classic GRID_W x GRID_H map, or a file under
+#   data/scenarios (up to theatre scale). Rules read the engine's w/h/km_per_tile, never the
+#   GRID_* constants, and touch only the tiles an action involves, never the whole grid.
+# - Unit moves follow Engine.move_field: the cheapest route to every tile a unit can reach this
+#   turn, around its own side's pieces, stopping on known enemies, and (for Jets) steering clear
+#   of known AA cover. Fields are cached until the turn ends or the board changes.
+
+import os, sys, random, math, functools, json, struct, heapq
+from array import array
+import numpy as np
+import catalog
+
+GRID_W, GRID_H  = 28, 13     # the classic board
+KM_PER_TILE     = 100
+SCENARIO_DIR    = os.path.join("data", "scenarios")
+
+AA_RANGE_BASE    = 4
+RADAR_RANGE_BASE = 4
+MOVE_RISK        = 8     # extra cost of a Jet step into known AA cover: any safe route in range wins
+
+# Interception is a race between the missile and the AA interceptor animations, so the rules
+# depend on their timing. Flights are sampled in a reference pixel space of FLIGHT_TILE_PX
+# tiles: the missile advances one MISSILE_STEP_PX sample every MISSILE_HOLD_FRAMES frames,
+# the interceptor one INTERCEPT_STEP_PX sample per frame.
+FLIGHT_TILE_PX      = 38
+MISSILE_STEP_PX     = 6
+MISSILE_MIN_STEPS   = 42
+MISSILE_HOLD_FRAMES = 2
+INTERCEPT_STEP_PX   = 10
+INTERCEPT_MIN_STEPS = 12
+
+FACILITY_NAMES = ["Power Grid","Nuclear Plant","Stockpile","Weapons Depot","RadarStation"]
+
+PHASE_SETUP="setup"; PHASE_DEPLOY="deploy"; PHASE_BATTLE="battle"; PHASE_OVER="over"
+
+def resource_path(rel_path:str)->str:
+    base = getattr(sys, "_MEIPASS", os.path.abspath("."))
+    return os.path.join(base, rel_path)
+
+@functools.lru_cache(maxsize=None)
+def load_catalog():
+    # Loaded on first use, so importing the engine (or the UI) never touches the data files.
+    # Validated, with tokens, missile templates and the market precomputed (see catalog.py).
+    return catalog.load(resource_path("data/countries.json"))
+
+def countries(): return load_catalog()["countries"]
+
+class Scenario:
+    # A board: its size in tiles and the ground one tile spans.
+    __slots__=("name","w","h","km_per_tile")
+    def __init__(self, name, w, h, km_per_tile=KM_PER_TILE):
+        self.name=name; self.w=w; self.h=h; self.km_per_tile=km_per_tile
+    @property
+    def wide(self): return self.w>256 or self.h>256   # coordinates overflow a byte
+    def __repr__(self): return f"Scenario({self.name!r}, {self.w}x{self.h}, {self.km_per_tile}km)"
+
+CLASSIC = Scenario("classic", GRID_W, GRID_H)
+SCENARIO_LIMITS = {"width":(8,1024), "height":(3,1024), "km_per_tile":(1,1000)}
+
+def scenarios():
+    # Playable board names: the built-in one, then data/scenarios/*.json.
+    try: files=sorted(f[:-5] for f in os.listdir(resource_path(SCENARIO_DIR)) if f.endswith(".json"))
+    except OSError: files=[]
+    return [CLASSIC.name]+[f for f in files if f!=CLASSIC.name]
+
+@functools.lru_cache(maxsize=None)
+def load_scenario(name):
+    # {"width": tiles, "height": tiles, "km_per_tile": km}; raises ValueError on bad data.
+    if name==CLASSIC.name: return CLASSIC
+    path=resource_path(os.path.join(SCENARIO_DIR, name+".json"))
+    try:
+        with open(path, "rb") as f: raw=json.loads(f.read())
+    except (OSError, ValueError) as e: raise ValueError(f"{path}: {e}") from None
+    bad=[k for k,(lo,hi) in SCENARIO_LIMITS.items() if not (type(raw.get(k)) is int and lo<=raw[k]<=hi)] \
+        if isinstance(raw, dict) else ["top level"]
+    if bad: raise ValueError(f"{path}: missing or out of range: {', '.join(bad)}")
+    return Scenario(raw.get("name", name), raw["width"], raw["height"], raw["km_per_tile"])
+
+class Missile:
+    __slots__=("name","range_km","damage","radius_tiles","anti_radar","km_per_tile")
+    def __init__(self, name, range_km, dmg=25, radius_tiles=1, anti_radar=False, km_per_tile=KM_PER_TILE):
+        self.name=name; self.range_km=range_km; self.damage=dmg; self.radius_tiles=radius_tiles; self.anti_radar=anti_radar
+        self.km_per_tile=km_per_tile
+    @property
+    def range_tiles(self): return max(1,int(self.range_km/self.km_per_tile))
+
+UNIT_META = {
+    "Tank":  {"power":3, "color_p":(240,170,60), "color_e":(240,90,90),  "speed":18, "range":4},
+    "Troop": {"power":1, "color_p":(60,200,90),  "color_e":(255,120,120), "speed":26, "range":2},
+    "Jet":   {"power":4, "color_p":(240,220,80), "color_e":(255,180,120), "speed":10, "range":6},
+}
+UNIT_POWER = {k:m["power"] for k,m in UNIT_META.items()}
+
+class Unit:
+    # A mobile unit. Entities are never mutated (a move swaps in a copy with the same id), so
+    # side and engine copies can share them; they still unpack like (type, pos, dir).
+    __slots__=("id","type","pos","dir")
+    def __init__(self, uid, kind, pos, d): self.id=uid; self.type=kind; self.pos=pos; self.dir=d
+    def __iter__(self): return iter((self.type, self.pos, self.dir))
+    def __repr__(self): return f"Unit({self.id}, {self.type!r}, {self.pos}, {self.dir:+d})"
+
+class Static:
+    # An AA site, radar or facility; unpacks like (type, pos).
+    __slots__=("id","type","pos")
+    def __init__(self, uid, kind, pos): self.id=uid; self.type=kind; self.pos=pos
+    def __iter__(self): return iter((self.type, self.pos))
+    def __repr__(self): return f"Static({self.id}, {self.type!r}, {self.pos})"
+
+class PlayerSide:
+    def __init__(self, country_name, is_human=True, key=None, km_per_tile=KM_PER_TILE):
+        cat=load_catalog()
+        if country_name not in cat["countries"]: raise ValueError(f"unknown country {country_name!r}")
+        self.name=country_name; self.data=cat["countries"][country_name]; self.is_human=is_human
+        self.key = key or ("p1" if is_human else "p2"); self.dir = +1 if self.key=="p1" else -1
+        self.damage=0; self.static=[]; self.facilities=[]
+        # Country missiles + default AR missile
+        self.km_per_tile=km_per_tile
+        self.missiles=[Missile(*m, km_per_tile=km_per_tile) for m in cat["missiles"][country_name]]
+        self.missiles.append(Missile("AR Missile", 700, 12, 1, anti_radar=True, km_per_tile=km_per_tile))
+        self.shots_left=1
+        self.tank_tokens,self.troop_tokens,self.jet_tokens,self.aa_tokens,self.radar_tokens=cat["tokens"][country_name]
+        self.units=[]; self.orders=[]; self.next_id=1
+        self.money=120; self.tokens=0
+        self.aa_range_bonus=0
+        self.radar_range_bonus=0
+        self.intercept_cash_bonus=0
+        # Units by id, tile -> entity (first on the tile wins, as the old scans did), AA/radar
+        # sites in list order, and a memo of find_interceptor results per tile. Mutate units,
+        # statics and facilities through the methods below so these stay in step; `version`
+        # bumps whenever any of them changes.
+        self.unit_by_id={}; self.unit_index={}; self.static_index={}; self.version=0
+        self.aa_sites=[]; self.radar_sites=[]; self.intercepts={}; self.occupation=(-1, 0)
+
+    def new_id(self):
+        self.next_id+=1; return self.next_id-1
+
+    def copy(self):
+        # Cheap clone for search: entities and missiles are shared, containers are not.
+        c=PlayerSide.__new__(PlayerSide); c.__dict__.update(self.__dict__)
+        c.units=list(self.units); c.static=list(self.static); c.facilities=list(self.facilities)
+        c.missiles=list(self.missiles); c.orders=list(self.orders)
+        c.unit_by_id=dict(self.unit_by_id); c.unit_index=dict(self.unit_index); c.static_index=dict(self.static_index)
+        c.aa_sites=list(self.aa_sites); c.radar_sites=list(self.radar_sites); c.intercepts=dict(self.intercepts)
+        return c
+
+    def index_units(self):
+        self.version+=1
+        self.unit_by_id={u.id:u for u in self.units}; self.unit_index={}
+        for u in self.units: self.unit_index.setdefault(u.pos, u)
+    def index_static(self):
+        self.version+=1; self.static_index={}
+        for s in self.static: self.static_index.setdefault(s.pos, s)
+        self.aa_sites=[s.pos for s in self.static if s.type=="AA"]
+        self.radar_sites=[s.pos for s in self.static if s.type=="Radar"]
+        self.intercepts.clear()
+
+    def unit(self, uid): return self.unit_by_id.get(uid)
+    def add_unit(self, kind, pos):
+        u=Unit(self.new_id(), kind, pos, self.dir)
+        self.units.append(u); self.unit_by_id[u.id]=u; self.unit_index.setdefault(pos, u); self.version+=1
+        return u.id
+    def move_unit(self, uid, pos):
+        u=self.unit_by_id[uid]
+        self.units[self.units.index(u)]=Unit(uid, u.type, pos, u.dir); self.index_units()
+    def remove_unit(self, uid):
+        if uid not in self.unit_by_id: return False
+        self.units=[u for u in self.units if u.id!=uid]; self.index_units(); return True
+    def set_units(self, units):
+        self.units=units; self.index_units()
+    def add_static(self, kind, pos):
+        self.static.append(Static(self.new_id(), kind, pos)); self.index_static()
+    def remove_static(self, sid):
+        self.static=[s for s in self.static if s.id!=sid]; self.index_static()
+    def set_static(self, static):
+        self.static=static; self.index_static()
+    def add_facility(self, name, pos):
+        self.facilities.append(Static(self.new_id(), name, pos)); self.version+=1
+    def set_facilities(self, facilities):
+        self.facilities=facilities; self.version+=1
+    def defences_changed(self): self.intercepts.clear()
+
+    def mobile_at(self,gx,gy):
+        u=self.unit_index.get((gx,gy))
+        return (u.id, u.type) if u else (None,None)
+    def static_at(self,gx,gy):
+        s=self.static_index.get((gx,gy))
+        return (s.id, s.type) if s else (None,None)
+    def has_static_at(self,gx,gy): return (gx,gy) in self.static_index
+
+TOKEN_ATTR = {"Tank":"tank_tokens", "Troop":"troop_tokens", "Jet":"jet_tokens", "AA":"aa_tokens", "Radar":"radar_tokens"}
+
+def build_market():
+    # Compiled once per process and shared by every Engine; treat the items as read-only.
+    return load_catalog()["market"]
+
+def flight_point(launch, target, i, steps):
+    # Reference-pixel position of sample i of a launch->target flight (tile centres, no margin).
+    sx=launch[0]*FLIGHT_TILE_PX+FLIGHT_TILE_PX//2; sy=launch[1]*FLIGHT_TILE_PX+FLIGHT_TILE_PX//2
+    tx=target[0]*FLIGHT_TILE_PX+FLIGHT_TILE_PX//2; ty=target[1]*FLIGHT_TILE_PX+FLIGHT_TILE_PX//2
+    return int(sx+(tx-sx)*i/steps), int(sy+(ty-sy)*i/steps)
+
+def flight_steps(launch, target):
+    dist=math.hypot(target[0]-launch[0], target[1]-launch[1])*FLIGHT_TILE_PX
+    return max(MISSILE_MIN_STEPS, int(dist/MISSILE_STEP_PX))
+
+def axis_crossings(s, d, steps):
+    # (sample, tile) wherever one axis of a flight enters a new tile. Sample i sits at
+    # int(s+d*i/steps) == s+d*i//steps, so each tile boundary is crossed at a closed-form index.
+    P=FLIGHT_TILE_PX; t0=s//P; t1=(s+d)//P
+    if d>0: return [(-(-(k*P-s)*steps//d), k) for k in range(t0+1, t1+1)]
+    return [((k*P-s)*steps//d+1, k-1) for k in range(t0, t1, -1)]
+
+@functools.lru_cache(maxsize=16384)
+def flight_tiles(launch, target):
+    # (steps, ((first sample, tile), ...)): the tiles a flight's samples 1..steps pass through,
+    # in order, merged from the two axes' crossings. Exactly the tiles flight_point visits,
+    # including the corners it clips between samples, which it skips.
+    steps=flight_steps(launch, target); c=FLIGHT_TILE_PX//2
+    sx=launch[0]*FLIGHT_TILE_PX+c; sy=launch[1]*FLIGHT_TILE_PX+c
+    ev=sorted([(i,0,k) for i,k in axis_crossings(sx, (target[0]-launch[0])*FLIGHT_TILE_PX, steps)]
+            + [(i,1,k) for i,k in axis_crossings(sy, (target[1]-launch[1])*FLIGHT_TILE_PX, steps)])
+    out=[]; g=list(launch); start=1
+    for i,axis,k in ev:
+        if i>start: out.append((start, (g[0],g[1]))); start=i
+        g[axis]=k
+    out.append((start, (g[0],g[1])))
+    return steps, tuple(out)
+
+def intercept_steps(aa_xy, px, py):
+    ax=aa_xy[0]*FLIGHT_TILE_PX+FLIGHT_TILE_PX//2; ay=aa_xy[1]*FLIGHT_TILE_PX+FLIGHT_TILE_PX//2
+    return max(INTERCEPT_MIN_STEPS, int(math.hypot(px-ax,py-ay)/INTERCEPT_STEP_PX))
+
+def move_field(start, rng, w, h, blocked, stops, risky=None):
+    # Cheapest path to every tile within `rng` steps of start: tile -> (cost, path). A step costs
+    # 1, or 1+MOVE_RISK onto a tile where risky(tile) holds; blocked(tile) can't be entered and
+    # stops(tile) can be entered but not left. Only the range diamond is ever touched, whatever
+    # the board size.
+    if risky is None:   # uniform cost: breadth-first, one visit per tile
+        paths={start:()}; frontier=[start]
+        for _ in range(rng):
+            nxt=[]
+            for x,y in frontier:
+                p=paths[(x,y)]
+                if p and stops((x,y)): continue
+                for t in ((x+1,y),(x-1,y),(x,y+1),(x,y-1)):
+                    if t not in paths and 0<=t[0]<w and 0<=t[1]<h and not blocked(t): paths[t]=p+(t,); nxt.append(t)
+            frontier=nxt
+        del paths[start]
+        return {t:(len(p), p) for t,p in paths.items()}
+    # Dijkstra. A tile is expanded again only when reached in fewer steps, so a cheap but
+    # roundabout route never hides tiles a shorter, riskier one still reaches.
+    field={}; fewest={}; heap=[(0, 0, start, ())]
+    while heap:
+        cost,n,(x,y),path=heapq.heappop(heap)
+        if fewest.get((x,y), rng+1)<=n: continue
+        fewest[(x,y)]=n
+        if (x,y) not in field: field[(x,y)]=(cost, path)
+        if n==rng or (path and stops((x,y))): continue
+        for t in ((x+1,y),(x-1,y),(x,y+1),(x,y-1)):
+            if 0<=t[0]<w and 0<=t[1]<h and fewest.get(t, rng+1)>n+1 and not blocked(t):
+                heapq.heappush(heap, (cost+1+(MOVE_RISK if risky(t) else 0), n+1, t, path+(t,)))
+    del field[start]
+    return field
+
+# Every range query (unit moves, radar cover, blast radius, missile reach) is a Manhattan
+# diamond. Offsets are built once per radius and clipped tile lists once per (centre, radius,
+# column span, grid height), so callers just walk a cached tuple.
+@functools.lru_cache(maxsize=None)
+def disk_offsets(r):
+    return tuple((dx,dy) for dx in range(-r, r+1) for dy in range(-(r-abs(dx)), r-abs(dx)+1))
+
+@functools.lru_cache(maxsize=8192)
+def disk(center, r, x0, x1, h):
+    # Tiles within distance r of center, clipped to columns [x0,x1) and rows [0,h), column-major.
+    cx,cy=center
+    if (x1-x0)*h < 2*r*r+2*r+1:   # clip box smaller than the diamond: scan the box instead
+        return tuple((x,y) for x in range(x0,x1) for y in range(h) if abs(x-cx)+abs(y-cy)<=r)
+    return tuple((cx+dx,cy+dy) for dx,dy in disk_offsets(r) if x0<=cx+dx<x1 and 0<=cy+dy<h)
+
+def int_tile(t):
+    x,y=t; return int(x), int(y)
+
+def disk_in(center, r, cols, h):
+    return disk(center, r, cols.start, cols.stop, h)
+
+# Grid-wide arrays for the AI's target scoring; indexed [y, x] like an image.
+@functools.lru_cache(maxsize=64)
+def launch_reach(cols, w, h):
+    # Distance from every tile to the nearest launch tile when launches may use columns `cols`:
+    # whole columns, so just the column gap (same row), O(w*h) on any board.
+    own=np.zeros((h,w),bool); own[:, cols.start:cols.stop]=True
+    x=np.arange(w); gap=np.maximum(0, np.maximum(cols.start-x, x-(cols.stop-1)))
+    return own, np.broadcast_to(gap, (h,w))
+
+@functools.lru_cache(maxsize=64)
+def row_pull(h):
+    # The AI's small preference for targets near the middle rows, as an (h, 1) column.
+    rows=np.arange(h)[:,None]
+    return (h//2-np.abs(rows-h//2))*0.1
+
+def disk_sum(grid, r):
+    # Sum of `grid` over the radius-r diamond around every tile (zero outside the board).
+    h,w=grid.shape; p=np.pad(grid, r); out=np.zeros_like(grid)
+    for dx,dy in disk_offsets(r): out+=p[r+dy:r+dy+h, r+dx:r+dx+w]
+    return out
+
+class RadarCoverage:
+    # Tiles one side's radars see, kept as a per-tile count of covering radars so placing or
+    # losing a radar only touches its own diamond. `tiles` is the live set of covered tiles;
+    # `version` bumps on every change.
+    def __init__(self, cols, h):
+        self.cols=cols; self.h=h; self.count={}; self.tiles=set(); self.radars={}; self.version=0
+    def diamond(self, pos, r): return disk_in(pos, r, self.cols, self.h)
+    def add(self, pos, r):
+        self.radars[pos]=r; self.version+=1
+        for t in self.diamond(pos, r):
+            n=self.count.get(t,0)
+            if n==0: self.tiles.add(t)
+            self.count[t]=n+1
+    def remove(self, pos):
+        r=self.radars.pop(pos, None)
+        if r is None: return
+        self.version+=1
+        for t in self.diamond(pos, r):
+            n=self.count[t]-1
+            if n==0: del self.count[t]; self.tiles.discard(t)
+            else: self.count[t]=n
+    def set_range(self, r):
+        for pos in list(self.radars): self.remove(pos); self.add(pos, r)
+    def copy(self):
+        c=RadarCoverage.__new__(RadarCoverage)
+        c.cols=self.cols; c.h=self.h; c.count=dict(self.count); c.tiles=set(self.tiles); c.radars=dict(self.radars); c.version=self.version
+        return c
+
+# ---- action log ----
+# One record per action: a header byte (op << 1 | side) then a fixed payload; a move adds one
+# (x, y) pair per step. A purchase and a shot carry a 16-bit index and a move a 32-bit unit id,
+# the widths saves give missile counts and ids. Coordinates are one byte each, or big-endian
+# 16-bit on wide boards (Scenario.wide). Decoding gives back step()'s tuples; "intercept"
+# records (hit, aa_tile) are written by the rules when AA engages.
+LOG_OPS    = ("pass","place","retract","start","buy","fire","move","intercept")
+LOG_OP     = {op:i for i,op in enumerate(LOG_OPS)}
+LOG_KINDS  = tuple(TOKEN_ATTR)
+LOG_SIZES  = (1,4,3,1,3,7,6,4)   # record length per op with byte coordinates (moves add a pair a step)
+LOG_COORDS = (0,2,2,0,0,4,0,2)   # coordinates in each op's fixed payload
+LOG_STEPS  = 5                   # offset of a move's step count
+PASS       = ("pass",)
+
+class ActionLog:
+    def __init__(self, data=b"", wide=False):
+        self.buf=bytearray(data); self.starts=starts=array("I"); self.wide=wide
+        cw=2 if wide else 1; sizes=[n+(cw-1)*c for n,c in zip(LOG_SIZES, LOG_COORDS)]
+        p=0; n=len(data); data=self.buf
+        while p<n:   # re-index a saved log, refusing records no build writes
+            starts.append(p); op=data[p]>>1
+            if op>=len(sizes) or (op==1 and p+1<n and data[p+1]>=len(LOG_KINDS)):
+                raise ValueError(f"bad action log record at byte {p}")
+            p+=sizes[op]+2*cw*data[p+LOG_STEPS] if op==6 and p+LOG_STEPS<n else sizes[op]
+        if p!=n: raise ValueError("truncated action log")
+
+    def __len__(self): return len(self.starts)
+    def __iter__(self): return (self[i] for i in range(len(self)))
+    def __bytes__(self): return bytes(self.buf)
+    def copy(self):
+        c=ActionLog.__new__(ActionLog); c.buf=bytearray(self.buf); c.starts=array("I", self.starts); c.wide=self.wide
+        return c
+
+    def xy(self, *v): return struct.pack(f">{len(v)}H", *v) if self.wide else bytes(v)
+    def xy_at(self, p, n): return struct.unpack_from(f">{n}H", self.buf, p) if self.wide else tuple(self.buf[p:p+n])
+
+    def append(self, key, action):
+        # The record is built whole before it joins the log, so one that can't be encoded
+        # raises with the log as it was (Engine.step() only hands over checked actions).
+        op=LOG_OP[action[0]]; b=bytearray((op<<1 | (key=="p2"),))
+        if op==1: b.append(LOG_KINDS.index(action[1])); b+=self.xy(*action[2])
+        elif op==2: b+=self.xy(*action[1])
+        elif op==4: b+=int(action[1]).to_bytes(2, "big")
+        elif op==5: b+=int(action[1]).to_bytes(2, "big"); b+=self.xy(*action[2], *action[3])
+        elif op==6: b+=int(action[1]).to_bytes(4, "big"); b.append(len(action[2])); b+=self.xy(*(c for p in action[2] for c in p))
+        elif op==7: b.append(bool(action[1])); b+=self.xy(*action[2])
+        self.starts.append(len(self.buf)); self.buf+=b
+
+    def __getitem__(self, i):
+        # (key, action) of record i; a slice gives a list.
+        if isinstance(i, slice): return [self[j] for j in range(*i.indices(len(self)))]
+        b=self.buf; p=self.starts[i]; op=b[p]>>1; key="p2" if b[p]&1 else "p1"; p+=1
+        if op==1: a=("place", LOG_KINDS[b[p]], self.xy_at(p+1, 2))
+        elif op==2: a=("retract", self.xy_at(p, 2))
+        elif op==4: a=("buy", b[p]<<8 | b[p+1])
+        elif op==5: v=self.xy_at(p+2, 4); a=("fire", b[p]<<8 | b[p+1], v[:2], v[2:])
+        elif op==6: v=self.xy_at(p+5, 2*b[p+4]); a=("move", int.from_bytes(b[p:p+4], "big"), list(zip(v[::2], v[1::2])))
+        elif op==7: a=("intercept", bool(b[p]), self.xy_at(p+1, 2))
+        else: a=(LOG_OPS[op],)
+        return key, a
+
+    def record_bytes(self, i):
+        end=self.starts[i+1] if i+1<len(self.starts) else len(self.buf)
+        return bytes(self.buf[self.starts[i]:end])
+
+# Saved match: magic, format version, seed, human flags, both country names, the board
+# (name, then width, height and km per tile as 16-bit), then the log. Version 1 files have no
+# board and are classic; versions 1 and 2 logged shots with an 8-bit missile index and moves
+# with a 16-bit unit id (see widen_log).
+REPLAY_MAGIC   = b"WBR"
+REPLAY_VERSION = 3
+REPLAY_BOARD   = struct.Struct(">HHH")
+
+def widen_log(data, wide):
+    # A version 1/2 log in the current layout. Records past a truncation or bad op are copied
+    # as they are, for ActionLog to refuse.
+    cw=2 if wide else 1; out=bytearray(); p=0; n=len(data)
+    while p<n:
+        op=data[p]>>1
+        if op>=len(LOG_SIZES): out+=data[p:]; break
+        if op==5: k=LOG_SIZES[op]-1+(cw-1)*LOG_COORDS[op]; out+=data[p:p+1]+b"\0"+data[p+1:p+k]
+        elif op==6: k=4+2*cw*data[p+3] if p+3<n else n-p; out+=data[p:p+1]+b"\0\0"+data[p+1:p+k]
+        else: k=LOG_SIZES[op]+(cw-1)*LOG_COORDS[op]; out+=data[p:p+k]
+        p+=k
+    return bytes(out)
+
+def replay(data, upto=None):
+    # Re-runs a saved match headless (no rendering, no AI calls) up to record `upto` (default:
+    # all) and returns the engine. Every record the rules write (AA engagements) must match the
+    # recording; the first one that doesn't (or that the rules can't apply or don't log)
+    # raises ValueError naming its index.
+    data=bytes(data)
+    if data[:3]!=REPLAY_MAGIC or len(data)<4 or not 1<=data[3]<=REPLAY_VERSION: raise ValueError("not a v%d replay" % REPLAY_VERSION)
+    try:
+        seed=int.from_bytes(data[4:12], "big"); flags=data[12]; p=13; names=[]
+        for _ in range(3 if data[3]>1 else 2):
+            n=data[p]; names.append(data[p+1:p+1+n].decode("utf-8")); p+=1+n
+        board=CLASSIC
+        if data[3]>1: board=Scenario(names.pop(), *REPLAY_BOARD.unpack_from(data, p)); p+=REPLAY_BOARD.size
+    except (IndexError, struct.error): raise ValueError("truncated replay header") from None
+    if not all(lo<=v<=hi for (lo,hi),v in zip(SCENARIO_LIMITS.values(), (board.w, board.h, board.km_per_tile))):
+        raise ValueError(f"replay board out of range: {board}")
+    log=ActionLog(data[p:] if data[3]>2 else widen_log(data[p:], board.wide), board.wide)
+    n=len(log) if upto is None else min(upto, len(log))
+    e=Engine(board); e.new_match(names[0], names[1], bool(flags&1), bool(flags&2), seed=seed)
+    while len(e.log)<n:
+        i=len(e.log); key,a=log[i]
+        if a[0]=="intercept": raise ValueError(f"replay diverges at record {i}: recorded {log[i]}, replayed nothing")
+        try: e.step(a, key)
+        except (IndexError, KeyError): raise ValueError(f"replay diverges at record {i}: recorded {log[i]} does not apply") from None
+        if len(e.log)==i: raise ValueError(f"replay diverges at record {i}: recorded {log[i]}, replayed nothing")
+        for j in range(i, min(len(e.log), n)):
+            if e.log.record_bytes(j)!=log.record_bytes(j):
+                raise ValueError(f"replay diverges at record {j}: recorded {log[j]}, replayed {e.log[j]}")
+    return e
+
+class Engine:
+    def __init__(self, scenario=None, record=True):
+        self.p1=self.p2=None; self.recording=record
+        self.phase=PHASE_SETUP; self.turn="p1"; self.round=0; self.winner=None
+        self.revealed_p1=set(); self.revealed_p2=set()
+        self.set_scenario(scenario or CLASSIC)
+        self.destroyed_tiles=set()
+        self.events=[]
+        self.seed=None; self.rng=random.Random(); self.ai_rng=random.Random()
+
+    def set_scenario(self, scenario):
+        # Board geometry for the next match: a Scenario or a scenario name.
+        if isinstance(scenario, str): scenario=load_scenario(scenario)
+        self.scenario=scenario; self.w,self.h,self.km_per_tile=scenario.w, scenario.h, scenario.km_per_tile
+        self.mid_x=self.w//2; self.log=ActionLog(wide=scenario.wide)
+        self.coverage={k:RadarCoverage(self.target_cols(k), self.h) for k in ("p1","p2")}
+        self.fields={}; self.fields_stamp=None; self.shot_cache={}   # a new match's versions restart
+
+    # ---- sides & geometry ----
+    def side(self, key): return self.p1 if key=="p1" else self.p2
+    def enemy(self, key): return self.p2 if key=="p1" else self.p1
+    def revealed(self, key): return self.revealed_p1 if key=="p1" else self.revealed_p2
+    def radar_cover(self, key): return self.coverage[key].tiles
+    market_items   = property(lambda self: build_market())   # built on first use, shared
+    radar_cover_p1 = property(lambda self: self.coverage["p1"].tiles)
+    radar_cover_p2 = property(lambda self: self.coverage["p2"].tiles)
+    def own_cols(self, key): return range(0, self.mid_x) if key=="p1" else range(self.mid_x+1, self.w)
+    def target_cols(self, key): return range(self.mid_x, self.w) if key=="p1" else range(0, self.mid_x)
+    def on_board(self, gx, gy): return 0<=gx<self.w and 0<=gy<self.h
+    def in_own_half(self, key, gx): return gx<self.mid_x if key=="p1" else gx>self.mid_x
+    def in_target_half(self, key, gx): return gx>=self.mid_x if key=="p1" else gx<self.mid_x
+
+    def copy(self, seed=None):
+        # Independent clone of the match state (events are not carried over); tens of
+        # microseconds, so search code can branch freely. The copy rolls its own dice, seeded
+        # from `seed` or else from this match's seed and log position (round and turn when
+        # unrecorded); this engine's streams are left untouched.
+        c=Engine.__new__(Engine); c.__dict__.update(self.__dict__)
+        c.p1=self.p1.copy() if self.p1 else None; c.p2=self.p2.copy() if self.p2 else None
+        c.revealed_p1=set(self.revealed_p1); c.revealed_p2=set(self.revealed_p2)
+        c.coverage={k:v.copy() for k,v in self.coverage.items()}
+        c.destroyed_tiles=set(self.destroyed_tiles); c.events=[]; c.log=self.log.copy(); c.fields={}; c.shot_cache={}
+        pos=len(self.log.buf) if self.recording else self.round<<1 | (self.turn=="p2")
+        mix=(self.seed or 0)<<33 | pos<<1
+        c.rng=random.Random(mix if seed is None else seed); c.ai_rng=random.Random(mix|1)
+        return c
+
+    def emit(self, kind, *args):
+        if self.recording: self.events.append((kind,)+args)
+    def info(self, text, frames=60): self.emit("info", text, frames)
+    def record(self, key, action):
+        if self.recording: self.log.append(key, action)
+
+    def replay_bytes(self):
+        # The match so far in replay()'s format.
+        if not self.recording: raise ValueError("match was not recorded")
+        head=REPLAY_MAGIC+bytes((REPLAY_VERSION,))+self.seed.to_bytes(8, "big")+bytes((self.p1.is_human | self.p2.is_human<<1,))
+        for name in (self.p1.name, self.p2.name, self.scenario.name):
+            name=name.encode("utf-8"); head+=bytes((len(name),))+name
+        return head+REPLAY_BOARD.pack(self.w, self.h, self.km_per_tile)+bytes(self.log)
+
+    # ---- setup ----
+    def new_match(self, p1_name, p2_name, p1_human=True, p2_human=False, seed=None, scenario=None):
+        # Same names, human flags, seed and board => same setup and the same dice for the same
+        # actions. `scenario` (a Scenario or name) switches boards; default: keep this one.
+        if seed is None: seed=random.getrandbits(63)
+        self.set_scenario(scenario or self.scenario)
+        self.revealed_p1=set(); self.revealed_p2=set(); self.destroyed_tiles=set()
+        self.seed=seed; self.rng=random.Random(seed); self.ai_rng=random.Random(f"ai:{seed}")
+        self.p1=PlayerSide(p1_name, p1_human, "p1", self.km_per_tile); self.p2=PlayerSide(p2_name, p2_human, "p2", self.km_per_tile)
+        self.place_facilities(self.p1); self.place_facilities(self.p2)
+        for s in (self.p1, self.p2):
+            if not s.is_human: self.ai_deploy(s.key)
+        self.phase=PHASE_DEPLOY; self.turn="p1"; self.round=0; self.winner=None
+
+    def start_battle(self):
+        self.record("p1", ("start",))
+        self.phase=PHASE_BATTLE; self.turn="p1"; self.round=1
+        self.p1.shots_left=1
+
+    def rand_tile(self, key, used=None):
+        if used is None: used=set()
+        rx=self.own_cols(key)
+        for _ in range(200):
+            gx=self.rng.choice(list(rx)); gy=self.rng.randrange(self.h)
+            if (gx,gy) not in used: return gx,gy
+        return (list(rx)[0], 0)
+
+    def place_facilities(self, side):
+        side.set_facilities([]); used=set()
+        xr = range(0, self.mid_x-1) if side.key=="p1" else range(self.mid_x+1, self.w)
+        for f in FACILITY_NAMES:
+            for _ in range(200):
+                gx=self.rng.choice(xr); gy=self.rng.randrange(self.h)
+                if self.on_board(gx,gy) and (gx,gy) not in used:
+                    used.add((gx,gy)); side.add_facility(f, (gx,gy)); break
+
+    def ai_deploy(self, key):
+        side=self.side(key); used=set()
+        for t in ("Tank","Troop","Jet"):
+            attr=TOKEN_ATTR[t]
+            for _ in range(getattr(side,attr)):
+                gx,gy=self.rand_tile(key, used=used); self.add_unit(side, t, (gx,gy)); used.add((gx,gy))
+            setattr(side,attr,0)
+        if key=="p1": lo,hi=max(0,self.mid_x-4), self.mid_x-1
+        else:         lo,hi=self.mid_x+1, min(self.w-1, self.mid_x+4)
+        radar_spots=[]
+        for _ in range(max(1,side.radar_tokens)):
+            rx=self.rng.randint(lo,hi)
+            ry=self.rng.randrange(self.h)
+            while (rx,ry) in used: ry=(ry+1)%self.h
+            used.add((rx,ry)); self.add_static(side, "Radar", (rx,ry)); radar_spots.append((rx,ry))
+        side.radar_tokens=0
+        cols=self.own_cols(key); n_aa=max(1,side.aa_tokens//2)
+        for _ in range(n_aa):
+            if radar_spots:
+                brx,bry=self.rng.choice(radar_spots)
+                ax=max(cols[0], min(cols[-1], brx + self.rng.randint(-2,2)))
+                ay=max(0, min(self.h-1, bry + self.rng.randint(-2,2)))
+            else:
+                ax=self.rng.randint(cols[0], cols[-1]); ay=self.rng.randrange(self.h)
+            while (ax,ay) in used: ay=(ay+1)%self.h
+            used.add((ax,ay)); self.add_static(side, "AA", (ax,ay))
+        side.aa_tokens=max(0, side.aa_tokens-n_aa)
+
+    # ---- deploy / market ----
+    def can_place(self, key, gx, gy):
+        side=self.side(key)
+        return self.on_board(gx,gy) and self.in_own_half(key,gx) and side.mobile_at(gx,gy)[0] is None and not side.has_static_at(gx,gy)
+
+    def place(self, key, kind, tile):
+        side=self.side(key); gx,gy=tile; attr=TOKEN_ATTR.get(kind)
+        if attr is None or getattr(side,attr)<=0 or not self.can_place(key,gx,gy): return False
+        if kind in ("AA","Radar"): self.add_static(side, kind, (gx,gy))
+        else: self.add_unit(side, kind, (gx,gy))
+        setattr(side, attr, getattr(side,attr)-1)
+        return True
+
+    def retract(self, key, tile):
+        side=self.side(key); gx,gy=tile
+        uid,t=side.mobile_at(gx,gy)
+        if uid is not None:
+            setattr(side, TOKEN_ATTR[t], getattr(side,TOKEN_ATTR[t])+1)
+            side.remove_unit(uid); self.info("Unit retracted."); return t
+        sid,st=side.static_at(gx,gy)
+        if sid is not None:
+            setattr(side, TOKEN_ATTR[st], getattr(side,TOKEN_ATTR[st])+1)
+            side.remove_static(sid)
+            if st=="Radar": self.coverage[key].remove((gx,gy))
+            self.info(f"{st} removed."); return st
+        return None
+
+    def buy(self, key, item):
+        side=self.side(key)
+        if side.money < item["price"]:
+            self.info("Not enough money", 90); return False
+        side.money -= item["price"]
+        if "missile" in item:
+            n,rg,dm,rd=item["missile"]
+            anti=item.get("anti",False)
+            side.missiles.append(Missile(n,rg,dm,rd,anti_radar=anti,km_per_tile=self.km_per_tile)); self.info(f"Bought {n}", 90)
+        elif item.get("grant")=="AA":
+            side.aa_tokens+=1; self.info(f"Bought {item['name']} (AA token +1)", 90)
+            perk=item.get("perk")
+            if perk=="s400": side.aa_range_bonus += 1; side.defences_changed()
+            elif perk=="patriot": side.intercept_cash_bonus += 10
+            elif perk=="akash": side.intercept_cash_bonus += 5
+            elif perk=="irondome": side.intercept_cash_bonus += 8
+        elif item.get("grant")=="Radar":
+            side.radar_tokens+=1; side.radar_range_bonus += 1; self.radar_range_changed(side); self.info(f"Bought {item['name']} (Radar token +1, +range)", 90)
+        else:
+            attr=TOKEN_ATTR.get(item["name"])
+            if attr: setattr(side, attr, getattr(side,attr)+1)
+            self.info(f"Bought {item['name']}. Place with 1–3/5–6.", 90)
+        return True
+
+    # ---- vision ----
+    # Radar cover and the "radar gives itself away" reveals are maintained from the events that
+    # change them (radar placed/lost, radar range bought, unit placed/moved), not per frame.
+    def radar_range(self, side): return RADAR_RANGE_BASE + side.radar_range_bonus
+
+    def add_unit(self, side, kind, pos):
+        side.add_unit(kind, pos); self.unit_moved(side, pos)
+
+    def add_static(self, side, kind, pos):
+        side.add_static(kind, pos)
+        if kind=="Radar":
+            self.coverage[side.key].add(pos, self.radar_range(side)); self.radar_spotting(side, pos)
+
+    def unit_moved(self, side, pos):
+        # A unit inside an enemy radar's range reveals that radar's tile to the unit's owner.
+        foe=self.enemy(side.key)
+        if not foe: return
+        r=self.radar_range(foe); seen=self.revealed(side.key)
+        for rx,ry in foe.radar_sites:
+            if abs(rx-pos[0])+abs(ry-pos[1])<=r: seen.add((rx,ry))
+
+    def radar_spotting(self, side, pos):
+        foe=self.enemy(side.key)
+        if not foe: return
+        r=self.radar_range(side)
+        for u in foe.units:
+            if abs(u.pos[0]-pos[0])+abs(u.pos[1]-pos[1])<=r: self.revealed(foe.key).add(pos); break
+
+    def radar_range_changed(self, side):
+        side.defences_changed()
+        self.coverage[side.key].set_range(self.radar_range(side))
+        for pos in side.radar_sites: self.radar_spotting(side, pos)
+
+    def rebuild_vision(self):
+        # Full recompute from the unit/static lists, for state that was edited wholesale.
+        for side in (self.p1, self.p2):
+            if not side: continue
+            cov=self.coverage[side.key]=RadarCoverage(self.target_cols(side.key), self.h)
+            side.index_units(); side.index_static()
+            for pos in side.radar_sites: cov.add(pos, self.radar_range(side)); self.radar_spotting(side, pos)
+
+    # ---- rules ----
+    def find_interceptor(self, deff, gx,gy):
+        # Nearest AA (first listed on ties) in range of a tile the defender's radar covers.
+        memo=deff.intercepts
+        if (gx,gy) in memo: return memo[(gx,gy)]
+        r_rng = RADAR_RANGE_BASE + deff.radar_range_bonus
+        a_rng = AA_RANGE_BASE + deff.aa_range_bonus
+        best=None
+        if any(abs(rx-gx)+abs(ry-gy)<=r_rng for rx,ry in deff.radar_sites):
+            bd=999
+            for ax,ay in deff.aa_sites:
+                d=abs(ax-gx)+abs(ay-gy)
+                if d<=a_rng and d<bd: bd=d; best=(ax,ay)
+        memo[(gx,gy)]=best
+        return best
+
+    def resolve_clash(self, atk_type, def_type):
+        if atk_type=="Jet" and def_type in ("Tank","Troop"): return "attacker"
+        if atk_type=="Tank" and def_type=="Troop": return "attacker"
+        if def_type=="Jet" and atk_type in ("Tank","Troop"): return "defender"
+        if def_type=="Tank" and atk_type=="Troop": return "defender"
+        a=UNIT_META[atk_type]["power"] + self.rng.random()
+        d=UNIT_META[def_type]["power"] + self.rng.random()
+        return "attacker" if a>=d else "defender"
+
+    def can_fire(self, key, launch, target, missile):
+        # From its own half to a tile in the target half, within range (inlined: hot in training).
+        (lx,ly),(tx,ty)=launch,target; mid=self.mid_x
+        return (lx<mid<=tx if key=="p1" else tx<mid<lx) and 0<=lx<self.w and 0<=tx<self.w and 0<=ly<self.h \
+            and 0<=ty<self.h and abs(tx-lx)+abs(ty-ly)<=missile.range_tiles
+
+    def plan_missile(self, key, launch, target, missile):
+        # Decided at launch: the first tile on the flight path inside enemy AA cover spawns the
+        # interceptor, which wins if it lands before the missile does. Renderers only need to
+        # interpolate the two flights; intercept_idx / intercept_steps say when and how long.
+        deff=self.enemy(key); steps,tiles=flight_tiles(launch, target)
+        flight={"att":key,"missile":missile,"launch":launch,"target":target,"steps":steps,
+                "intercept_idx":None,"intercept_steps":None,"aa":None,"intercepted":False}
+        if missile.anti_radar: return flight
+        memo=deff.intercepts
+        for i,t in tiles:
+            aa_pos=memo[t] if t in memo else self.find_interceptor(deff, *t)
+            if aa_pos:
+                n=intercept_steps(aa_pos, *flight_point(launch, target, i, steps))
+                flight.update(intercept_idx=i, intercept_steps=n, aa=aa_pos,
+                              intercepted=n+1 <= MISSILE_HOLD_FRAMES*(steps+1-i))
+                break
+        return flight
+
+    def resolve_interception(self, flight):
+        deff=self.enemy(flight["att"])
+        deff.money += 35 + deff.intercept_cash_bonus
+        self.info("AA intercepted.", 90)
+
+    def resolve_missile(self, att, deff, target_xy, missile):
+        # Only the blast's tiles are looked at: the side indexes give the units and statics on
+        # them, and the (few) facilities are checked directly.
+        affected=disk(tuple(target_xy), max(1,missile.radius_tiles), 0, self.w, self.h)
+        self.revealed(att.key).update(affected)
+        if self.recording:
+            for tile in affected: self.emit("explosion", tile, 32)
+        units=deff.unit_index; defs=deff.static_index; facs={f.pos for f in deff.facilities}
+        hit=[t for t in affected if t in units or t in defs or t in facs]
+        if hit:
+            hit_set=set(hit)
+            if any(t in units for t in hit): deff.set_units([u for u in deff.units if u.pos not in hit_set])
+            for pos in deff.radar_sites:
+                if pos in hit_set: self.coverage[deff.key].remove(pos)
+            if any(t in defs for t in hit): deff.set_static([s for s in deff.static if s.pos not in hit_set])
+            if any(t in facs for t in hit): deff.set_facilities([f for f in deff.facilities if f.pos not in hit_set])
+            self.destroyed_tiles.update(hit)
+        asset_hits=len(hit)
+        base = int(missile.damage*0.75) if asset_hits>0 else self.rng.randint(0,1)
+        bonus = max(0, asset_hits-1) * 4
+        total = min(40, base + bonus)
+        deff.damage=min(100, deff.damage+total)
+        att.money += 5*total + 15*asset_hits; att.tokens += asset_hits
+        if self.recording: self.info(f"{att.name} {missile.name} +{total}%  Hits:{asset_hits}  $+{5*total + 15*asset_hits}", 120)
+        self.check_game_end()
+
+    def land_missile(self, flight):
+        if flight["aa"]: self.record(self.enemy(flight["att"]).key, ("intercept", flight["intercepted"], flight["aa"]))
+        if flight["intercepted"]: self.resolve_interception(flight)
+        else: self.resolve_missile(self.side(flight["att"]), self.enemy(flight["att"]), flight["target"], flight["missile"])
+
+    # ---- movement ----
+    def board_stamp(self):
+        # Changes whenever anything a move field depends on might have: the turn, either side's
+        # pieces or defence ranges, or what either side has seen.
+        return (self.round, self.turn, self.p1.version, self.p2.version, len(self.revealed_p1), len(self.revealed_p2),
+                self.coverage["p1"].version, self.coverage["p2"].version, self.p1.aa_range_bonus, self.p2.aa_range_bonus)
+
+    def move_rules(self, key, u):
+        # move_field()'s blocked/stops/risky tests for unit `u`, from what `key` knows: enemy units
+        # are stops once seen, and a Jet's risky tiles are those a seen AA would engage under a
+        # seen radar (find_interceptor's rule, minus the fog).
+        side=self.side(key); foe=self.enemy(key); seen=self.revealed(key); cover=self.radar_cover(key)
+        known=lambda t: t in seen or t in cover
+        risky=None
+        if u.type=="Jet":
+            r_rng=RADAR_RANGE_BASE+foe.radar_range_bonus; a_rng=AA_RANGE_BASE+foe.aa_range_bonus
+            radars=[p for p in foe.radar_sites if known(p)]; aas=[p for p in foe.aa_sites if known(p)]
+            if radars and aas:
+                risky=lambda t: (any(abs(x-t[0])+abs(y-t[1])<=a_rng for x,y in aas) and
+                                 any(abs(x-t[0])+abs(y-t[1])<=r_rng for x,y in radars))
+        return (lambda t: t in side.unit_index or t in side.static_index), (lambda t: t in foe.unit_index and known(t)), risky
+
+    def move_field(self, key, uid):
+        # Where unit `uid` can go this turn, cached until the board stamp changes.
+        stamp=self.board_stamp()
+        if stamp!=self.fields_stamp: self.fields={}; self.fields_stamp=stamp
+        f=self.fields.get((key,uid))
+        if f is not None: return f
+        u=self.side(key).unit(uid)
+        if u is None: return {}
+        f=self.fields[(key,uid)]=move_field(u.pos, UNIT_META[u.type]["range"], self.w, self.h, *self.move_rules(key, u))
+        return f
+
+    def move_path(self, key, uid, goal):
+        hit=self.move_field(key, uid).get(goal)
+        return list(hit[1]) if hit else None
+
+    def legal_path(self, key, uid, path):
+        # Whether unit `uid` may walk `path` this turn under move_field()'s rules: orthogonal
+        # steps from its tile, no more than its range, never into its own side's pieces and
+        # stopping at the first known enemy. Risk only prices a route, so it doesn't count here.
+        u=self.side(key).unit(uid)
+        if u is None or not path or len(path)>UNIT_META[u.type]["range"]: return False
+        blocked,stops,_=self.move_rules(key, u); prev=u.pos
+        for i,t in enumerate(path):
+            t=tuple(t)
+            if abs(t[0]-prev[0])+abs(t[1]-prev[1])!=1 or not self.on_board(*t) or blocked(t) or (i and stops(prev)): return False
+            prev=t
+        return True
+
+    def advance_path(self, key, uid):
+        # The AI's advance: the furthest safe tile toward the enemy that stops short of the half
+        # that scores occupation damage, staying near its row; [] if no such tile gains ground.
+        # A clear, safe straight run is that tile already, so search only when the lane isn't.
+        u=self.side(key).unit(uid)
+        if u is None: return []
+        gx,gy=u.pos; rng=UNIT_META[u.type]["range"]
+        steps=min(rng, max(0, gx-self.mid_x)) if key=="p2" else min(rng, max(0, self.mid_x-1-gx))
+        if not steps: return []
+        lane=[(gx+u.dir*(s+1), gy) for s in range(steps)]
+        blocked,stops,risky=self.move_rules(key, u)
+        if not any(blocked(t) or (risky and risky(t)) for t in lane) and not any(stops(t) for t in lane[:-1]): return lane
+        best=None
+        for t,(cost,path) in self.move_field(key, uid).items():
+            if cost>len(path) or self.in_target_half(key, t[0]): continue
+            rank=(u.dir*(t[0]-gx), -cost, -abs(t[1]-gy))
+            if rank[0]>0 and (best is None or rank>best[0]): best=(rank, path)
+        return list(best[1]) if best else []
+
+    def plan_moves(self, key, orders):
+        # Units jump to their final tiles now; the returned steps are resolved one by one.
+        # Orders and steps name units by id, so losses mid-sequence can't retarget later steps.
+        side=self.side(key); seq=[]
+        for order in orders:
+            u=side.unit(order["uid"])
+            if u is None: continue
+            t=u.type; gx,gy=u.pos
+            for step in order["path"]:
+                seq.append({"owner":key,"t":t,"dir":side.dir,"start":(gx,gy),"end":step,"speed":UNIT_META[t]["speed"],"uid":u.id})
+                gx,gy=step
+            side.move_unit(u.id, (gx,gy)); self.unit_moved(side, (gx,gy))
+        side.orders.clear()
+        return seq
+
+    def resolve_move_step(self, step):
+        # Returns False when the rest of the sequence is cancelled (jet shot down).
+        # Steps of a unit already lost earlier in the sequence resolve to nothing.
+        key=step["owner"]; mover=self.side(key); foe=self.enemy(key)
+        gx,gy=step["end"]; uid=step["uid"]
+        if mover.unit(uid) is None: return True
+        if step["t"]=="Jet":
+            aa=self.find_interceptor(foe, gx,gy)
+            if aa:
+                self.emit("explosion", (gx,gy), 22); self.record(foe.key, ("intercept", True, aa))
+                mover.remove_unit(uid)
+                foe.money += 25 + foe.intercept_cash_bonus
+                self.info("Enemy AA shot down your jet." if key=="p1" else "AA shot down enemy jet.", 90)
+                return False
+        j,t=foe.mobile_at(gx,gy)
+        if j is not None:
+            outcome=self.resolve_clash(step["t"], t)
+            self.emit("explosion", (gx,gy), 22)
+            if outcome=="attacker":
+                foe.remove_unit(j); self.revealed(key).add((gx,gy))
+            else:
+                mover.remove_unit(uid)
+        return True
+
+    def apply_occupation(self, key):
+        # The gain only changes with the side's pieces, so it is kept per side version.
+        side=self.side(key); foe=self.enemy(key); occ=side.occupation
+        if occ[0]!=side.version:
+            mid=self.mid_x; hit=(lambda x: x>=mid) if key=="p1" else (lambda x: x<mid)
+            occ=side.occupation=(side.version, sum([UNIT_POWER[u.type] for u in side.units if hit(u.pos[0])]))
+        occ_gain=occ[1]
+        foe.damage=min(100, foe.damage+occ_gain)
+        self.check_game_end()
+
+    def check_game_end(self):
+        if not (self.p1 and self.p2): return
+        if self.p1.damage>=100 or self.p2.damage>=100:
+            self.phase=PHASE_OVER
+            self.winner = "p1" if self.p2.damage>=100 else "p2"
+
+    @property
+    def over(self): return self.phase==PHASE_OVER
+
+    def end_turn(self, key):
+        # Occupation damage is scored once per round, after the left-hand side has acted.
+        if key=="p1" and self.phase!=PHASE_OVER: self.apply_occupation(key)
+        if self.phase==PHASE_OVER: return
+        self.turn = "p2" if key=="p1" else "p1"
+        if self.turn=="p1": self.round+=1
+        self.side(self.turn).shots_left=1
+
+    # ---- AI ----
+    def known_targets(self, key):
+        # Tiles of enemy assets `key` knows about (facilities are public, units and statics only
+        # where it has seen), and the subset holding AA/radar.
+        foe=self.enemy(key); seen=self.revealed(key)|self.radar_cover(key)
+        occ=np.zeros((self.h,self.w)); defs=np.zeros((self.h,self.w))
+        for f in foe.facilities: occ[f.pos[1],f.pos[0]]=1
+        for u in foe.units:
+            if u.pos in seen: occ[u.pos[1],u.pos[0]]=1
+        for s in foe.static:
+            if s.pos in seen: occ[s.pos[1],s.pos[0]]=1; defs[s.pos[1],s.pos[0]]=1
+        return occ, defs
+
+    def ai_pick_shot(self, key):
+        shots=self.ai_shots(key, 1)
+        return shots[0] if shots else None
+
+    def ai_shots(self, key, k=1):
+        # The k best (missile_idx, launch, target) shots, best first. Scores every (missile,
+        # target) at once: resolve_missile's damage for the known asset tiles under the blast, a
+        # bonus for stripping AA/radar, a pull toward the middle rows and a little seeded jitter;
+        # targets must be within range of some launch tile, and are fired from the nearest one
+        # (the closest own column, same row).
+        side=self.side(key); h,w=self.h,self.w; cols=self.own_cols(key)
+        prior=(row_pull(h) + np.random.default_rng(self.ai_rng.getrandbits(32)).random((h,w))*0.05).ravel()
+        best=[]
+        for mi,m in enumerate(side.missiles):
+            score=self.shot_value(key, max(1,m.radius_tiles), m.damage, m.range_tiles)+prior
+            top=(score.argmax(),) if k==1 else np.argpartition(-score, k-1)[:k] if k<score.size else np.arange(score.size)
+            best.extend((float(score[i]), -mi, int(i)) for i in top if score[i]>=0)
+        best.sort(reverse=True)
+        shots=[]
+        for _,mi,i in best[:k]:
+            ty,tx=divmod(i,w); shots.append((-mi, (min(max(tx, cols.start), cols.stop-1), ty), (tx,ty)))
+        return shots
+
+    def shot_value(self, key, r, damage, range_tiles):
+        # ai_shots()'s jitter-free scores for one kind of missile, flat, -inf where it can't
+        # reach. They depend only on the enemy's pieces and what `key` has seen, so they are
+        # cached until either changes, across turns.
+        stamp=(self.enemy(key).version, len(self.revealed(key)), self.coverage[key].version)
+        old,cache=self.shot_cache.get(key, (None, None))
+        if old!=stamp: cache={}; self.shot_cache[key]=(stamp, cache)
+        hit=cache.get((r, damage, range_tiles))
+        if hit is None:
+            if r not in cache:
+                if "targets" not in cache: cache["targets"]=self.known_targets(key)
+                occ,defs=cache["targets"]; cache[r]=(disk_sum(occ,r), disk_sum(defs,r))
+            hits,dhits=cache[r]; h,w=self.h,self.w; _,reach=launch_reach(self.own_cols(key), w, h)
+            dmg=np.where(hits>0, np.minimum(40, int(damage*0.75)+4*np.maximum(0,hits-1)), 0.5)
+            aim=np.zeros((h,w),bool); tc=self.target_cols(key); aim[:, tc.start:tc.stop]=True
+            hit=cache[(r, damage, range_tiles)]=np.where(aim & (reach<=range_tiles), dmg+2*dhits, -np.inf).ravel()
+        return hit
+
+    def ai_action(self, key):
+        side=self.side(key)
+        if self.ai_rng.random()<0.5 and side.missiles:
+            shot=self.ai_pick_shot(key)
+            if shot: return ("fire",)+shot
+        movable=[u for u in side.units if UNIT_META[u.type]["range"]>0]
+        if movable:
+            u=self.ai_rng.choice(movable); path=self.advance_path(key, u.id)
+            if path: return ("move", u.id, path)
+        return None
+
+    # ---- headless driver ----
+    def step(self, action, key=None):
+        # Applies `action` for `key` (default: the side to move), resolves it completely and
+        # returns the events. Actions: ("fire", missile_idx, launch, target), ("move", unit_id, path),
+        # ("place", kind, tile), ("buy", item_idx), ("pass",) or None; during deploy also
+        # ("retract", tile) and ("start",). Buying is free and allowed out of turn; every other
+        # battle action ends the turn, even one the rules refuse (a shot out of range, a move
+        # path that isn't legal_path). One that names no missile, item, kind or tile (see
+        # checked()) is logged and played as a pass, except a buy, which does nothing.
+        self.events=[]
+        key=key or self.turn; side=self.side(key)
+        kind=action[0] if action else "pass"; action=self.checked(key, action)
+        if action is None:
+            if kind=="buy": return self.events
+            action=("pass",)
+        kind=action[0]
+        if kind!="start" and self.recording: self.log.append(key, action)   # start_battle records itself
+        if kind=="buy":
+            self.buy(key, self.market_items[action[1]]); return self.events
+        if self.phase==PHASE_DEPLOY:
+            if kind=="place": self.place(key, action[1], action[2])
+            elif kind=="retract": self.retract(key, action[1])
+            elif kind=="start": self.start_battle()
+            return self.events
+        if self.phase!=PHASE_BATTLE or key!=self.turn: return self.events
+        if kind=="fire":
+            _,mi,launch,target=action
+            if self.allowed(key, action):
+                side.shots_left-=1
+                self.land_missile(self.plan_missile(key, launch, target, side.missiles[mi]))
+        elif kind=="move":
+            if self.allowed(key, action):
+                for st in self.plan_moves(key, [{"uid":action[1],"path":action[2]}]):
+                    if not self.resolve_move_step(st): break
+        elif kind=="place":
+            self.place(key, action[1], action[2])
+        self.end_turn(key)
+        return self.events
+
+    def checked(self, key, action):
+        # `action` with plain int fields, as step() applies and logs it, or None if it can't
+        # be: an unknown kind, a missile or market item `key` doesn't have, a tile off the
+        # board, or a unit id or path the log has no room for. Whether the rules allow it is
+        # left to step().
+        kind=action[0] if action else "pass"; tile=int_tile
+        try:
+            if kind=="pass" or kind=="start": return PASS if kind=="pass" else (kind,)
+            if kind=="buy":
+                i=int(action[1]); return ("buy", i) if 0<=i<len(self.market_items) else None
+            if kind=="place":
+                t=tile(action[2]); return ("place", action[1], t) if action[1] in LOG_KINDS and self.on_board(*t) else None
+            if kind=="retract":
+                t=tile(action[1]); return ("retract", t) if self.on_board(*t) else None
+            if kind=="fire":
+                mi=int(action[1]); launch=tile(action[2]); target=tile(action[3])
+                ok=0<=mi<len(self.side(key).missiles) and self.on_board(*launch) and self.on_board(*target)
+                return ("fire", mi, launch, target) if ok else None
+            if kind=="move":
+                uid=int(action[1]); path=[tile(t) for t in action[2]]
+                ok=0<=uid<2**32 and len(path)<256 and all(self.on_board(*t) for t in path)
+                return ("move", uid, path) if ok else None
+        except (TypeError, ValueError, IndexError): pass
+        return None
+
+    def allowed(self, key, action):
+        # Whether the rules let `key` play a checked() fire or move now; step() and the UI's
+        # AI turn both ask here, so a live match and its replay refuse the same actions.
+        side=self.side(key)
+        if action[0]=="fire": return side.shots_left>0 and self.can_fire(key, action[2], action[3], side.missiles[action[1]])
+        if action[0]=="move": return self.legal_path(key, action[1], action[2])
+        return True
+
+    def ai_step(self):
+        return self.step(self.ai_action(self.turn))
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# WarBoard: Vengeance (v1) — training environments
+#
+# Notes:
+# - Gym-style wrapper over engine.Engine for one side ("p1" by default) against a scripted
+#   or ai.py opponent: reset(seed) -> (obs, info); step(action) -> (obs, reward, terminated,
+#   truncated, info). No gym/gymnasium dependency; spaces are described by the constants below.
+# - Actions are ints (see ACTION_* layout) or raw Engine.step tuples. Unusable actions (out of
+#   range, empty slot, no token...) are played as a pass and flagged with info["invalid"].
+# - Observations are what the side can see: board planes (CHANNELS x GRID_H x GRID_W, float32)
+#   and a SCALARS vector. Enemy units/defences appear only on radar-covered or revealed tiles.
+# - VectorEnv steps N matches in one process, writes observations into shared (N, ...) buffers
+#   (overwritten by the next call) and auto-resets finished matches.
+#
+#   from env import VectorEnv
+#   venv=VectorEnv(64); obs,_=venv.reset(seed=0)
+#   obs,rew,term,trunc,info=venv.step(venv.sample_actions())
+
+import random
+import numpy as np
+from engine import (Engine, UNIT_META, TOKEN_ATTR, GRID_W, GRID_H, PHASE_OVER, PASS,
+                    launch_reach)
+
+CHANNELS = ("own_tank","own_troop","own_jet","own_aa","own_radar","own_facility",
+            "foe_tank","foe_troop","foe_jet","foe_aa","foe_radar","foe_facility",
+            "radar_cover","revealed","destroyed")
+SCALARS  = ("own_damage","foe_damage","own_money","own_tokens","round","shots_left",
+            "tank_tokens","troop_tokens","jet_tokens","aa_tokens","radar_tokens","missiles","units")
+PLANE = {"Tank":0, "Troop":1, "Jet":2, "AA":3, "Radar":4}
+FOE   = 6
+C_COVER, C_REVEALED, C_DESTROYED = 12, 13, 14
+
+# Flat action space: pass, then one GRID_H*GRID_W block of target/destination tiles per missile
+# slot (fire), unit slot (move, in PlayerSide.units order) and token kind (place).
+MISSILE_SLOTS = 8
+UNIT_SLOTS    = 16
+PLACE_KINDS   = ("Tank","Troop","Jet","AA","Radar")
+TILES         = GRID_W*GRID_H
+ACTION_PASS   = 0
+ACTION_FIRE   = 1
+ACTION_MOVE   = ACTION_FIRE + MISSILE_SLOTS*TILES
+ACTION_PLACE  = ACTION_MOVE + UNIT_SLOTS*TILES
+N_ACTIONS     = ACTION_PLACE + len(PLACE_KINDS)*TILES
+
+def scripted_opponent(e, key):
+    # Cheap stand-in for Engine.ai_action: half the time fire a random missile at a random tile
+    # it can reach (from the nearest launch column), otherwise advance a random unit. Every
+    # pick is scaled from random(), the cheapest draw the stream offers.
+    side=e.side(key); rand=e.ai_rng.random
+    if rand()<0.5 and side.missiles:
+        mi=int(rand()*len(side.missiles)); r=side.missiles[mi].range_tiles
+        edge=e.mid_x-1 if key=="p1" else e.mid_x+1
+        tx=edge+side.dir*(1+int(rand()*r)); ty=int(rand()*e.h)
+        if 0<=tx<e.w: return ("fire", mi, (edge,ty), (tx,ty))
+    movable=[u for u in side.units if UNIT_META[u.type]["range"]>0]
+    if movable:
+        u=movable[int(rand()*len(movable))]; path=e.advance_path(key, u.id)
+        if path: return ("move", u.id, path)
+    return None
+
+class WarboardEnv:
+    def __init__(self, p1="India", p2="Pakistan", side="p1", opponent=None, max_rounds=200, countries=None, out=None,
+                 record=False):
+        # countries: optional list to draw both sides from on every reset (else p1 vs p2).
+        # opponent: an ai.Agent, a callable(engine, key) -> action, or None for scripted_opponent.
+        # out: (board, scalars) arrays to write observations into (VectorEnv passes its rows).
+        # record: keep the action log and events (see Engine), e.g. to save episodes as replays.
+        self.names=(p1,p2); self.countries=countries; self.key=side; self.max_rounds=max_rounds; self.record=record
+        self.agent=opponent if hasattr(opponent, "choose") else None
+        self.policy=self.agent.choose if self.agent else (opponent or scripted_opponent)
+        self.board,self.scalars=out or (np.zeros((len(CHANNELS),GRID_H,GRID_W), np.float32), np.zeros(len(SCALARS), np.float32))
+        self.cells=self.board.reshape(-1)   # a view: board rows are contiguous
+        self.engine=None; self.plane_sig={}; self.plane_set={}; self.rng=random.Random()
+
+    # ---- gym API ----
+    def reset(self, seed=None):
+        if seed is not None: self.rng.seed(seed)
+        a,b=self.rng.sample(self.countries, 2) if self.countries else self.names
+        e=self.engine=Engine(record=self.record); e.new_match(a, b, p1_human=False, p2_human=False, seed=self.rng.getrandbits(63)); e.start_battle()
+        if self.agent: self.agent.reset()
+        self.board[:]=0; self.plane_sig={}; self.plane_set={}
+        if self.key!=e.turn: self.opponent_turn()
+        self.write_obs()
+        return {"board":self.board, "scalars":self.scalars}, {"p1":a, "p2":b}
+
+    def step(self, action):
+        reward,terminated,truncated,info=self.advance(action)
+        self.write_obs()
+        return {"board":self.board, "scalars":self.scalars}, reward, terminated, truncated, info
+
+    def advance(self, action):
+        # Plays the side's action and the opponent's reply; everything but the observation.
+        e=self.engine; own=e.side(self.key); foe=e.enemy(self.key)
+        before=foe.damage-own.damage
+        if isinstance(action, (int, np.integer)):
+            action=int(action); act=self.decode(action) if action!=ACTION_PASS else None
+        else: act=action
+        info={"invalid": act is None and action!=ACTION_PASS}
+        e.step(act or PASS)
+        if e.phase!=PHASE_OVER: self.opponent_turn()
+        reward=(foe.damage-own.damage-before)/100
+        terminated=e.phase==PHASE_OVER; truncated=not terminated and e.round>self.max_rounds
+        if terminated: reward+= 1.0 if e.winner==self.key else -1.0; info["winner"]=e.winner
+        return reward, terminated, truncated, info
+
+    def opponent_turn(self):
+        e=self.engine; e.step(self.policy(e, e.turn))
+
+    # ---- actions ----
+    def decode(self, a):
+        # Int action -> Engine.step tuple, or None when it can't be played right now.
+        a=int(a); e=self.engine; key=self.key; side=e.side(key)
+        if a<=ACTION_PASS or a>=N_ACTIONS: return None
+        if a<ACTION_MOVE:
+            slot,t=divmod(a-ACTION_FIRE, TILES); ty,tx=divmod(t, GRID_W)
+            if slot>=len(side.missiles): return None
+            cols=e.own_cols(key); launch=(min(max(tx, cols.start), cols.stop-1), ty)
+            return ("fire", slot, launch, (tx,ty)) if e.can_fire(key, launch, (tx,ty), side.missiles[slot]) else None
+        if a<ACTION_PLACE:
+            slot,t=divmod(a-ACTION_MOVE, TILES); ty,tx=divmod(t, GRID_W)
+            if slot>=len(side.units): return None
+            path=e.move_path(key, side.units[slot].id, (tx,ty))
+            return ("move", side.units[slot].id, path) if path else None
+        k,t=divmod(a-ACTION_PLACE, TILES); ty,tx=divmod(t, GRID_W); kind=PLACE_KINDS[k]
+        return ("place", kind, (tx,ty)) if getattr(side, TOKEN_ATTR[kind])>0 and e.can_place(key, tx, ty) else None
+
+    def action_mask(self):
+        # Bool vector over N_ACTIONS of the ints decode() would accept.
+        e=self.engine; key=self.key; side=e.side(key); mask=np.zeros(N_ACTIONS, bool); mask[ACTION_PASS]=True
+        _,reach=launch_reach(e.own_cols(key), e.w, e.h); tc=e.target_cols(key)
+        aim=np.zeros((GRID_H,GRID_W), bool); aim[:, tc.start:tc.stop]=True
+        for slot,m in enumerate(side.missiles[:MISSILE_SLOTS]):
+            base=ACTION_FIRE+slot*TILES; mask[base:base+TILES]=(aim & (reach<=m.range_tiles)).ravel()
+        for slot,u in enumerate(side.units[:UNIT_SLOTS]):
+            base=ACTION_MOVE+slot*TILES
+            for x,y in e.move_field(key, u.id): mask[base+y*GRID_W+x]=True
+        free=np.zeros((GRID_H,GRID_W), bool); oc=e.own_cols(key); free[:, oc.start:oc.stop]=True
+        for pos in list(side.unit_index)+list(side.static_index): free[pos[1],pos[0]]=False
+        for k,kind in enumerate(PLACE_KINDS):
+            if getattr(side, TOKEN_ATTR[kind])>0:
+                base=ACTION_PLACE+k*TILES; mask[base:base+TILES]=free.ravel()
+        return mask
+
+    def sample_action(self):
+        m=self.action_mask(); return int(self.rng.choice(np.flatnonzero(m)))
+
+    # ---- observation ----
+    def write_obs(self):
+        # Incremental: each side's entity cells and the cover/revealed/destroyed planes are
+        # looked at again only when their signature changes, and then only the cells that
+        # went on or off are written.
+        e=self.engine; key=self.key; own=e.side(key); foe=e.enemy(key)
+        cover=e.radar_cover(key); seen=e.revealed(key); cov_v=e.coverage[key].version
+        self.scalars[4]=e.round/self.max_rounds   # the one scalar that moves every step
+        vals=(own.damage/100, foe.damage/100, own.money/1000, own.tokens/10, own.shots_left, own.tank_tokens,
+              own.troop_tokens, own.jet_tokens, own.aa_tokens, own.radar_tokens, len(own.missiles), len(own.units))
+        if vals!=self.plane_sig.get("scalars"):
+            self.plane_sig["scalars"]=vals; self.scalars[:4]=vals[:4]; self.scalars[5:]=vals[4:]
+        if self.plane_sig.get("own")!=own.version:
+            self.plane_sig["own"]=own.version
+            cells={PLANE[u.type]*TILES + u.pos[1]*GRID_W + u.pos[0] for u in own.units}
+            cells.update([PLANE[s.type]*TILES + s.pos[1]*GRID_W + s.pos[0] for s in own.static])
+            cells.update([5*TILES + f.pos[1]*GRID_W + f.pos[0] for f in own.facilities])
+            self.sync_cells("own", cells)
+        sig=(foe.version, cov_v, len(seen))
+        if self.plane_sig.get("foe")!=sig:
+            self.plane_sig["foe"]=sig
+            cells={(FOE+PLANE[u.type])*TILES + u.pos[1]*GRID_W + u.pos[0] for u in foe.units if u.pos in cover or u.pos in seen}
+            cells.update([(FOE+PLANE[s.type])*TILES + s.pos[1]*GRID_W + s.pos[0] for s in foe.static if s.pos in cover or s.pos in seen])
+            cells.update([(FOE+5)*TILES + f.pos[1]*GRID_W + f.pos[0] for f in foe.facilities])
+            self.sync_cells("foe", cells)
+        ps=self.plane_sig; dead=e.destroyed_tiles
+        if ps.get(C_COVER)!=cov_v: self.sync_plane(C_COVER, cover, cov_v)
+        if ps.get(C_REVEALED)!=len(seen): self.sync_plane(C_REVEALED, seen, len(seen))
+        if ps.get(C_DESTROYED)!=len(dead): self.sync_plane(C_DESTROYED, dead, len(dead))
+
+    def sync_cells(self, name, cells):
+        # Sets `cells` (flat board indices) and clears the ones this group set last time.
+        old=self.plane_set.get(name, set()); self.plane_set[name]=cells
+        off=old-cells; on=cells-old
+        if off: self.cells[list(off)]=0
+        if on: self.cells[list(on)]=1
+
+    def sync_plane(self, c, tiles, sig):
+        # Revealed and destroyed sets only grow, so their size is a signature; cover has a version.
+        # write_obs() calls this only when `sig` moved. The set differences run in C, so only
+        # the changed tiles cost Python time.
+        self.plane_sig[c]=sig; old=self.plane_set.get(c, set()); self.plane_set[c]=set(tiles); base=c*TILES
+        for v,ts in ((0, old-tiles), (1, tiles-old)):
+            if ts: self.cells[[base + y*GRID_W + x for x,y in ts]]=v
+
+class VectorEnv:
+    # N independent matches stepped together; observations land in (N, ...) buffers.
+    def __init__(self, n, **kw):
+        self.board=np.zeros((n,len(CHANNELS),GRID_H,GRID_W), np.float32)
+        self.scalars=np.zeros((n,len(SCALARS)), np.float32)
+        self.envs=[WarboardEnv(out=(self.board[i], self.scalars[i]), **kw) for i in range(n)]
+        self.rewards=np.zeros(n, np.float32); self.terminated=np.zeros(n, bool); self.truncated=np.zeros(n, bool)
+        self.seed=None; self.resets=0
+
+    def __len__(self): return len(self.envs)
+
+    def reset(self, seed=None):
+        # Match i gets seed+i; later auto-resets continue from seed+N, seed+N+1, ...
+        self.seed=seed; self.resets=0; infos=[]
+        for i,env in enumerate(self.envs):
+            _,info=env.reset(None if seed is None else seed+i); infos.append(info)
+        return {"board":self.board, "scalars":self.scalars}, infos
+
+    def step(self, actions):
+        # Per-match results are gathered in lists and written to the arrays once.
+        infos=[]; out=[]
+        for env,a in zip(self.envs, actions):
+            r,term,trunc,info=res=env.advance(a); out.append(res)
+            if term or trunc:
+                self.resets+=1
+                env.reset(None if self.seed is None else self.seed+len(self.envs)-1+self.resets)
+            else:
+                env.write_obs()
+            infos.append(info)
+        self.rewards[:],self.terminated[:],self.truncated[:],_=zip(*out)
+        return {"board":self.board, "scalars":self.scalars}, self.rewards, self.terminated, self.truncated, infos
+
+    def action_masks(self): return np.stack([env.action_mask() for env in self.envs])
+    def sample_actions(self): return [env.sample_action() for env in self.envs]
@@ -0,0 +1,1183 @@
+#!/usr/bin/env python3
+# WarBoard: Vengeance (v1)
+#
+# Notes:
+# - Missile launching: select missile -> click your tile (launch) -> click enemy tile (target).
+# - To place purchased units mid-battle: press 1/2/3/5/6 and click your side (uses your one move).
+# - The opponent is picked by AI_NAME (see ai.AGENTS); AI_BUDGET_S caps its thinking per turn.
+#   It thinks on a worker thread against a copy of the engine while the board keeps rendering.
+# - Every finished match is saved to REPLAY_DIR (see replay.py); None turns that off.
+# - The game advances in fixed ticks (TICK_HZ) however fast frames are drawn; sprites are
+#   interpolated between ticks. S cycles the game speed (GAME_SPEEDS; 0 = instant, which
+#   skips missile and move animations altogether). Message and game-over timers tick in real
+#   time, apart from the game speed.
+# - The match is autosaved to SAVE_PATH at the start of each of your turns; "Continue" on the
+#   menu picks it up again (see savegame.py).
+# - Importing this module does no pygame or file work: Game() starts only the display and font
+#   subsystems, fonts open on first use from UI_FONT_FILE (pygame's bundled default font if it's
+#   missing; no system font scan) and countries load when the picker opens.
+#   `python main.py --startup-report` prints where the time to the first frame went.
+# - Maps come from engine.scenarios() (picked on the country screen). Boards bigger than the
+#   view scroll with the arrow keys and zoom with the mouse wheel or +/-; only what is on
+#   screen is drawn, so frame cost follows the view, not the map.
+
+import time
+STARTUP_T0=time.perf_counter()
+import os, argparse, functools
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import pygame
+from engine import (Engine, UNIT_META, TOKEN_ATTR, FACILITY_NAMES, GRID_W, GRID_H, RADAR_RANGE_BASE, MISSILE_HOLD_FRAMES,
+                    countries, scenarios, load_scenario, resource_path)
+from ai import make_agent
+import savegame
+
+WIDTH, HEIGHT   = 1200, 720
+FPS             = 60
+TICK_HZ         = 60    # simulation ticks per second; animation timers count ticks
+TICK_S          = 1.0/TICK_HZ
+GAME_SPEEDS     = (1, 2, 4, 0)   # tick-rate multipliers, 0 = instant
+MAX_BACKLOG_S   = 0.25  # simulated time a slow frame may catch up on (per 1x of speed)
+MAX_INSTANT_TICKS = 100000
+EXPLOSION_POOL  = 32    # live explosions at once; a radius-2 strike uses 13
+EXPLOSION_SUBFRAMES = 2 # pre-rendered frames per tick of an explosion's life
+IDLE_WAIT_MS    = 500   # longest a non-animating frame blocks waiting for input
+TILE            = 38
+MARGIN_X        = 40
+MARGIN_Y        = 40
+VIEW_W, VIEW_H  = 28*TILE, 13*TILE   # largest board view in pixels
+ZOOM_LEVELS     = (TILE, 28, 19, 12, 8)   # tile sizes, nearest first
+PANEL_H         = 180
+AI_NAME         = "mcts"
+AI_BUDGET_S     = 0.25
+REPLAY_DIR      = "replays"
+SAVE_PATH       = os.path.join("saves", "autosave.wbs")
+UI_FONT_FILE    = os.path.join("data", "fonts", "ui.ttf")
+
+WHITE=(255,255,255); LIGHTGRAY=(185,190,200); GREEN=(60,200,90)
+YELLOW=(240,220,80); ORANGE=(240,170,60); BLUE=(80,120,240); CYAN=(80,220,220)
+DARK=(22,26,34); PANEL_BG=(26,28,36)
+
+class StartupTimer:
+    # Named wall-clock marks from this module's first line to the first frame on screen.
+    def __init__(self, t0): self.t0=t0; self.marks=[]
+    def mark(self, label): self.marks.append((label, time.perf_counter()))
+    def report(self):
+        lines=["startup:"]; prev=self.t0
+        for label,t in self.marks:
+            lines.append(f"  {label:<16} {1000*(t-prev):7.1f} ms   (at {1000*(t-self.t0):7.1f} ms)"); prev=t
+        return "\n".join(lines)
+
+STARTUP=StartupTimer(STARTUP_T0)
+STARTUP.mark("imports")
+
+def init_pygame():
+    # Only what the game uses; pygame.init() would also bring up audio, joysticks and so on.
+    if not pygame.display.get_init(): pygame.display.init()
+    if not pygame.font.get_init(): pygame.font.init()
+
+class LazyFont:
+    # Opens its pygame Font the first time something is measured or rendered with it.
+    __slots__=("px","bold","font")
+    def __init__(self, px, bold=False): self.px=px; self.bold=bold; self.font=None
+    def get(self):
+        if self.font is None:
+            init_pygame(); path=resource_path(UI_FONT_FILE)
+            self.font=pygame.font.Font(path if os.path.exists(path) else None, self.px)
+            if self.bold: self.font.set_bold(True)
+            STARTUP.mark(f"font {self.px}px")
+        return self.font
+    def render(self, text, antialias, color): return self.get().render(text, antialias, color)
+    def size(self, text): return self.get().size(text)
+
+FONT_XL= LazyFont(48, bold=True)
+FONT_L = LazyFont(28)
+FONT   = LazyFont(20)
+FONT_S = LazyFont(16)
+FONT_XS= LazyFont(14)
+
+@functools.lru_cache(maxsize=None)
+def facility_label_w(): return max(FONT_S.size(f.split()[0])[0] for f in FACILITY_NAMES)   # widest tile label
+
+class TextCache:
+    # Bounded LRU of rendered strings keyed on (font, text, color); the returned surfaces are
+    # shared, so callers only blit them.
+    def __init__(self, capacity=512):
+        self.capacity=capacity; self.surfs=OrderedDict(); self.hits=0; self.misses=0
+    def render(self, font, text, color):
+        key=(font, text, color)
+        s=self.surfs.get(key)
+        if s is not None:
+            self.hits+=1; self.surfs.move_to_end(key); return s
+        self.misses+=1
+        s=self.surfs[key]=font.render(text, True, color)
+        if len(self.surfs)>self.capacity: self.surfs.popitem(last=False)
+        return s
+    def stats(self):
+        total=self.hits+self.misses
+        return {"size":len(self.surfs), "capacity":self.capacity, "hits":self.hits, "misses":self.misses,
+                "hit_rate":(self.hits/total if total else 0.0)}
+    def clear(self): self.surfs.clear(); self.hits=self.misses=0
+
+TEXT_CACHE = TextCache()
+def render_text(font, text, color): return TEXT_CACHE.render(font, text, color)
+
+def biased_center_x(bias_ratio=0.08):
+    return int(WIDTH//2 - WIDTH*bias_ratio)
+
+class Button:
+    def __init__(self, rect, text, onclick=None):
+        self.rect = pygame.Rect(rect); self.text=text; self.onclick=onclick; self.hover=False
+    def draw(self, surf):
+        col = (80,130,220) if self.hover else (55,95,170)
+        pygame.draw.rect(surf, col, self.rect, border_radius=10)
+        pygame.draw.rect(surf, WHITE, self.rect, 2, border_radius=10)
+        r = render_text(FONT, self.text, WHITE)
+        surf.blit(r, r.get_rect(center=self.rect.center))
+    def handle(self, event):
+        if event.type==pygame.MOUSEMOTION: self.hover = self.rect.collidepoint(event.pos)
+        elif event.type==pygame.MOUSEBUTTONDOWN and event.button==1 and self.rect.collidepoint(event.pos):
+            if self.onclick: self.onclick()
+
+class Dropdown:
+    def __init__(self, rect, options, selected=None):
+        self.rect=pygame.Rect(rect); self.options=options[:]; self.open=False
+        if options:
+            self.selected=selected if selected in options else options[0]
+        else:
+            self.selected=None
+        self.scroll=0; self.max_visible=10; self.item_h=self.rect.height
+    def draw(self, surf):
+        pygame.draw.rect(surf, (50,50,50), self.rect, border_radius=8)
+        pygame.draw.rect(surf, WHITE, self.rect, 2, border_radius=8)
+        label = str(self.selected) if self.selected is not None else "—"
+        surf.blit(render_text(FONT, label, WHITE), (self.rect.x+8, self.rect.y+8))
+        pygame.draw.polygon(surf, WHITE, [(self.rect.right-20, self.rect.centery-4),(self.rect.right-8,self.rect.centery-4),(self.rect.right-14,self.rect.centery+6)])
+    def draw_list(self, surf):
+        if not self.open: return None
+        max_h = self.max_visible*self.item_h
+        list_rect = pygame.Rect(self.rect.x, self.rect.bottom, self.rect.width, max_h)
+        pygame.draw.rect(surf, (30,30,30), list_rect, border_radius=6)
+        pygame.draw.rect(surf, WHITE, list_rect, 2, border_radius=6)
+        start=self.scroll; end=min(len(self.options), start+self.max_visible)
+        for i,opt in enumerate(self.options[start:end], start):
+            r = pygame.Rect(self.rect.x, self.rect.bottom+(i-start)*self.item_h, self.rect.width, self.item_h)
+            hov = r.collidepoint(pygame.mouse.get_pos())
+            pygame.draw.rect(surf, (60,60,60) if hov else (40,40,40), r)
+            pygame.draw.rect(surf, WHITE, r, 1)
+            pygame.draw.rect(surf, (100,100,100), (r.right-20, r.y+6, 1, r.height-12))
+            surf.blit(render_text(FONT_S, str(opt), WHITE), (r.x+8, r.y+8))
+        return list_rect
+    def handle(self, event):
+        if event.type==pygame.MOUSEBUTTONDOWN and event.button==1:
+            if self.rect.collidepoint(event.pos): self.open = not self.open
+            elif self.open:
+                max_h=self.max_visible*self.item_h; list_rect=pygame.Rect(self.rect.x, self.rect.bottom, self.rect.width, max_h)
+                if list_rect.collidepoint(event.pos):
+                    idx=(event.pos[1]-self.rect.bottom)//self.item_h + self.scroll
+                    if 0<=idx<len(self.options): self.selected=self.options[idx]; self.open=False
+                else: self.open=False
+        elif event.type==pygame.MOUSEWHEEL and self.open:
+            if event.y<0 and self.scroll < max(0, len(self.options)-self.max_visible): self.scroll+=1
+            elif event.y>0 and self.scroll>0: self.scroll-=1
+
+def draw_tank_icon(surf, x,y, dir, col):
+    pygame.draw.rect(surf, col, (x+8,y+18,24,14), 2)
+    pygame.draw.circle(surf, col, (x+20,y+22), 6, 2)
+    pygame.draw.line(surf, col, (x+20,y+22), (x+20+12*dir,y+22), 2)
+
+def draw_troop_icon(surf, x,y, dir, col):
+    pygame.draw.circle(surf, col, (x+20,y+16), 5, 2)
+    pygame.draw.line(surf, col, (x+20,y+20), (x+20,y+30), 2)
+    pygame.draw.line(surf, col, (x+12,y+24), (x+28,y+24), 2)
+    pygame.draw.line(surf, col, (x+20,y+30), (x+20+8*dir,y+36), 2)
+    pygame.draw.line(surf, col, (x+20,y+30), (x+20-8*dir,y+36), 2)
+
+def draw_jet_icon(surf, x,y, dir, col):
+    pts=[(x+20, y+10), (x+10, y+30), (x+30, y+30)]
+    if dir<0: pts=[(x+20, y+30), (x+10, y+10), (x+30, y+10)]
+    pygame.draw.polygon(surf, col, pts, 2)
+    pygame.draw.line(surf, col, (x+20,y+20), (x+20+8*dir,y+26), 2)
+
+UNIT_ICONS = {"Tank":draw_tank_icon, "Troop":draw_troop_icon, "Jet":draw_jet_icon}
+
+def draw_aa(surf, x,y): pygame.draw.circle(surf, CYAN, (x+TILE//2,y+TILE//2), 10, 2)
+
+def draw_radar(surf, x,y):
+    pygame.draw.circle(surf, (160,220,140), (x+TILE//2,y+TILE//2), 10, 2)
+    pygame.draw.circle(surf, (160,220,140), (x+TILE//2,y+TILE//2), 5, 1)
+
+def draw_facility_box(surf, x,y): pygame.draw.rect(surf,(120,220,120),(x+6,y+6,TILE-12,TILE-12),2)
+
+def draw_wreck(surf, x,y):
+    pygame.draw.line(surf,(240,90,90),(x+6,y+6),(x+TILE-6,y+TILE-6),3)
+    pygame.draw.line(surf,(240,90,90),(x+TILE-6,y+6),(x+6,y+TILE-6),3)
+
+@functools.lru_cache(maxsize=512)
+def scaled_icon(draw, args, px):
+    # A TILE-sized icon pre-rendered at px pixels for zoomed-out boards.
+    s=pygame.Surface((TILE,TILE), pygame.SRCALPHA); draw(s, 0,0, *args)
+    return pygame.transform.smoothscale(s, (px,px)).convert_alpha()
+
+def draw_on_tile(surf, board, gx,gy, draw, *args):
+    # Draws one icon if its tile is on screen: straight onto surf at full size, else a cached
+    # scaled copy. Returns the tile's pixel position, or None when it was culled.
+    if not board.visible(gx,gy): return None
+    x,y=board.pixel_of_grid(gx,gy)
+    if board.tile==TILE: draw(surf, x,y, *args)
+    else: surf.blit(scaled_icon(draw, args, board.tile), (x,y))
+    return x,y
+
+def draw_unit_icon(surf, t, gx,gy, dir, enemy=False, board=None):
+    draw_on_tile(surf, board, gx,gy, UNIT_ICONS[t], dir, UNIT_META[t]["color_e" if enemy else "color_p"])
+
+def draw_missile_sprite(surf, px,py, dir):
+    body = [(px,py-6),(px+10*dir,py),(px,py+6)]
+    pygame.draw.polygon(surf, WHITE, body, 2)
+    pygame.draw.circle(surf, (255,180,80), (int(px-6*dir), py), 3)
+
+class Board:
+    # The grid and a camera over it: `tile` is the zoom (pixels per tile, one of ZOOM_LEVELS)
+    # and (cx, cy) the top-left tile in view. The view is whole tiles, at most VIEW_W x VIEW_H
+    # pixels from (MARGIN_X, MARGIN_Y); a board that fits is shown whole at TILE, as ever.
+    # Drawing goes through visible()/pixel_of_grid(), so nothing off screen costs anything.
+    def __init__(self, w=GRID_W, h=GRID_H):
+        self.bg=None; self.bg_key=None
+        self.reveal=None; self.reveal_key=None
+        self.set_size(w, h)
+    def set_size(self, w, h):
+        # A new board: full zoom, centred on the midline.
+        self.w,self.h=w,h; self.mid_x=w//2; self.tile=TILE; self.cx=self.cy=0
+        self.zooms=[z for z in ZOOM_LEVELS if z==TILE or VIEW_W//z<=w or VIEW_H//z<=h]
+        self.look_at(self.mid_x, h//2)
+    @property
+    def scrolls(self): return self.cols<self.w or self.rows<self.h
+    @property
+    def camera(self): return (self.cx, self.cy, self.tile)
+    @property
+    def view(self): return (self.cx, self.cy, self.cols, self.rows)
+    def look_at(self, gx, gy):
+        t=self.tile; self.cols=min(self.w, VIEW_W//t); self.rows=min(self.h, VIEW_H//t)
+        self.cx=max(0, min(self.w-self.cols, gx-self.cols//2)); self.cy=max(0, min(self.h-self.rows, gy-self.rows//2))
+        self.grid_rect=pygame.Rect(MARGIN_X, MARGIN_Y, self.cols*t, self.rows*t)
+    def pan(self, dx, dy):
+        self.look_at(self.cx+self.cols//2+dx*max(1,self.cols//4), self.cy+self.rows//2+dy*max(1,self.rows//4))
+    def zoom(self, step):
+        # step>0 zooms in (bigger tiles), keeping the centre tile centred.
+        i=max(0, min(len(self.zooms)-1, self.zooms.index(self.tile)-step))
+        gx,gy=self.cx+self.cols//2, self.cy+self.rows//2; self.tile=self.zooms[i]; self.look_at(gx, gy)
+    def visible(self, gx, gy): return 0<=gx-self.cx<self.cols and 0<=gy-self.cy<self.rows
+    def visible_of(self, tiles):
+        # The on-screen members of a tile set, walking whichever is smaller: the set or the view.
+        x0,y0,w,h=self.view
+        if len(tiles)<=w*h: return [t for t in tiles if 0<=t[0]-x0<w and 0<=t[1]-y0<h]
+        return [(x,y) for x in range(x0,x0+w) for y in range(y0,y0+h) if (x,y) in tiles]
+    def tiles_within(self, center, r, x0=0, x1=None):
+        # On-screen tiles within distance r of center (and in columns [x0,x1)): the diamond's
+        # rows clipped to the view, so a huge missile range costs no more than the viewport.
+        cx,cy=center; vx,vy,vw,vh=self.view
+        for gx in range(max(x0, vx, cx-r), min(self.w if x1 is None else x1, vx+vw, cx+r+1)):
+            d=r-abs(gx-cx)
+            for gy in range(max(vy, cy-d), min(vy+vh, cy+d+1)): yield gx,gy
+    def build_background(self, surf):
+        # Grid, midline, side arrows/labels and the bottom panel only change with the camera.
+        # Tile outlines are drawn as whole grid lines: the same pixels as one rect per tile.
+        w,h=surf.get_size(); bg=pygame.Surface((w,h)).convert(surf)
+        bg.fill(DARK); g=self.grid_rect; t=self.tile
+        split=g.x+max(0, min(self.cols, self.mid_x-self.cx))*t
+        bg.fill((33,40,50), (g.x, g.y, split-g.x, g.h)); bg.fill((35,34,46), (split, g.y, g.right-split, g.h))
+        for x in range(g.x, g.right, t): bg.fill((52,60,75), (x, g.y, 1, g.h)); bg.fill((52,60,75), (x+t-1, g.y, 1, g.h))
+        for y in range(g.y, g.bottom, t): bg.fill((52,60,75), (g.x, y, g.w, 1)); bg.fill((52,60,75), (g.x, y+t-1, g.w, 1))
+        if self.cx<=self.mid_x<=self.cx+self.cols:
+            pygame.draw.line(bg,(200,200,200),(split,g.y),(split,g.bottom),2)
+        cy=g.centery
+        pygame.draw.polygon(bg,(200,200,200),[(g.x-24,cy),(g.x-6,cy-10),(g.x-6,cy+10)])
+        pygame.draw.polygon(bg,(200,200,200),[(g.right+24,cy),(g.right+6,cy-10),(g.right+6,cy+10)])
+        bg.blit(render_text(FONT_S, "AI ◄", WHITE),(g.x-58, cy-8))
+        bg.blit(render_text(FONT_S, "► YOU", WHITE),(g.right+6, cy-8))
+        pygame.draw.rect(bg, PANEL_BG, (0, h-PANEL_H, w, PANEL_H))
+        pygame.draw.line(bg, (80,90,110), (0, h-PANEL_H), (w, h-PANEL_H), 2)
+        return bg
+    def draw(self, surf):
+        key=(surf.get_size(), self.w, self.h, self.camera)
+        if key!=self.bg_key: self.bg=self.build_background(surf); self.bg_key=key
+        surf.blit(self.bg,(0,0))
+    def draw_reveal(self, surf, key, tiles):
+        # Seen tiles get a light tint. They are painted onto one view-sized layer that is only
+        # repainted when `key` or the camera changes, so a frame costs one (clipped) blit however
+        # many are seen.
+        if self.reveal is None or self.reveal.get_size()!=self.grid_rect.size:
+            self.reveal=pygame.Surface(self.grid_rect.size, pygame.SRCALPHA); self.reveal_key=None
+        key=(key, self.camera)
+        if key!=self.reveal_key:
+            self.reveal.fill((0,0,0,0)); t=self.tile
+            for gx,gy in self.visible_of(tiles): self.reveal.fill((255,255,255,38), ((gx-self.cx)*t, (gy-self.cy)*t, t, t))
+            self.reveal_key=key
+        surf.blit(self.reveal, self.grid_rect.topleft)
+    def grid_at_pixel(self,pos):
+        x,y=pos
+        if not self.grid_rect.collidepoint(x,y): return None
+        return self.cx+(x-MARGIN_X)//self.tile, self.cy+(y-MARGIN_Y)//self.tile
+    def pixel_of_grid(self,gx,gy): return MARGIN_X+(gx-self.cx)*self.tile, MARGIN_Y+(gy-self.cy)*self.tile
+    def to_screen(self, wx, wy):
+        # Screen position of a board point in TILE-scale world pixels (see Game.pixel_center).
+        t=self.tile; return MARGIN_X+wx*t//TILE-self.cx*t, MARGIN_Y+wy*t//TILE-self.cy*t
+    def snap_to_tiles(self, rect):
+        # Grow `rect` to whole tiles: a clip edge through an icon re-rasterises its clipped lines
+        # from a different endpoint, so partial redraws must never cut one.
+        c=rect.clip(self.grid_rect); t=self.tile
+        if not c: return rect
+        x0=(c.left-MARGIN_X)//t; x1=(c.right-1-MARGIN_X)//t
+        y0=(c.top-MARGIN_Y)//t;  y1=(c.bottom-1-MARGIN_Y)//t
+        return rect.union(pygame.Rect(MARGIN_X+x0*t, MARGIN_Y+y0*t, (x1-x0+1)*t, (y1-y0+1)*t))
+
+class Explosion:
+    # One pool slot. `life` counts down one per tick; alpha is how far drawing is into the next
+    # tick. Frames come from the shared strip for this lifetime and zoom, so drawing is a single
+    # blit. The centre is in world pixels (see Board.to_screen).
+    __slots__=("cx","cy","life","max_life")
+    strips={}   # (lifetime, tile px) -> ((surface, radius), ...), built on first use
+    def __init__(self, center_px=(0,0), life=24): self.reset(center_px, life)
+    def reset(self, center_px, life):
+        self.cx,self.cy=center_px; self.life=life; self.max_life=life
+    def frame(self, alpha=0.0):
+        return min(self.max_life*EXPLOSION_SUBFRAMES, int((self.max_life-self.life+alpha)*EXPLOSION_SUBFRAMES))
+    @staticmethod
+    def size(t, px=TILE):
+        r=int(10+36*t); return r if px==TILE else max(2, r*px//TILE)
+    def radius(self, alpha=0.0, px=TILE): return self.size(self.frame(alpha)/(self.max_life*EXPLOSION_SUBFRAMES), px)
+    @classmethod
+    def strip(cls, life, px=TILE):
+        if (life,px) not in cls.strips:
+            n=life*EXPLOSION_SUBFRAMES; frames=[]
+            for f in range(n+1):
+                t=f/n; r=cls.size(t, px)
+                s=pygame.Surface((r*2,r*2), pygame.SRCALPHA)
+                pygame.draw.circle(s,(255,150,0,int(220*(1-t))),(r,r), r)
+                pygame.draw.circle(s,(255,240,180,int(240*(1-t))),(r,r), max(1,r//2))
+                frames.append((s.convert_alpha(), r))
+            cls.strips[life,px]=tuple(frames)
+        return cls.strips[life,px]
+    def draw(self, surf, board, alpha=0.0):
+        s,r=self.strip(self.max_life, board.tile)[self.frame(alpha)]
+        x,y=board.to_screen(self.cx, self.cy); surf.blit(s,(x-r,y-r))
+    def rect(self, board, alpha=0.0):
+        r=self.radius(alpha, board.tile); x,y=board.to_screen(self.cx, self.cy)
+        return pygame.Rect(x-r,y-r,r*2,r*2)
+
+class ExplosionPool:
+    # Fixed set of Explosion slots reused for the whole session; the first `n` are live.
+    # Finished ones are swapped past `n`, and a full pool recycles the one nearest its end.
+    # Only the ones overlapping the view are drawn (and reported dirty).
+    def __init__(self, capacity=EXPLOSION_POOL):
+        self.slots=[Explosion() for _ in range(capacity)]; self.n=0
+    def __len__(self): return self.n
+    def clear(self): self.n=0
+    def spawn(self, center_px, life):
+        if self.n<len(self.slots): ex=self.slots[self.n]; self.n+=1
+        else: ex=min(self.slots, key=lambda e: e.life)
+        ex.reset(center_px, life)
+    def tick(self):
+        slots=self.slots; i=0
+        while i<self.n:
+            ex=slots[i]; ex.life-=1
+            if ex.life>0: i+=1
+            else: self.n-=1; slots[i],slots[self.n]=slots[self.n],ex
+    def on_screen(self, board, alpha):
+        return [ex for ex in self.slots[:self.n] if ex.rect(board, alpha).colliderect(board.grid_rect)]
+    def draw(self, surf, board, alpha=0.0):
+        for ex in self.on_screen(board, alpha): ex.draw(surf, board, alpha)
+    def rects(self, board, alpha=0.0): return [ex.rect(board, alpha) for ex in self.on_screen(board, alpha)]
+
+def highlight_tiles(surf, tiles, board, color=(160,160,160)):
+    t=board.tile; m=max(1, t*4//TILE)
+    for gx,gy in tiles:
+        x,y=board.pixel_of_grid(gx,gy)
+        pygame.draw.rect(surf,color,(x+m,y+m,t-2*m,t-2*m),1)
+
+def highlight_range(surf, origin, rng, board, color=(160,160,160)):
+    highlight_tiles(surf, board.tiles_within(tuple(origin), rng), board, color)
+
+def highlight_moves(surf, field, board):
+    # Reachable tiles of a move field; the ones only reachable through known AA cover in red.
+    tiles=board.visible_of(field)
+    highlight_tiles(surf, [t for t in tiles if field[t][0]==len(field[t][1])], board)
+    highlight_tiles(surf, [t for t in tiles if field[t][0]>len(field[t][1])], board, (220,90,90))
+
+def draw_static_defenses(surf, side, reveal_set=None, is_enemy=False, board=None):
+    # Labels only at full zoom: smaller tiles can't fit them.
+    for t,(gx,gy) in side.static:
+        if is_enemy and reveal_set is not None and (gx,gy) not in reveal_set: continue
+        if t=="AA":
+            p=draw_on_tile(surf, board, gx,gy, draw_aa)
+            if p and board.tile==TILE: surf.blit(render_text(FONT_XS, "AA", CYAN),(p[0]+TILE//2-10,p[1]+TILE//2-24))
+        elif t=="Radar":
+            p=draw_on_tile(surf, board, gx,gy, draw_radar)
+            if p and board.tile==TILE: surf.blit(render_text(FONT_XS, "RDR", (160,220,140)), (p[0]+TILE//2-12, p[1]+TILE//2-22))
+
+def draw_units_for_side(surf, side, reveal_set=None, is_enemy=False, board=None):
+    for t,(gx,gy),d in side.units:
+        if is_enemy and reveal_set is not None and (gx,gy) not in reveal_set: continue
+        draw_unit_icon(surf, t, gx,gy, d, enemy=is_enemy, board=board)
+
+PAN_KEYS = {pygame.K_LEFT:(-1,0), pygame.K_RIGHT:(1,0), pygame.K_UP:(0,-1), pygame.K_DOWN:(0,1)}
+
+def map_caption(name):
+    try: sc=load_scenario(name)
+    except ValueError: return "unreadable map file"
+    return f"{sc.w}×{sc.h} tiles, {sc.km_per_tile} km a tile"
+
+STATE_MENU="menu"; STATE_SELECT="select"; STATE_DEPLOY="deploy"; STATE_PLAYER="player"
+STATE_ANIM_MISSILE="anim_missile"; STATE_ANIM_MOVES="anim_moves"; STATE_GAME_OVER="game_over"
+STATE_AI_THINKING="ai_thinking"
+
+class Game:
+    def __init__(self, startup_report=False):
+        init_pygame(); STARTUP.mark("pygame init")
+        self.screen=pygame.display.set_mode((WIDTH,HEIGHT)); pygame.display.set_caption("WarBoard: Vengeance")
+        STARTUP.mark("window"); self.startup_report=startup_report
+        self.clock=pygame.time.Clock(); self.board=Board()
+        self.state=STATE_MENU; self.info=""; self.flash_timer=0
+        cx = biased_center_x(0.08)
+        self.btn_start=Button((cx-90, HEIGHT//2, 180, 48),"Start", lambda:self.goto(STATE_SELECT))
+        self.btn_help=Button((cx-110, HEIGHT//2+64, 220, 44),"How to Play", self.toggle_help)
+        self.btn_continue=Button((cx-90, HEIGHT//2+124, 180, 44),"Continue", self.continue_match)
+        self.has_save=os.path.exists(SAVE_PATH)
+        self.country_dropdowns([])
+        self.btn_confirm=Button((WIDTH//2-80, 190, 160, 40),"Confirm", self.confirm_countries)
+        self.btn_main_menu_br=Button((WIDTH-180, HEIGHT-60, 160, 44),"Main Menu", lambda:self.reset_to_menu())
+        self.btn_market=Button((MARGIN_X,20,140,40),"Market", self.toggle_market)
+        self.btn_start_battle=Button((MARGIN_X+160,20,160,40),"Start Battle", self.finish_deploy)
+
+        self.engine=Engine()
+        self.selected_missile=None; self.range_center=None
+        self.selected_unit_id=None
+        self.explosions=ExplosionPool()
+        self.help_open=False; self.market_open=False
+        self.help_text=(
+            "• Choose both countries, place units with 1/2/3/5/6, then Start Battle."
+            "• Right-click on your half to retract during Deploy (disabled after battle starts)."
+            "• Your turn: Move ONE unit OR fire ONE missile. Placing a new unit mid-battle also uses your turn."
+            "• Radar reveals enemies; AA intercepts missiles and jets inside radar coverage."
+            "• Market is available anytime. Close with X / ESC / outside click."
+        )
+        self.radar_flash_timer=0
+        self.anim={"missile":None,"moves":None,"intercept":None}
+        self.reveal_key=None; self.reveal_set=frozenset(); self.backdrops={}
+        self.move_snapshot={"p1":None,"p2":None}
+        self.moves_left=1; self.deploy_choice=None; self.pending_buys=[]
+        self.ai=make_agent(AI_NAME, budget=AI_BUDGET_S)
+        self.ai_pool=ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai"); self.ai_job=None; self.think_frames=0
+        self.market_rect=None
+        self.game_over_timer=0
+        self.buttons=[self.btn_start,self.btn_help,self.btn_continue,self.btn_confirm,self.btn_main_menu_br,self.btn_market,self.btn_start_battle]
+        self.last_view=None; self.full_redraw=True
+        self.speed_idx=0; self.acc=0.0; self.timer_acc=0.0; self.alpha=0.0
+
+    # Match state lives on the engine; the draw code reads it through these.
+    p1             = property(lambda self: self.engine.p1)
+    p2             = property(lambda self: self.engine.p2)
+    revealed_p1    = property(lambda self: self.engine.revealed_p1)
+    revealed_p2    = property(lambda self: self.engine.revealed_p2)
+    radar_cover_p1 = property(lambda self: self.engine.radar_cover_p1)
+    radar_cover_p2 = property(lambda self: self.engine.radar_cover_p2)
+    destroyed_tiles= property(lambda self: self.engine.destroyed_tiles)
+    market_items   = property(lambda self: self.engine.market_items)
+
+    def wrap_text(self,text,max_chars=96):
+        words=text.split(); lines=[]; cur=""
+        for w in words:
+            if len(cur)+len(w)+(1 if cur else 0) > max_chars:
+                if cur: lines.append(cur); cur=w
+                else: lines.append(w)
+            else:
+                cur = (cur+" "+w).strip() if cur else w
+        if cur: lines.append(cur)
+        return lines
+
+    def reset_to_menu(self):
+        self.cancel_ai()
+        self.engine=Engine(); self.board.set_size(self.engine.w, self.engine.h)
+        self.selected_missile=None; self.range_center=None; self.selected_unit_id=None
+        self.explosions.clear()
+        self.market_open=False; self.help_open=False; self.info=""
+        self.moves_left=1; self.deploy_choice=None
+        self.state=STATE_MENU; self.has_save=os.path.exists(SAVE_PATH)
+        self.country_dropdowns([])
+
+    def country_dropdowns(self, opts, maps=()):
+        # Built empty for the menu and filled (which loads the countries and lists the maps)
+        # when the picker opens.
+        dd_y = 130
+        def _opt(idx, fallback):
+            return opts[idx] if len(opts)>idx else (opts[0] if opts else fallback)
+        self.dd_p1=Dropdown((WIDTH//2-300, dd_y, 280, 40),opts,selected=_opt(0,None))
+        self.dd_p2=Dropdown((WIDTH//2+20,  dd_y, 280, 40),opts,selected=_opt(1,_opt(0,None)))
+        self.dd_map=Dropdown((WIDTH//2-140, 500, 280, 40),list(maps)); self.dd_map.max_visible=max(1, len(maps))
+
+    def goto(self, st):
+        self.state=st; self.info=""; self.flash_timer=0
+        if st!=STATE_MENU: self.help_open=False
+        self.selected_unit_id=None; self.selected_missile=None; self.range_center=None
+        if st==STATE_SELECT and not self.dd_p1.options: self.country_dropdowns(list(countries()), scenarios())
+        # Purchases made mid-animation wait until the animated action has resolved.
+        if st in (STATE_PLAYER, STATE_AI_THINKING):
+            for idx in self.pending_buys: self.buy_item(idx)
+        if st not in (STATE_ANIM_MISSILE, STATE_ANIM_MOVES): self.pending_buys.clear()
+        if st==STATE_PLAYER and self.p1:
+            self.moves_left=1
+            self.p1.shots_left=1
+            self.autosave()
+        if st==STATE_GAME_OVER:
+            self.game_over_timer = FPS*3; self.save_replay()
+            if os.path.exists(SAVE_PATH): os.remove(SAVE_PATH)
+
+    def autosave(self):
+        try:
+            os.makedirs(os.path.dirname(SAVE_PATH), exist_ok=True); savegame.save_file(self.engine, SAVE_PATH)
+        except (OSError, ValueError) as e:
+            print("Could not autosave:", e)
+
+    def continue_match(self):
+        try:
+            engine=savegame.load_file(SAVE_PATH)
+        except Exception as e:   # whatever is wrong with the file, the menu carries on without it
+            print("Could not load the saved match:", e); self.has_save=False; return
+        self.cancel_ai(); self.engine=engine; self.ai.reset(); self.board.set_size(engine.w, engine.h)
+        self.explosions.clear(); self.market_open=False; self.help_open=False; self.deploy_choice=None
+        self.goto(STATE_PLAYER)
+
+    def save_replay(self):
+        if not REPLAY_DIR: return
+        try:
+            os.makedirs(REPLAY_DIR, exist_ok=True)
+            name=time.strftime("%Y%m%d-%H%M%S")+f"-{self.engine.seed}.wbr"
+            with open(os.path.join(REPLAY_DIR, name), "wb") as f: f.write(self.engine.replay_bytes())
+        except OSError as e:
+            print("Could not save replay:", e)
+
+    def toggle_help(self): 
+        if self.state==STATE_MENU: self.help_open=not self.help_open
+
+    def toggle_market(self): self.market_open=not self.market_open
+
+    def confirm_countries(self):
+        if not (self.dd_p1.selected and self.dd_p2.selected):
+            self.info="Select both countries."; self.flash_timer=60; return
+        if self.dd_p1.selected==self.dd_p2.selected:
+            self.info="Pick two different countries."; self.flash_timer=60; return
+        try: self.engine.new_match(self.dd_p1.selected, self.dd_p2.selected, scenario=self.dd_map.selected)
+        except ValueError as e:
+            print("Could not load the map:", e); self.info="Could not load that map."; self.flash_timer=60; return
+        self.ai.reset(); self.board.set_size(self.engine.w, self.engine.h)
+        self.goto(STATE_DEPLOY)
+
+    def status_lines(self):
+        if not (self.p1 and self.p2): return []
+        base_y = HEIGHT - PANEL_H + 12
+        p1txt=f"{self.p1.name}  Dmg:{self.p1.damage:.0f}%  Shot:{self.p1.shots_left}  Moves:{self.moves_left}  $:{self.p1.money}  ✦:{self.p1.tokens}"
+        p2txt=f"{self.p2.name}  Dmg:{self.p2.damage:.0f}%"
+        tok=f"Tanks:{self.p1.tank_tokens}  Troops:{self.p1.troop_tokens}  Jets:{self.p1.jet_tokens}  •  AA:{self.p1.aa_tokens}  Radar:{self.p1.radar_tokens}"
+        speed=GAME_SPEEDS[self.speed_idx]
+        keys=f"Keys — 1:Tank  2:Troop  3:Jet  5:AA  6:Radar  •  S:Speed {speed}×" if speed else "Keys — 1:Tank  2:Troop  3:Jet  5:AA  6:Radar  •  S:Speed instant"
+        if self.board.scrolls: keys+="  •  Arrows:Pan  Wheel/+/-:Zoom"
+        if self.state==STATE_AI_THINKING: p2txt+="  thinking"+"."*(self.think_frames//20%4)
+        return [(FONT_S, p1txt, WHITE, (MARGIN_X, base_y)), (FONT_S, p2txt, WHITE, (WIDTH-300, base_y)),
+                (FONT_S, tok, LIGHTGRAY, (MARGIN_X, base_y+20)), (FONT_XS, keys, LIGHTGRAY, (MARGIN_X, base_y+40))]
+
+    def draw_status_lines(self):
+        for font,text,col,pos in self.status_lines(): self.screen.blit(render_text(font, text, col), pos)
+
+    def draw_country_summary(self, key, pos):
+        data=countries()[key]; x,y=pos; box=pygame.Rect(x,y,480,260)
+        pygame.draw.rect(self.screen,(32,35,44),box,border_radius=10); pygame.draw.rect(self.screen,WHITE,box,2,border_radius=10)
+        title = render_text(FONT, f"{key}  •  Build Points: {data['build_points']}", WHITE)
+        self.screen.blit(title,(x+12,y+12))
+        g=data["ground"]; a=data["air"]; n=data["naval"]
+        lines=[
+            f"Ground: tanks {g['tanks']}, artillery {g['artillery']}, personnel {g['personnel']}",
+            f"Air: total {a['aircraft_total']}, fighters {a['fighters']}, bombers {a['bombers']}",
+            f"Naval: ships {n['ships']}, carriers {n['carriers']}, subs {n['subs']}",
+            f"Defense: air defense rating {data['defense']['air_defense']}",
+            "Missiles: " + ", ".join([f"{m['name']}({m['range_km']}km,r={m.get('radius',1)})" for m in data['missiles']]+["AR Missile(700km,r=1)"])
+        ]
+        for i,ln in enumerate(lines): 
+            self.screen.blit(render_text(FONT_S, ln, LIGHTGRAY),(x+12,y+50+i*22))
+
+    def draw_facilities(self, side):
+        for f,(gx,gy) in side.facilities:
+            p=draw_on_tile(self.screen, self.board, gx,gy, draw_facility_box)
+            if p and self.board.tile==TILE: self.screen.blit(render_text(FONT_S, f.split()[0], (120,220,120)), (p[0]+8,p[1]+10))
+
+    def reveal_tiles(self):
+        # Enemy-half tiles p1 can see (radar cover or revealed by strikes), rebuilt only when
+        # the cover's version or the revealed set changes. Revealed tiles are never un-revealed.
+        cov=self.engine.coverage["p1"]; rev=self.revealed_p1
+        key=(cov, cov.version, rev, len(rev))
+        if key!=self.reveal_key: self.reveal_key=key; self.reveal_set=cov.tiles|rev
+        return self.reveal_set
+
+    def draw_reveal_overlay(self):
+        self.reveal_tiles(); self.board.draw_reveal(self.screen, self.reveal_key, self.reveal_set)
+
+    def draw_backdrop(self, alpha):
+        # Full-screen dimming behind modals, built once per alpha.
+        if alpha not in self.backdrops:
+            s=pygame.Surface((WIDTH,HEIGHT), pygame.SRCALPHA); s.fill((10,12,16,alpha)); self.backdrops[alpha]=s
+        self.screen.blit(self.backdrops[alpha],(0,0))
+
+    def draw_destroyed_marks(self):
+        for gx,gy in self.board.visible_of(self.destroyed_tiles): draw_on_tile(self.screen, self.board, gx,gy, draw_wreck)
+
+    def draw_help_overlay(self, title="How to Play"):
+        self.draw_backdrop(220)
+        lines=self.wrap_text(self.help_text, max_chars=96); w=1000; h=28+6+22*len(lines)+40
+        x=(WIDTH-w)//2; y=(HEIGHT-h)//2; panel=pygame.Rect(x,y,w,h)
+        pygame.draw.rect(self.screen,(28,30,38),panel,border_radius=12); pygame.draw.rect(self.screen,WHITE,panel,2,border_radius=12)
+        self.screen.blit(render_text(FONT, title, WHITE),(x+16,y+16))
+        ty=y+44
+        for ln in lines: self.screen.blit(render_text(FONT_S, ln, (210,210,220)), (x+16,ty)); ty+=22
+        self.screen.blit(render_text(FONT_S, "Click anywhere to go back.", (180,180,200)), (x+16,y+h-30))
+
+    def finish_deploy(self): self.play("p1", ("start",)); self.goto(STATE_PLAYER)
+
+    # Actions that resolve at once go through Engine.step, which logs exactly what the rules
+    # applied, in order. Fires and moves are logged when issued and resolved by their animation;
+    # nothing else is logged until that's done (see pending_buys).
+    def play(self, key, action):
+        self.pump_engine_events(); self.engine.step(action, key); self.pump_engine_events()
+
+    def buy_item(self, idx):
+        radars=self.p1.radar_tokens; self.play("p1", ("buy", idx))
+        if self.p1.radar_tokens>radars: self.radar_flash_timer=120
+
+    def after_player_action(self):
+        if self.engine.over: self.goto(STATE_GAME_OVER)
+        else: self.start_ai_turn()
+
+    def pixel_center(self, gx,gy):
+        # Tile centre in world pixels (TILE-sized tiles, no camera): flights and explosions are
+        # kept in these so panning or zooming mid-animation just moves them with the board.
+        return gx*TILE+TILE//2, gy*TILE+TILE//2
+
+    def player_click(self, event):
+        if event.type==pygame.MOUSEWHEEL and not self.market_open and event.y:
+            self.board.zoom(1 if event.y>0 else -1); return
+        if event.type==pygame.MOUSEBUTTONDOWN:
+            if event.button>3: return   # wheel clicks: handled as MOUSEWHEEL
+            if self.state==STATE_MENU and self.help_open:
+                if not self.btn_help.rect.collidepoint(event.pos):
+                    self.help_open=False
+                return
+            if self.market_open and event.button==1:
+                self.handle_market_click(event.pos); return
+
+            self.btn_main_menu_br.handle(event)
+            if self.state in (STATE_DEPLOY, STATE_PLAYER, STATE_ANIM_MISSILE, STATE_ANIM_MOVES, STATE_AI_THINKING):
+                self.btn_market.handle(event)
+            if self.state==STATE_DEPLOY:
+                self.btn_start_battle.handle(event)
+
+            gp=self.board.grid_at_pixel(event.pos)
+
+            if self.state==STATE_PLAYER and self.selected_missile:
+                if gp:
+                    gx,gy=gp
+                    if self.range_center is None:
+                        if gx<self.board.mid_x:
+                            self.range_center=(gx,gy)
+                            return
+                    else:
+                        if gx>=self.board.mid_x and self.p1.shots_left>0:
+                            if self.engine.can_fire("p1", self.range_center, (gx,gy), self.selected_missile):
+                                self.engine.record("p1", ("fire", self.p1.missiles.index(self.selected_missile), self.range_center, (gx,gy)))
+                                self.p1.shots_left-=1
+                                self.launch_missile("p1", self.range_center, (gx,gy), self.selected_missile)
+                                self.selected_missile=None; self.range_center=None
+                                return
+                return
+
+            if not gp and event.button==1 and self.state==STATE_PLAYER:
+                mx=MARGIN_X; by=HEIGHT-44
+                for m in self.p1.missiles:
+                    rect=pygame.Rect(mx,by,260,26)
+                    if rect.collidepoint(event.pos):
+                        self.selected_missile=m
+                        self.deploy_choice=None
+                        self.range_center=None; self.selected_unit_id=None
+                        return
+                    mx+=270
+                return
+
+            if not gp: return
+            gx,gy=gp
+
+            if event.button==3 and gx<self.board.mid_x and self.state==STATE_DEPLOY:
+                if self.p1.mobile_at(gx,gy)[0] is not None or self.p1.has_static_at(gx,gy): self.play("p1", ("retract", (gx,gy))); return
+
+            if event.button==1 and self.deploy_choice and gx<self.board.mid_x and self.p1.mobile_at(gx,gy)[0] is None and not self.p1.has_static_at(gx,gy):
+                if self.state==STATE_DEPLOY or (self.state==STATE_PLAYER and self.moves_left>0):
+                    ch=self.deploy_choice
+                    if getattr(self.p1, TOKEN_ATTR[ch])<=0: return   # a failed placement mustn't use up the turn
+                    self.play("p1", ("place", ch, (gx,gy)))
+                    if ch=='Radar': self.radar_flash_timer=120
+                    if self.state==STATE_PLAYER:
+                        self.moves_left -= 1
+                        self.after_player_action()
+                    return
+
+            if event.button==1 and self.state==STATE_PLAYER:
+                uid,t = self.p1.mobile_at(gx,gy)
+                if uid is not None:
+                    self.selected_unit_id=uid; return
+
+            if event.button==1 and self.selected_unit_id is not None and self.state==STATE_PLAYER and self.moves_left>0:
+                ut = self.p1.unit(self.selected_unit_id).type
+                if UNIT_META[ut]["range"]<=0: self.info="This unit cannot move."; self.flash_timer=60; self.selected_unit_id=None; return
+                path=self.engine.move_path("p1", self.selected_unit_id, (gx,gy))
+                if path:
+                    self.p1.orders.append({"uid":self.selected_unit_id,"path":path,"type":ut,"dir": +1})
+                    self.engine.record("p1", ("move", self.selected_unit_id, path))
+                    self.moves_left -= 1
+                    self.plan_and_anim_moves(after_label="AI")
+                self.selected_unit_id=None
+
+        if event.type==pygame.KEYDOWN:
+            if   event.key==pygame.K_ESCAPE and self.market_open: self.market_open=False
+            elif event.key==pygame.K_1: self.deploy_choice='Tank'
+            elif event.key==pygame.K_2: self.deploy_choice='Troop'
+            elif event.key==pygame.K_3: self.deploy_choice='Jet'
+            elif event.key==pygame.K_5: self.deploy_choice='AA'
+            elif event.key==pygame.K_6: self.deploy_choice='Radar'
+            elif event.key==pygame.K_h: self.toggle_help()
+            elif event.key==pygame.K_s: self.speed_idx=(self.speed_idx+1)%len(GAME_SPEEDS)
+            elif event.key in PAN_KEYS: self.board.pan(*PAN_KEYS[event.key])
+            elif event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS): self.board.zoom(1)
+            elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS): self.board.zoom(-1)
+
+    def launch_missile(self, key, launch_xy, target_xy, missile):
+        flight=self.engine.plan_missile(key, launch_xy, target_xy, missile)
+        self.anim["missile"]={"flight":flight,"from":self.pixel_center(*launch_xy),"to":self.pixel_center(*target_xy),"steps":flight["steps"],
+                              "idx":0,"dir":self.engine.side(key).dir,"hold":MISSILE_HOLD_FRAMES,"hold_tick":MISSILE_HOLD_FRAMES}
+        self.anim["intercept"]=None
+        self.goto(STATE_ANIM_MISSILE)
+
+    def finish_missile(self, flight):
+        self.anim["missile"]=None; self.anim["intercept"]=None
+        self.engine.land_missile(flight)
+        if self.engine.over: self.goto(STATE_GAME_OVER)
+        elif flight["att"]=="p1": self.plan_and_anim_moves(after_label="AI")
+        else: self.end_ai_turn()
+
+    def plan_and_anim_moves(self, after_label="AI"):
+        self.move_snapshot["p1"]=list(self.p1.units)
+        self.move_snapshot["p2"]=list(self.p2.units)
+        seq=self.engine.plan_moves("p1", self.p1.orders)
+        self.anim["moves"]={"seq":seq,"idx":0,"frames": (seq[0]["speed"] if seq else 0)}
+        self.anim["after"]=after_label
+        self.goto(STATE_ANIM_MOVES)
+
+    def start_ai_turn(self):
+        # The agent gets its own copy of the match, so the UI can keep drawing (and the
+        # player keep browsing the market) while it thinks.
+        self.ai_job=self.ai_pool.submit(self.ai.choose, self.engine.copy(), "p2"); self.think_frames=0
+        self.goto(STATE_AI_THINKING)
+
+    def finish_ai_thinking(self):
+        job=self.ai_job; self.ai_job=None
+        if not self.apply_ai_action(job.result() or ("pass",)): self.goto(STATE_GAME_OVER if self.engine.over else STATE_PLAYER)
+
+    def cancel_ai(self):
+        # Abandon a search in flight: it stops at its next check and its agent (with any tree
+        # it was building) is dropped, so the next match starts from a fresh one.
+        if self.ai_job is None: return
+        self.ai.cancel(); self.ai_job=None
+        self.ai=make_agent(AI_NAME, budget=AI_BUDGET_S)
+
+    def apply_ai_action(self, action):
+        # True when the action animates (and ends the turn when done); passes, placements and
+        # anything Engine.step would refuse are played, turn end included, at once.
+        e=self.engine; action=e.checked("p2", action)
+        if not (action and action[0] in ("fire","move") and e.allowed("p2", action)):
+            self.play("p2", action if action and action[0]=="place" else ("pass",)); return False
+        e.record("p2", action)
+        if action[0]=="fire":
+            _,mi,launch,target=action; self.p2.shots_left-=1
+            self.launch_missile("p2", launch, target, self.p2.missiles[mi])
+            return True
+        _,uid,path=action
+        self.move_snapshot["p1"]=list(self.p1.units)
+        self.move_snapshot["p2"]=list(self.p2.units)
+        seq=self.engine.plan_moves("p2", [{"uid":uid,"path":path}])
+        self.anim["moves"]={"seq":seq,"idx":0,"frames": seq[0]["speed"]}
+        self.anim["after"]="PLAYER"
+        self.goto(STATE_ANIM_MOVES)
+        return True
+
+    def end_ai_turn(self):
+        self.engine.end_turn("p2")
+        self.goto(STATE_PLAYER)
+
+    def draw_menu(self):
+        self.board.draw(self.screen)
+        title = render_text(FONT_XL, "WarBoard: Vengeance", WHITE)
+        tx = biased_center_x(0.08)
+        self.screen.blit(title, title.get_rect(midtop=(tx, HEIGHT//2-120)))
+        self.btn_start.draw(self.screen); self.btn_help.draw(self.screen)
+        if self.has_save: self.btn_continue.draw(self.screen)
+        if self.help_open: self.draw_help_overlay("How to Play — click anywhere to close")
+
+    def draw_select(self):
+        self.board.draw(self.screen)
+        if self.dd_p1.selected: self.draw_country_summary(self.dd_p1.selected,(WIDTH//2-520, 220))
+        if self.dd_p2.selected: self.draw_country_summary(self.dd_p2.selected,(WIDTH//2+40,  220))
+        self.dd_p1.draw(self.screen); self.dd_p2.draw(self.screen); self.btn_confirm.draw(self.screen)
+        if self.dd_map.options:
+            self.screen.blit(render_text(FONT, "Map", WHITE), (self.dd_map.rect.x-52, self.dd_map.rect.y+8))
+            self.dd_map.draw(self.screen)
+            self.screen.blit(render_text(FONT_S, map_caption(self.dd_map.selected), LIGHTGRAY), (self.dd_map.rect.right+12, self.dd_map.rect.y+12))
+        self.dd_p1.draw_list(self.screen); self.dd_p2.draw_list(self.screen); self.dd_map.draw_list(self.screen)
+        self.btn_main_menu_br.draw(self.screen)
+
+    def draw_deploy(self):
+        self.board.draw(self.screen)
+        self.btn_market.draw(self.screen)
+        self.btn_start_battle.draw(self.screen)
+        self.btn_main_menu_br.draw(self.screen)
+        self.draw_facilities(self.p1); self.draw_facilities(self.p2)
+        draw_static_defenses(self.screen, self.p1, board=self.board)
+        draw_units_for_side(self.screen, self.p1, board=self.board)
+        if self.radar_flash_timer>0:
+            for t,(gx,gy) in self.p1.static:
+                if t=="Radar": highlight_range(self.screen,(gx,gy),RADAR_RANGE_BASE+self.p1.radar_range_bonus,self.board,(120,220,120))
+        self.draw_status_lines()
+        if self.market_open: self.draw_market_overlay()
+
+    def draw_player(self):
+        self.board.draw(self.screen)
+        self.btn_market.draw(self.screen)
+        self.btn_main_menu_br.draw(self.screen)
+        self.draw_facilities(self.p1); self.draw_facilities(self.p2)
+        reveal_tiles = self.reveal_tiles()
+        draw_static_defenses(self.screen, self.p1, board=self.board)
+        draw_static_defenses(self.screen, self.p2, reveal_set=reveal_tiles, is_enemy=True, board=self.board)
+        draw_units_for_side(self.screen, self.p1, board=self.board)
+        draw_units_for_side(self.screen, self.p2, reveal_set=reveal_tiles, is_enemy=True, board=self.board)
+        self.draw_reveal_overlay()
+        self.draw_destroyed_marks()
+        mx=MARGIN_X; by=HEIGHT-44
+        self.screen.blit(render_text(FONT_S, "Missiles:", WHITE), (mx, HEIGHT-70))
+        for m in self.p1.missiles:
+            rect=pygame.Rect(mx,by,260,26); sel=(self.selected_missile is m)
+            pygame.draw.rect(self.screen,(70,70,70),rect,border_radius=6); pygame.draw.rect(self.screen,(255,255,255) if sel else (140,140,140),rect,2,border_radius=6)
+            self.screen.blit(render_text(FONT_XS, f"{m.name} ({m.range_km}km, r={m.radius_tiles})", WHITE),(rect.x+6,rect.y+5)); mx+=270
+        if self.selected_unit_id is not None:
+            highlight_moves(self.screen, self.engine.move_field("p1", self.selected_unit_id), self.board)
+        if self.selected_missile and self.range_center:
+            rt=self.selected_missile.range_tiles; t=self.board.tile; m=max(1, t*3//TILE)
+            for gx,gy in self.board.tiles_within(self.range_center, rt, self.board.mid_x):
+                x,y=self.board.pixel_of_grid(gx,gy); pygame.draw.rect(self.screen,(100,100,100),(x+m,y+m,t-2*m,t-2*m),1)
+        if self.radar_flash_timer>0:
+            for t,(gx,gy) in self.p1.static:
+                if t=="Radar": highlight_range(self.screen,(gx,gy),RADAR_RANGE_BASE+self.p1.radar_range_bonus,self.board,(120,220,120))
+        self.draw_status_lines()
+        if self.market_open: self.draw_market_overlay()
+
+    def draw_anim_missile(self):
+        self.board.draw(self.screen)
+        self.btn_main_menu_br.draw(self.screen)
+        self.draw_facilities(self.p1); self.draw_facilities(self.p2)
+        reveal_tiles = self.reveal_tiles()
+        draw_static_defenses(self.screen, self.p1, board=self.board)
+        draw_static_defenses(self.screen, self.p2, reveal_set=reveal_tiles, is_enemy=True, board=self.board)
+        draw_units_for_side(self.screen, self.p1, board=self.board)
+        draw_units_for_side(self.screen, self.p2, reveal_set=reveal_tiles, is_enemy=True, board=self.board)
+        for a,(px,py) in self.flight_sprites(): draw_missile_sprite(self.screen, px,py, a["dir"])
+        self.draw_reveal_overlay(); self.draw_destroyed_marks()
+        self.draw_status_lines()
+        if self.market_open: self.draw_market_overlay()
+
+    def draw_anim_moves(self):
+        self.board.draw(self.screen)
+        self.btn_main_menu_br.draw(self.screen)
+        for t,(gx,gy),d in (self.move_snapshot["p1"] or []): draw_unit_icon(self.screen, t, gx,gy, d, enemy=False, board=self.board)
+        for t,(gx,gy),d in (self.move_snapshot["p2"] or []):
+            if (gx,gy) in self.radar_cover_p1 or (gx,gy) in self.revealed_p1: draw_unit_icon(self.screen, t, gx,gy, d, enemy=True, board=self.board)
+        draw_static_defenses(self.screen, self.p1, board=self.board)
+        draw_static_defenses(self.screen, self.p2, reveal_set=self.reveal_tiles(), is_enemy=True, board=self.board)
+        mover=self.moving_unit()
+        if mover:
+            step,(ix,iy)=mover
+            draw_unit_icon(self.screen, step["t"], ix,iy, step["dir"], enemy=(step["owner"]=="p2"), board=self.board)
+        self.draw_destroyed_marks()
+        self.draw_status_lines()
+        if self.market_open: self.draw_market_overlay()
+
+    def handle_market_click(self, pos):
+        if not self.p1: return
+        if self.market_close_rect.collidepoint(pos): self.market_open=False; return
+        if not self.market_rect.collidepoint(pos): self.market_open=False; return
+        for r,item in getattr(self,'market_clickzones',[]):
+            if r.collidepoint(pos):
+                idx=self.market_items.index(item)
+                if self.state in (STATE_ANIM_MISSILE, STATE_ANIM_MOVES):
+                    self.pending_buys.append(idx); self.info=f"{item['name']}: bought when this action resolves."; self.flash_timer=90
+                else: self.buy_item(idx)
+                break
+
+    def draw_market_overlay(self):
+        self.draw_backdrop(230)
+        w=960; h=520; x=(WIDTH-w)//2; y=(HEIGHT-h)//2
+        self.market_rect=pygame.Rect(x,y,w,h)
+        pygame.draw.rect(self.screen,(28,30,38),self.market_rect,border_radius=14); pygame.draw.rect(self.screen,WHITE,self.market_rect,2,border_radius=14)
+        self.screen.blit(render_text(FONT, "Market — click to buy (place with 1–3/5–6)", WHITE),(x+16,y+16))
+        self.screen.blit(render_text(FONT_S, "ESC / Close / outside click to close", LIGHTGRAY),(x+16,y+44))
+        close_rect=pygame.Rect(x+w-44,y+12,32,28)
+        pygame.draw.rect(self.screen,(80,80,90),close_rect,border_radius=6); pygame.draw.rect(self.screen,WHITE,close_rect,1,border_radius=6)
+        self.screen.blit(render_text(FONT_S, "Close", WHITE),(close_rect.x-18, close_rect.y+30))
+        self.market_close_rect=close_rect
+        if self.p1:
+            self.screen.blit(render_text(FONT_S, f"Money: {self.p1.money}   Tokens: {self.p1.tokens}", LIGHTGRAY),(x+w-280,y+18))
+        cols=3; item_w=(w-40)//cols; item_h=96; self.market_clickzones=[]
+        for i,item in enumerate(self.market_items):
+            cx=x+16+(i%cols)*item_w; cy=y+74+(i//cols)*(item_h+14)
+            r=pygame.Rect(cx,cy,item_w-20,item_h)
+            pygame.draw.rect(self.screen,(40,44,54),r,border_radius=10); pygame.draw.rect(self.screen,(200,200,210),r,1,border_radius=10)
+            self.screen.blit(render_text(FONT, item["name"], WHITE),(r.x+10,r.y+10))
+            self.screen.blit(render_text(FONT_S, f"${item['price']}", (200,220,200)),(r.x+10,r.y+42))
+            self.screen.blit(render_text(FONT_XS, "Adds missile or unit tokens to inventory", (180,185,195)),(r.x+10,r.y+64))
+            self.market_clickzones.append((r,item))
+
+    # ---- fixed-timestep simulation ----
+    # update() is one tick. advance(dt) runs as many ticks as dt (scaled by the game speed)
+    # pays for and keeps the remainder; alpha = remainder/tick interpolates the sprites.
+    def advance(self, dt):
+        self.pump_engine_events()
+        speed=GAME_SPEEDS[self.speed_idx]
+        if speed==0:
+            n=0
+            while self.state in (STATE_ANIM_MISSILE, STATE_ANIM_MOVES) and n<MAX_INSTANT_TICKS: self.update_play(); n+=1
+            self.explosions.clear(); speed=1   # AI polling still runs in real time
+        self.timer_acc=min(self.timer_acc+dt, MAX_BACKLOG_S)
+        while self.timer_acc>=TICK_S:
+            self.timer_acc-=TICK_S; self.update_timers()
+        self.acc=min(self.acc+dt*speed, MAX_BACKLOG_S*speed)
+        while self.acc>=TICK_S:
+            self.acc-=TICK_S; self.update_play()
+        self.alpha=self.acc/TICK_S
+
+    @staticmethod
+    def flight_at(a, i):
+        # World-pixel position of a flight anim at (fractional) sample i of its `steps`.
+        (x0,y0),(x1,y1)=a["from"],a["to"]; t=min(i, a["steps"])/a["steps"]
+        return int(x0+(x1-x0)*t), int(y0+(y1-y0)*t)
+
+    def flight_sprites(self):
+        # (anim, screen position) of the missile and interceptor in flight, if in view. The
+        # missile moves one sample per `hold` ticks, the interceptor one per tick.
+        out=[]
+        if self.state!=STATE_ANIM_MISSILE: return out
+        for a in (self.anim["missile"], self.anim["intercept"]):
+            if not a or a["idx"]>a["steps"]: continue
+            frac=(a["hold"]-a["hold_tick"]+self.alpha)/a["hold"] if "hold" in a else self.alpha
+            px,py=self.board.to_screen(*self.flight_at(a, a["idx"]+frac))
+            if self.board.grid_rect.colliderect((px-14, py-9, 28, 18)): out.append((a, (px,py)))
+        return out
+
+    def moving_unit(self):
+        # (step, fractional grid position) of the unit currently walking, if any.
+        mv=self.anim["moves"]
+        if self.state!=STATE_ANIM_MOVES or not mv or mv["idx"]>=len(mv["seq"]): return None
+        step=mv["seq"][mv["idx"]]; t=min(1.0, 1.0 - (mv["frames"]-self.alpha)/step["speed"])
+        sx,sy=step["start"]; ex,ey=step["end"]
+        return step, (int(sx + (ex-sx)*t), int(sy + (ey-sy)*t))
+
+    def update(self):
+        self.update_timers(); self.update_play()
+
+    def update_timers(self):
+        # Wall-clock timers, ticked in real time by advance(): messages and the game-over
+        # screen last as long at every game speed.
+        if self.flash_timer>0: self.flash_timer-=1
+        if self.radar_flash_timer>0: self.radar_flash_timer-=1
+        if self.state==STATE_GAME_OVER and self.game_over_timer>0:
+            self.game_over_timer -= 1
+            if self.game_over_timer==0:
+                self.reset_to_menu()
+
+    def update_play(self):
+        # One tick of animation and AI polling, scaled by the game speed.
+        self.explosions.tick()
+        if self.state==STATE_ANIM_MISSILE: self.update_anim_missile()
+        elif self.state==STATE_ANIM_MOVES: self.update_anim_moves()
+        elif self.state==STATE_AI_THINKING:
+            self.think_frames+=1
+            if self.ai_job.done(): self.finish_ai_thinking()
+        self.pump_engine_events()
+
+    def pump_engine_events(self):
+        for ev in self.engine.events:
+            if ev[0]=="explosion": self.explosions.spawn(self.pixel_center(*ev[1]), ev[2])
+            elif ev[0]=="info": self.info=ev[1]; self.flash_timer=ev[2]
+        self.engine.events.clear()
+
+    def update_anim_missile(self):
+        m=self.anim["missile"]
+        if not m: return
+        if self.anim["intercept"]:
+            ip=self.anim["intercept"]; ip["idx"]+=1
+            if ip["idx"]>ip["steps"]:
+                self.explosions.spawn(ip["to"], 18)
+                if m["flight"]["intercepted"]: self.finish_missile(m["flight"]); return
+                self.anim["intercept"]=None
+
+        m["hold_tick"]-=1
+        if m["hold_tick"]<=0:
+            m["idx"]+=1; m["hold_tick"]=m["hold"]
+            flight=m["flight"]
+            if m["idx"]==flight["intercept_idx"]:
+                self.anim["intercept"]={"from":self.pixel_center(*flight["aa"]),"to":self.flight_at(m, m["idx"]),
+                                        "steps":flight["intercept_steps"],"idx":0,"dir":+1 if m["dir"]<0 else -1}
+            if m["idx"]>m["steps"]:
+                self.finish_missile(flight)
+
+    def update_anim_moves(self):
+        mv=self.anim["moves"]
+        if mv and mv["idx"]<len(mv["seq"]):
+            mv["frames"]-=1
+            if mv["frames"]<=0:
+                if not self.engine.resolve_move_step(mv["seq"][mv["idx"]]):
+                    mv["idx"]=len(mv["seq"])
+                else:
+                    mv["idx"]+=1
+                    if mv["idx"]<len(mv["seq"]): mv["frames"]=mv["seq"][mv["idx"]]["speed"]
+        elif self.anim.get("after")=="AI":
+            self.engine.end_turn("p1"); self.after_player_action()
+        else:
+            self.end_ai_turn()
+
+    def handle_menu(self, event):
+        self.btn_start.handle(event); self.btn_help.handle(event)
+        if self.has_save: self.btn_continue.handle(event)
+        if self.help_open and event.type==pygame.MOUSEBUTTONDOWN and not self.btn_help.rect.collidepoint(event.pos):
+            self.help_open=False
+
+    def handle_select(self, event):
+        # An open country list covers the map picker: its clicks are the list's alone.
+        covered=self.dd_p1.open or self.dd_p2.open
+        if not self.dd_map.open: self.dd_p1.handle(event); self.dd_p2.handle(event); self.btn_confirm.handle(event)
+        if not covered: self.dd_map.handle(event)
+        self.btn_main_menu_br.handle(event)
+
+    # ---- dirty-rectangle rendering ----
+    # Each frame is described by three keys: UI state (any change => full redraw), per-tile
+    # contents and panel text (changed tiles / the panel get redrawn), plus the rects of
+    # moving sprites this frame and last. The scene is redrawn clipped to the union of the
+    # dirty rects and only those rects are pushed to the display; an idle frame draws nothing.
+    def ui_key(self):
+        dd_open=self.dd_p1.open or self.dd_p2.open or self.dd_map.open
+        return (self.state, id(self.engine), self.board.camera, self.market_open, self.help_open, self.selected_missile, self.range_center,
+                self.selected_unit_id, self.radar_flash_timer>0, tuple(b.hover for b in self.buttons),
+                (self.dd_p1.selected, self.dd_p1.open, self.dd_p1.scroll, self.dd_p2.selected, self.dd_p2.open, self.dd_p2.scroll),
+                (self.dd_map.selected, self.dd_map.open),
+                pygame.mouse.get_pos() if dd_open else None,
+                (self.p1.money, self.p1.tokens) if self.market_open and self.p1 else None)
+
+    def tile_view(self):
+        # Contents of the on-screen tiles only; the camera itself is part of ui_key.
+        view={}; vis=self.board.visible
+        def put(tile, item):
+            if vis(*tile): view[tile]=view.get(tile,())+(item,)
+        for side in (self.p1, self.p2):
+            if not side: continue
+            for t,pos,d in side.units: put(pos, (side.key,t,d))
+            for t,pos in side.static: put(pos, (side.key,t))
+            for f,pos in side.facilities: put(pos, (side.key,f))
+        for key,units in self.move_snapshot.items():
+            if self.state==STATE_ANIM_MOVES and units:
+                for t,pos,d in units: put(pos, ("snap",key,t,d))
+        for mark,tiles in (("x",self.destroyed_tiles), ("c",self.radar_cover_p1), ("r",self.revealed_p1)):
+            for pos in self.board.visible_of(tiles): view[pos]=view.get(pos,())+(mark,)
+        return view
+
+    def panel_key(self):
+        return (tuple(text for _,text,_,_ in self.status_lines()), len(self.p1.missiles) if self.p1 else 0)
+
+    def tile_dirty_rect(self, tile):
+        # Labels sit above the icon and facility names run past the right edge.
+        x,y=self.board.pixel_of_grid(*tile); return pygame.Rect(x-4, y-26, max(TILE+34, 14+facility_label_w()), TILE+30)
+
+    def sprite_rects(self):
+        rects=self.explosions.rects(self.board, self.alpha)
+        for _,(px,py) in self.flight_sprites(): rects.append(pygame.Rect(px-14, py-9, 28, 18))
+        mover=self.moving_unit()
+        if mover: rects.append(self.tile_dirty_rect(mover[1]))
+        return rects
+
+    def draw_scene(self):
+        if self.state==STATE_MENU: self.draw_menu()
+        elif self.state==STATE_SELECT: self.draw_select()
+        elif self.state==STATE_DEPLOY: self.draw_deploy()
+        elif self.state in (STATE_PLAYER, STATE_AI_THINKING): self.draw_player()
+        elif self.state==STATE_ANIM_MISSILE: self.draw_anim_missile()
+        elif self.state==STATE_ANIM_MOVES: self.draw_anim_moves()
+        elif self.state==STATE_GAME_OVER:
+            self.board.draw(self.screen)
+            winner = self.p1.name if self.p2.damage>=100 else self.p2.name if self.p1.damage>=100 else "None"
+            msg = f"Game Over • Winner: {winner}  (click to return)"
+            self.screen.blit(render_text(FONT_L, msg, YELLOW), (WIDTH//2-360, HEIGHT//2-20))
+            self.btn_main_menu_br.draw(self.screen)
+
+        self.explosions.draw(self.screen, self.board, self.alpha)
+
+    def render(self):
+        ui=self.ui_key(); tiles=self.tile_view(); panel=self.panel_key(); sprites=self.sprite_rects()
+        prev=self.last_view
+        if self.full_redraw or prev is None or ui!=prev[0]:
+            dirty=[self.screen.get_rect()]
+        else:
+            old=prev[1]
+            dirty=[self.tile_dirty_rect(t) for t in old.keys()|tiles.keys() if old.get(t)!=tiles.get(t)]
+            if panel!=prev[2]: dirty.append(pygame.Rect(0, HEIGHT-PANEL_H, WIDTH, PANEL_H))
+            dirty+=prev[3]+sprites
+        self.last_view=(ui,tiles,panel,sprites); self.full_redraw=False
+        if not dirty: return
+        self.screen.set_clip(self.board.snap_to_tiles(dirty[0].unionall(dirty[1:])))
+        self.draw_scene()
+        self.screen.set_clip(None)
+        pygame.display.update(dirty)
+
+    def is_animating(self):
+        return (self.state in (STATE_ANIM_MISSILE, STATE_ANIM_MOVES, STATE_AI_THINKING) or bool(self.explosions)
+                or self.flash_timer>0 or self.radar_flash_timer>0
+                or (self.state==STATE_GAME_OVER and self.game_over_timer>0))
+
+    def run(self):
+        # Full FPS only while something is moving or a timer is live; otherwise block on input
+        # (and don't count the wait as game time). The first frame goes up before any waiting.
+        self.render(); STARTUP.mark("first frame")
+        if self.startup_report: print(STARTUP.report())
+        running=True
+        while running:
+            if self.is_animating():
+                dt=self.clock.tick(FPS)/1000; events=pygame.event.get()
+            else:
+                events=[pygame.event.wait(IDLE_WAIT_MS)]+pygame.event.get(); self.clock.tick(); dt=0.0; self.acc=self.timer_acc=0.0
+            for event in events:
+                if event.type==pygame.NOEVENT: continue
+                elif event.type==pygame.QUIT: running=False
+                elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED): self.full_redraw=True
+                elif self.state in (STATE_DEPLOY, STATE_PLAYER, STATE_ANIM_MISSILE, STATE_ANIM_MOVES, STATE_AI_THINKING):
+                    self.player_click(event)
+                elif self.state==STATE_MENU: self.handle_menu(event)
+                elif self.state==STATE_SELECT: self.handle_select(event)
+                elif self.state==STATE_GAME_OVER and (event.type in (pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN)):
+                    self.reset_to_menu()
+
+            self.advance(dt); self.render()
+        self.cancel_ai(); self.ai_pool.shutdown(wait=False)
+
+if __name__=="__main__":
+    ap=argparse.ArgumentParser(description="WarBoard: Vengeance")
+    ap.add_argument("--startup-report", action="store_true", help="print how long each startup step took")
+    Game(startup_report=ap.parse_args().startup_report).run()
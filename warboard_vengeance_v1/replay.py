@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# WarBoard: Vengeance (v1) — replay saved matches headless
+#
+# Notes:
+# - A .wbr file is Engine.replay_bytes(): the match seed, the countries and the action log.
+#   tournament.py --replays writes one per match.
+# - Replays run the rules only (no rendering, no AI), check every AA engagement against the
+#   recording and exit non-zero on the first divergence, so a set of recorded games doubles
+#   as a rules regression check; --repeat times them for performance bisects.
+#
+#   python replay.py replays/*.wbr
+#   python replay.py replays/42.wbr --upto 120 --dump
+#   python replay.py replays/*.wbr --repeat 20
+
+import sys, argparse, time
+from engine import replay
+
+def main(argv=None):
+    ap=argparse.ArgumentParser(description="Re-run saved matches and check they play out as recorded.")
+    ap.add_argument("files", nargs="+")
+    ap.add_argument("--upto", type=int, default=None, help="stop after this many log records")
+    ap.add_argument("--repeat", type=int, default=1, help="replay each file N times and report the best time")
+    ap.add_argument("--dump", action="store_true", help="print the decoded log records")
+    args=ap.parse_args(argv)
+
+    failed=0; total=0.0
+    for path in args.files:
+        with open(path, "rb") as f: data=f.read()
+        try:
+            best=None
+            for _ in range(max(1, args.repeat)):
+                t0=time.perf_counter(); e=replay(data, args.upto); dt=time.perf_counter()-t0
+                best=dt if best is None else min(best, dt)
+        except ValueError as err:
+            print(f"{path}: {err}"); failed+=1; continue
+        total+=best
+        winner=e.side(e.winner).name if e.winner else "-"
+        print(f"{path}: {e.p1.name} vs {e.p2.name}  seed {e.seed}  {len(e.log)} records  round {e.round}  "
+              f"dmg {e.p1.damage}/{e.p2.damage}  winner {winner}  {best*1000:.2f} ms")
+        if args.dump:
+            for i,(key,action) in enumerate(e.log): print(f"  {i:>5} {key} {action}")
+    print(f"{len(args.files)-failed}/{len(args.files)} replayed as recorded  ({total*1000:.1f} ms)", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__=="__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# WarBoard: Vengeance (v1) — match save files
+#
+# Notes:
+# - save(engine) -> bytes and load(data) -> Engine cover the whole match: both sides (units,
+#   statics, facilities, missiles, money, tokens, bonuses), reveals, destroyed tiles, both dice
+#   streams and the action log, so a loaded match plays on (and replays) as if never saved.
+# - Little-endian struct records; tile sets are one bit per board tile; strings are
+#   length-prefixed UTF-8. Countries are looked up by name in engine.countries().
+# - The board (scenario name, size, km per tile) is stored, not looked up, so a save loads
+#   even if its scenario file has since changed or gone.
+# - Radar cover and the per-side indexes are derived, so they are rebuilt on load, not stored.
+# - Bump VERSION whenever the layout changes; load() refuses any other version.
+# - A corrupt or hand-edited file fails load() with ValueError, never IndexError/struct.error;
+#   a side whose numbers outgrow their fields fails save() the same way.
+
+import os, struct, random
+from array import array
+import numpy as np
+from engine import (Engine, PlayerSide, Missile, Unit, Static, ActionLog, RadarCoverage, Scenario,
+                    TOKEN_ATTR, FACILITY_NAMES, SCENARIO_LIMITS,
+                    PHASE_SETUP, PHASE_DEPLOY, PHASE_BATTLE, PHASE_OVER)
+
+MAGIC   = b"WBS"
+VERSION = 4
+PHASES  = (PHASE_SETUP, PHASE_DEPLOY, PHASE_BATTLE, PHASE_OVER)
+KINDS   = tuple(TOKEN_ATTR)   # unit and AA/radar types
+RNG_BYTES  = 625*4            # Mersenne Twister words + position
+
+HEAD    = struct.Struct("<3sBHHHBBHBQ")  # magic, version, grid w/h, km per tile, phase, turn, round,
+                                         # winner, seed (+ scenario name)
+SIDE    = struct.Struct("<hiHB5HHHHIB")  # damage, money, tokens, shots, 5 token counts, aa/radar
+                                         # range bonus, intercept cash bonus, next id, is_human
+MISSILE = struct.Struct("<HBBB")         # range_km, damage, radius, anti_radar (+ name)
+ENTITY  = struct.Struct("<IBHH")         # id, kind, x, y
+COUNT   = struct.Struct("<H")
+LOG_LEN = struct.Struct("<I")
+
+def tile_bytes(w, h): return (w*h+7)//8
+
+# Bit y*w+x of the little-endian bitset is tile (x, y). Packed and unpacked with numpy a whole
+# mask at a time (the autosave runs inside goto()), so the cost follows the tiles set, not w*h.
+def tile_bits(tiles, w, h):
+    mask=np.zeros(w*h, np.uint8)
+    mask[np.fromiter([y*w+x for x,y in tiles], np.intp, len(tiles))]=1
+    return np.packbits(mask, bitorder="little").tobytes()
+
+def bit_tiles(data, w, h):
+    packed=np.frombuffer(data, np.uint8); nz=np.flatnonzero(packed)   # only the bytes with tiles set
+    bits=np.unpackbits(packed[nz,None], axis=1, bitorder="little").view(bool)
+    i=(nz[:,None]*8+np.arange(8))[bits]; i=i[i<w*h]
+    return set(zip((i%w).tolist(), (i//w).tolist()))
+
+def rng_bytes(rng):
+    _,state,_=rng.getstate(); return array("I", state).tobytes()
+
+def rng_from(data):
+    words=array("I"); words.frombytes(data)
+    r=random.Random.__new__(random.Random); r.setstate((3, tuple(words), None))
+    return r
+
+def pick(options, i, what):
+    if i>=len(options): raise ValueError(f"corrupt save file: bad {what} {i}")
+    return options[i]
+
+def put_str(out, text):
+    b=text.encode("utf-8"); out.append(len(b)); out+=b
+
+class Reader:
+    def __init__(self, data): self.data=memoryview(data); self.pos=0
+    def take(self, n):
+        if self.pos+n>len(self.data): raise ValueError("truncated save file")
+        self.pos+=n; return self.data[self.pos-n:self.pos]
+    def unpack(self, st): return st.unpack(self.take(st.size))
+    def str(self): return bytes(self.take(self.take(1)[0])).decode("utf-8")
+
+def save(e):
+    if not (e.p1 and e.p2): raise ValueError("no match to save")
+    try: return pack_match(e)
+    except struct.error as ex: raise ValueError(f"match does not fit the save format: {ex}") from None
+
+def pack_match(e):
+    winner=("p1","p2").index(e.winner)+1 if e.winner else 0
+    out=bytearray(HEAD.pack(MAGIC, VERSION, e.w, e.h, e.km_per_tile, PHASES.index(e.phase), e.turn=="p2", e.round, winner, e.seed or 0))
+    put_str(out, e.scenario.name)
+    out+=rng_bytes(e.rng); out+=rng_bytes(e.ai_rng)
+    for s in (e.p1, e.p2):
+        out+=SIDE.pack(s.damage, s.money, s.tokens, s.shots_left, *(getattr(s,a) for a in TOKEN_ATTR.values()),
+                       s.aa_range_bonus, s.radar_range_bonus, s.intercept_cash_bonus, s.next_id, s.is_human)
+        put_str(out, s.name)
+        out+=COUNT.pack(len(s.missiles))
+        for m in s.missiles: out+=MISSILE.pack(m.range_km, m.damage, m.radius_tiles, m.anti_radar); put_str(out, m.name)
+        for group,kinds in ((s.units, KINDS), (s.static, KINDS), (s.facilities, FACILITY_NAMES)):
+            out+=COUNT.pack(len(group))
+            for x in group: out+=ENTITY.pack(x.id, kinds.index(x.type), *x.pos)
+    for tiles in (e.revealed_p1, e.revealed_p2, e.destroyed_tiles): out+=tile_bits(tiles, e.w, e.h)
+    log=bytes(e.log); out+=LOG_LEN.pack(len(log)); out+=log
+    return bytes(out)
+
+def load(data):
+    r=Reader(data)
+    magic,version,w,h,km,phase,turn,rnd,winner,seed=r.unpack(HEAD)
+    if magic!=MAGIC: raise ValueError("not a WarBoard save file")
+    if version!=VERSION: raise ValueError(f"save file version {version} (this build reads {VERSION})")
+    bad=[k for k,v in zip(SCENARIO_LIMITS, (w,h,km)) if not SCENARIO_LIMITS[k][0]<=v<=SCENARIO_LIMITS[k][1]]
+    if bad: raise ValueError(f"corrupt save file: bad board {', '.join(bad)}")
+    e=Engine(Scenario(r.str(), w, h, km))
+    e.phase=pick(PHASES, phase, "phase"); e.turn="p2" if turn else "p1"; e.round=rnd
+    e.winner=pick((None,"p1","p2"), winner, "winner"); e.seed=seed
+    e.rng=rng_from(r.take(RNG_BYTES)); e.ai_rng=rng_from(r.take(RNG_BYTES))
+    for key in ("p1","p2"):
+        vals=r.unpack(SIDE); name=r.str()
+        s=PlayerSide(name, bool(vals[-1]), key, km)
+        s.damage,s.money,s.tokens,s.shots_left=vals[:4]
+        for attr,v in zip(TOKEN_ATTR.values(), vals[4:9]): setattr(s, attr, v)
+        s.aa_range_bonus,s.radar_range_bonus,s.intercept_cash_bonus,s.next_id=vals[9:13]
+        missiles=[]
+        for _ in range(r.unpack(COUNT)[0]):
+            rng_km,dmg,rad,anti=r.unpack(MISSILE); missiles.append(Missile(r.str(), rng_km, dmg, rad, bool(anti), km))
+        s.missiles=missiles
+        groups=[]
+        for kinds in (KINDS, KINDS, FACILITY_NAMES):
+            group=[(i, pick(kinds, k, "kind"), (x,y)) for i,k,x,y in ENTITY.iter_unpack(r.take(r.unpack(COUNT)[0]*ENTITY.size))]
+            if any(x>=w or y>=h for _,_,(x,y) in group): raise ValueError("corrupt save file: piece off the board")
+            groups.append(group)
+        s.set_units([Unit(i, k, pos, s.dir) for i,k,pos in groups[0]])
+        s.set_static([Static(i, k, pos) for i,k,pos in groups[1]])
+        s.set_facilities([Static(i, k, pos) for i,k,pos in groups[2]])
+        if key=="p1": e.p1=s
+        else: e.p2=s
+    n=tile_bytes(w, h)
+    e.revealed_p1=bit_tiles(r.take(n), w, h); e.revealed_p2=bit_tiles(r.take(n), w, h)
+    e.destroyed_tiles=bit_tiles(r.take(n), w, h)
+    e.log=ActionLog(r.take(r.unpack(LOG_LEN)[0]), e.scenario.wide)
+    for s in (e.p1, e.p2):
+        cov=e.coverage[s.key]=RadarCoverage(e.target_cols(s.key), h)
+        for pos in s.radar_sites: cov.add(pos, e.radar_range(s))
+    return e
+
+def save_file(e, path):
+    # Written next to the target and renamed over it, so a crash mid-save keeps the old file.
+    tmp=path+".tmp"
+    with open(tmp, "wb") as f: f.write(save(e))
+    os.replace(tmp, path)
+
+def load_file(path):
+    with open(path, "rb") as f: return load(f.read())
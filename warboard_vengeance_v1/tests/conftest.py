@@ -0,0 +1,42 @@
+import os, sys
+
+# The modules load data/ relative to the working directory and open a (dummy) display.
+ROOT=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy"); os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, ROOT); os.chdir(ROOT)
+
+import pytest
+import main
+from ai import make_agent
+from engine import Engine
+
+# Engine helpers; tests import them with `from conftest import ...`.
+def battle(scenario=None, seed=3, p1="India", p2="Pakistan"):
+    # A seeded AI-vs-AI match with the armies just deployed.
+    e=Engine(scenario); e.new_match(p1, p2, p1_human=False, p2_human=False, seed=seed); e.start_battle()
+    return e
+
+def empty_battle(seed=3):
+    # A battle with no units or AA/radar on either side (facilities don't block moves).
+    e=battle(seed=seed)
+    for side in (e.p1, e.p2): side.set_units([]); side.set_static([])
+    e.rebuild_vision()
+    return e
+
+def played(scenario=None, seed=5, steps=60):
+    # A battle the built-in AI has played for up to `steps` turns.
+    e=battle(scenario, seed)
+    for _ in range(steps):
+        if e.over: break
+        e.ai_step()
+    return e
+
+@pytest.fixture
+def game(tmp_path, monkeypatch):
+    # A Game with the heuristic AI that writes no autosave or replay outside tmp_path.
+    monkeypatch.setattr(main, "SAVE_PATH", str(tmp_path/"autosave.wbs"))
+    monkeypatch.setattr(main, "REPLAY_DIR", None)
+    g=main.Game(); g.ai=make_agent("heuristic")
+    yield g
+    g.cancel_ai(); g.ai_pool.shutdown(wait=True)
@@ -0,0 +1,25 @@
+import time, pytest
+from concurrent.futures import ThreadPoolExecutor
+import savegame
+from ai import make_agent
+from conftest import battle
+
+@pytest.mark.parametrize("kw", [{"budget":None}, {"budget":None, "iterations":0}, {"budget":0}])
+def test_mcts_without_a_cap_is_rejected(kw):
+    with pytest.raises(ValueError): make_agent("mcts", **kw)
+
+def test_mcts_takes_the_agent_defaults():
+    a=make_agent("mcts", budget=None, iterations=8)
+    assert a.budget is None and a.iterations==8 and not a.cancelled
+
+def test_cancelled_search_returns_promptly_and_leaves_the_engine_alone():
+    # As the UI runs it: choose() on a worker thread, cancel() from this one mid-search.
+    e=battle(seed=7); before=(savegame.save(e), e.rng.getstate(), e.ai_rng.getstate(), e.replay_bytes())
+    a=make_agent("mcts", budget=None, iterations=10**9, seed=1)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        job=pool.submit(a.choose, e, e.turn); time.sleep(0.3)
+        assert not job.done()
+        t=time.perf_counter(); a.cancel(); action=job.result(timeout=5)
+    assert time.perf_counter()-t<1 and a.stats["iterations"]>0 and action[0] in ("fire", "move")
+    assert (savegame.save(e), e.rng.getstate(), e.ai_rng.getstate(), e.replay_bytes())==before
+    a.reset(); a.iterations=5; assert a.choose(e, e.turn) and a.stats["iterations"]==5
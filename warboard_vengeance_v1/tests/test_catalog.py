@@ -0,0 +1,20 @@
+import copy, json, pytest
+import catalog
+
+@pytest.fixture(scope="module")
+def raw():
+    with open("data/countries.json", encoding="utf-8") as f: return json.load(f)
+
+def test_air_defense_defaults_like_before(raw):
+    r=copy.deepcopy(raw); name=next(iter(r)); del r[name]["defense"]["air_defense"]
+    c=catalog.compile_catalog(r)
+    assert c["countries"][name]["defense"]["air_defense"]==0.4 and c["tokens"][name][3]==max(1, int(0.4*4))
+    assert "air_defense" not in r[name]["defense"]   # the source is left as it was
+
+def test_required_fields_still_fail(raw):
+    r=copy.deepcopy(raw); name=next(iter(r)); del r[name]["defense"]; r[name]["ground"]["tanks"]=-1
+    with pytest.raises(catalog.CatalogError) as err: catalog.compile_catalog(r)
+    assert sorted(err.value.problems)==[f"{name}.defense: missing", f"{name}.ground.tanks: bad value -1"]
+
+def test_bundled_data_compiles_unchanged(raw):
+    assert catalog.compile_catalog(copy.deepcopy(raw))["countries"]==raw
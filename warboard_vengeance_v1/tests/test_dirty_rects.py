@@ -0,0 +1,63 @@
+import random, pygame, pytest
+import main
+from ui_helpers import click, key, buy
+
+class Window:
+    # What the player sees: starts black and only takes the rects render() hands to
+    # display.update, copied from the back buffer.
+    def __init__(self, g, monkeypatch):
+        self.g=g; self.front=pygame.Surface(g.screen.get_size()); self.rng=random.Random(7); self.count=0
+        monkeypatch.setattr(pygame.display, "update", self.update)
+    def update(self, rects=None):
+        for r in rects or []: self.front.blit(self.g.screen, r, r)
+    def full_redraw(self):
+        g=self.g; back=g.screen; g.screen=ref=back.copy()
+        try: g.draw_scene()
+        finally: g.screen=back
+        return ref
+    def frames(self, n=1):
+        # Each frame, the window must equal the whole scene drawn from scratch, never resynced.
+        for _ in range(n):
+            self.g.render(); self.count+=1
+            assert pygame.image.tobytes(self.front, "RGB")==pygame.image.tobytes(self.full_redraw(), "RGB"), \
+                f"frame {self.count} ({self.g.state}) differs from a full redraw"
+            self.g.advance(self.rng.uniform(0.002, 0.05))
+    def until(self, states, limit=3000):
+        for _ in range(limit):
+            if self.g.state in states: return
+            self.frames()
+        raise AssertionError(f"stuck in {self.g.state}")
+
+@pytest.mark.parametrize("board", ["classic", "theatre"])
+def test_dirty_frames_match_a_full_redraw(game, monkeypatch, board):
+    g=game; w=Window(g, monkeypatch)
+    g.goto(main.STATE_SELECT); w.frames(2)
+    g.dd_p1.selected, g.dd_p2.selected = "United States", "Russia"; g.dd_map.selected=board
+    g.confirm_countries(); w.frames(2)
+    b=g.board; mid=b.mid_x; y0=b.cy+b.rows//2
+    for i,k in enumerate((pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_5, pygame.K_6)):
+        key(g, k); click(g, mid-2-i, y0-2+i); w.frames()
+    click(g, mid-3, y0-1, button=3); w.frames()   # retract
+    g.toggle_market(); w.frames(2); g.toggle_market(); w.frames()
+    g.finish_deploy(); w.frames(2)
+    for turn in range(8):
+        w.until((main.STATE_PLAYER, main.STATE_GAME_OVER))
+        if g.state==main.STATE_GAME_OVER: break
+        g.speed_idx=turn%len(main.GAME_SPEEDS)   # 1x, 2x, 4x, instant
+        if b.scrolls:   # move the camera around, then back to the front line
+            for k in (pygame.K_RIGHT, pygame.K_DOWN, pygame.K_MINUS, pygame.K_EQUALS): key(g, k); w.frames()
+            b.look_at(mid, b.h//2); w.frames()
+        g.deploy_choice=None   # else a click on a free tile places a token instead of moving
+        goals=[(u, t) for u in g.p1.units if main.UNIT_META[u.type]["range"]>0 and b.visible(*u.pos)
+               for t in g.engine.move_field("p1", u.id) if t!=u.pos and t[0]<mid and b.visible(*t)]
+        if turn%2==0:
+            g.selected_missile=g.p1.missiles[0]; click(g, mid-1, y0); w.frames(); click(g, mid+2, y0)
+        elif goals:
+            u,t=goals[0]; click(g, *u.pos); w.frames(); click(g, *t)
+        if g.state==main.STATE_PLAYER: g.play("p1", ("pass",)); g.after_player_action()
+        w.frames(3)
+        if g.state in (main.STATE_ANIM_MISSILE, main.STATE_ANIM_MOVES): buy(g, 1)
+        w.frames(2)
+    w.frames(30)
+    played={a[0] for k,a in g.engine.log if k=="p1"}
+    assert {"place", "retract", "fire", "move"}<=played and w.count>200
@@ -0,0 +1,25 @@
+import random
+import numpy as np
+from engine import disk, disk_in, disk_offsets, disk_sum
+
+def brute(center, r, x0, x1, h):
+    return tuple((x,y) for x in range(x0,x1) for y in range(h) if abs(x-center[0])+abs(y-center[1])<=r)
+
+def test_offsets_are_the_whole_diamond():
+    for r in range(12):
+        offs=disk_offsets(r); assert len(offs)==len(set(offs))==2*r*r+2*r+1
+        assert all(abs(dx)+abs(dy)<=r for dx,dy in offs)
+
+def test_clipped_disks_match_a_scan():
+    # Small radii walk the offsets, huge ones (missile reach) scan the clip box; both clip alike.
+    rnd=random.Random(3)
+    for _ in range(300):
+        w,h=rnd.choice(((28,13), (96,48), (300,150))); x0=rnd.randrange(w); x1=rnd.randrange(x0+1, w+1)
+        c=(rnd.randrange(-5, w+5), rnd.randrange(-5, h+5)); r=rnd.choice((0, 1, 2, 5, 30, 110))
+        assert disk(c, r, x0, x1, h)==brute(c, r, x0, x1, h)==disk_in(c, r, range(x0,x1), h)
+
+def test_disk_sum_matches_a_scan():
+    grid=np.random.default_rng(0).integers(0, 3, (13, 28)).astype(float)
+    for r in (0, 1, 3, 40):
+        want=np.array([[sum(grid[ty,tx] for tx,ty in brute((x,y), r, 0, 28, 13)) for x in range(28)] for y in range(13)])
+        assert np.array_equal(disk_sum(grid, r), want)
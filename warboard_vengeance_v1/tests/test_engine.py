@@ -0,0 +1,65 @@
+import pytest
+from engine import AA_RANGE_BASE
+from conftest import battle, empty_battle
+
+Y=5
+
+def test_legal_move_is_applied():
+    e=empty_battle(); e.add_unit(e.p1, "Tank", (2,Y)); uid=e.p1.units[0].id
+    e.step(("move", uid, [(3,Y), (4,Y)]), "p1")
+    assert e.p1.unit(uid).pos==(4,Y) and e.turn=="p2"
+
+@pytest.mark.parametrize("path", [
+    [(4,Y)],                                    # skips a tile
+    [(3,Y), (3,Y+1), (2,Y+1), (1,Y+1), (1,Y)],  # longer than a Tank's range
+    [(3,Y), (4,Y), (5,Y)],                      # through the Troop on (4, Y)
+    [],
+])
+def test_illegal_move_is_refused_but_ends_the_turn(path):
+    e=empty_battle(); e.add_unit(e.p1, "Tank", (2,Y)); e.add_unit(e.p1, "Troop", (4,Y)); uid=e.p1.units[0].id
+    e.step(("move", uid, path), "p1")
+    assert e.p1.unit(uid).pos==(2,Y) and e.turn=="p2" and e.log[-1][1][0]=="move"
+
+def test_move_stays_on_the_board_and_stops_at_a_known_enemy():
+    e=empty_battle(); x=e.mid_x; e.add_unit(e.p1, "Jet", (x-2,Y)); uid=e.p1.units[0].id
+    e.add_unit(e.p1, "Troop", (1,0)); assert not e.legal_path("p1", e.p1.units[1].id, [(0,0), (-1,0)])
+    e.add_unit(e.p2, "Troop", (x,Y)); e.revealed_p1.add((x,Y))
+    assert e.legal_path("p1", uid, [(x-1,Y), (x,Y)])
+    assert not e.legal_path("p1", uid, [(x-1,Y), (x,Y), (x+1,Y)])
+
+def test_cached_shot_scores_match_a_fresh_computation():
+    e=battle(seed=4, p1="United States", p2="Russia")
+    for _ in range(80):
+        if e.over: break
+        key=e.turn; c=e.copy(); c.shot_cache={}; c.ai_rng.setstate(e.ai_rng.getstate())
+        assert e.ai_shots(key, 6)==c.ai_shots(key, 6)
+        e.ai_step()
+
+@pytest.mark.parametrize("mi", [99, -1])
+def test_missing_missile_is_a_refused_shot(mi):
+    e=empty_battle()
+    e.step(("fire", mi, (2,Y), (e.mid_x+1,Y)), "p1")
+    assert e.turn=="p2" and e.p2.damage==0 and e.log[-1]==("p1", ("pass",))
+
+@pytest.mark.parametrize("item", [999, -1])
+def test_missing_market_item_buys_nothing(item):
+    e=empty_battle(); money=e.p1.money; n=len(e.log)
+    e.step(("buy", item), "p1")
+    assert e.turn=="p1" and e.p1.money==money and len(e.log)==n
+
+def test_jets_route_around_known_aa_cover():
+    # A Jet at (8,Y) with an AA at (15,Y) under a radar that sees the whole board: AA covers
+    # (11..13,Y), so the straight lane is risky while six-step routes via row Y±2 are not.
+    aa=(15,Y); covered=lambda t: abs(t[0]-aa[0])+abs(t[1]-aa[1])<=AA_RANGE_BASE
+    def jet(with_aa):
+        e=empty_battle(); e.add_unit(e.p1, "Jet", (8,Y)); e.p2.radar_range_bonus=30
+        e.add_static(e.p2, "Radar", (20,Y)); e.revealed_p1.add((20,Y))
+        if with_aa: e.add_static(e.p2, "AA", aa); e.revealed_p1.add(aa)
+        return e, e.p1.units[0].id
+    e,uid=jet(False); assert any(map(covered, e.move_path("p1", uid, (12,Y+2))))   # breadth-first goes straight
+    e,uid=jet(True); field=e.move_field("p1", uid)
+    cost,path=field[(12,Y+2)]; assert cost==len(path)==6 and not any(map(covered, path))
+    assert e.move_path("p1", uid, (12,Y+2))==list(path)
+    cost,path=field[(12,Y)]; assert cost>len(path)   # only reachable through cover
+    path=e.advance_path("p1", uid)
+    assert path[-1] in ((12,Y+2), (12,Y-2)) and len(path)==6 and not any(map(covered, path))
@@ -0,0 +1,37 @@
+import numpy as np
+from env import WarboardEnv, N_ACTIONS, ACTION_PASS
+
+def test_mask_matches_decode():
+    env=WarboardEnv(countries=["United States", "Russia", "India", "Pakistan"]); seen=set()
+    for seed in range(3):
+        env.reset(seed=seed)
+        for _ in range(15):
+            mask=env.action_mask(); ok=np.array([env.decode(a) is not None for a in range(N_ACTIONS)])
+            ok[ACTION_PASS]=True
+            assert (mask==ok).all(), f"mask and decode disagree on {np.flatnonzero(mask!=ok)[:5]}"
+            seen|={env.decode(a)[0] for a in np.flatnonzero(mask) if a!=ACTION_PASS}
+            _,_,terminated,truncated,_=env.step(env.sample_action())
+            if terminated or truncated: break
+    assert seen=={"fire", "move", "place"}
+
+def test_incremental_obs_matches_a_full_rebuild():
+    env=WarboardEnv(countries=["United States", "Russia", "India", "Pakistan"])
+    for seed in range(3):
+        env.reset(seed=seed)
+        for _ in range(40):
+            _,_,terminated,truncated,_=env.step(env.sample_action())
+            fresh=WarboardEnv(side=env.key); fresh.engine=env.engine; fresh.write_obs()
+            assert (env.board==fresh.board).all() and (env.scalars==fresh.scalars).all()
+            if terminated or truncated: break
+
+def test_unrecorded_engine_plays_the_same_match():
+    runs=[]
+    for record in (True, False):
+        env=WarboardEnv(record=record); env.reset(seed=5); rng=np.random.default_rng(0)
+        for _ in range(60):
+            _,_,terminated,truncated,_=env.step(int(rng.choice(np.flatnonzero(env.action_mask()))))
+            if terminated or truncated: break
+        e=env.engine
+        runs.append((e.round, e.turn, e.phase, [(s.damage, s.money, [(u.id, u.pos) for u in s.units]) for s in (e.p1, e.p2)],
+                     env.board.copy().tobytes(), len(e.log.buf)>0))
+    assert runs[0][:-1]==runs[1][:-1] and runs[0][-1] and not runs[1][-1]
@@ -0,0 +1,25 @@
+import pygame
+from main import ExplosionPool
+
+def test_pool_reuses_its_slots():
+    pool=ExplosionPool(4); slots=list(pool.slots)
+    for life in (3, 1, 5): pool.spawn((10, 10), life)
+    pool.tick(); assert sorted(ex.life for ex in pool.slots[:len(pool)])==[2, 4]
+    for life in (6, 7, 8): pool.spawn((20, 20), life)   # full: recycles the one nearest its end
+    assert len(pool)==4 and sorted(ex.life for ex in pool.slots[:4])==[4, 6, 7, 8]
+    for _ in range(8): pool.tick()
+    assert len(pool)==0 and sorted(map(id, pool.slots))==sorted(map(id, slots))
+    pool.spawn((0, 0), 2); assert len(pool)==1 and pool.slots[0].life==2
+
+def test_drawing_stays_inside_the_reported_rects(game):
+    # render() only updates these rects, so a pixel drawn outside them would never reach the window.
+    g=game; b=g.board; pool=ExplosionPool(); drawn=0
+    for i in range(6): pool.spawn(g.pixel_center(2+3*i, 1+i), 24)
+    while len(pool):
+        for alpha in (0.0, 0.5):
+            g.screen.fill((0,0,0)); pool.draw(g.screen, b, alpha)
+            mask=pygame.mask.from_threshold(g.screen, (0,0,0), (1,1,1,255)); mask.invert(); drawn+=mask.count()
+            for r in pool.rects(b, alpha): mask.erase(pygame.mask.Mask(r.size, fill=True), r.topleft)
+            assert mask.count()==0
+        pool.tick()
+    assert drawn
@@ -0,0 +1,18 @@
+import random, pytest
+from engine import FLIGHT_TILE_PX, flight_point, flight_steps, flight_tiles
+
+def sampled(launch, target):
+    # The reference: step through every sample and note each new tile it lands in.
+    steps=flight_steps(launch, target); out=[]
+    for i in range(1, steps+1):
+        x,y=flight_point(launch, target, i, steps); t=(x//FLIGHT_TILE_PX, y//FLIGHT_TILE_PX)
+        if not out or out[-1][1]!=t: out.append((i, t))
+    return steps, tuple(out)
+
+@pytest.mark.parametrize("w,h", [(20, 12), (240, 160)])
+def test_flight_tiles_match_sampled_flights(w, h):
+    rng=random.Random(w)
+    pairs=[((rng.randrange(w), rng.randrange(h)), (rng.randrange(w), rng.randrange(h))) for _ in range(1500)]
+    pairs+=[((3,3), (3,3)), ((0,0), (w-1,h-1)), ((w-1,0), (0,h-1)), ((5,2), (5,h-1)), ((w-1,4), (0,4))]
+    for launch,target in pairs:
+        assert flight_tiles(launch, target)==sampled(launch, target), (launch, target)
@@ -0,0 +1,36 @@
+import pytest
+from conftest import battle
+
+def scan(side):
+    # What the indexes stand for, by linear scans as before they existed (first on a tile wins).
+    first=lambda items: {p: next(x for x in items if x.pos==p) for p in dict.fromkeys(x.pos for x in items)}
+    return ({u.id:u for u in side.units}, first(side.units), first(side.static),
+            [s.pos for s in side.static if s.type=="AA"], [s.pos for s in side.static if s.type=="Radar"])
+
+def indexes(side): return (side.unit_by_id, side.unit_index, side.static_index, side.aa_sites, side.radar_sites)
+
+@pytest.mark.parametrize("scenario", [None, "front"])
+def test_indexes_follow_a_played_match(scenario):
+    e=battle(scenario, seed=9); seen_versions=set()
+    for _ in range(120):
+        if e.over: break
+        e.ai_step()
+        for side in (e.p1, e.p2):
+            assert indexes(side)==scan(side)
+            for pos in list(side.unit_index)[:5]+list(side.static_index)[:5]:
+                u=side.unit_index.get(pos); s=side.static_index.get(pos)
+                assert side.mobile_at(*pos)==((u.id, u.type) if u else (None, None))
+                assert side.static_at(*pos)==((s.id, s.type) if s else (None, None)) and side.has_static_at(*pos)==bool(s)
+            seen_versions.add((side.key, side.version))
+        # Memoised interceptors match a fresh search.
+        for key in ("p1", "p2"):
+            deff=e.side(key); memo=dict(deff.intercepts); deff.intercepts.clear()
+            assert all(e.find_interceptor(deff, *t)==hit for t,hit in memo.items()); deff.intercepts.update(memo)
+    assert len(seen_versions)>4   # the match did move and lose pieces
+
+def test_copies_index_on_their_own():
+    e=battle(seed=2); c=e.copy(); u=c.p1.units[0]; free=next((x,0) for x in c.own_cols("p1") if (x,0) not in c.p1.unit_index)
+    before=indexes(e.p1); version=e.p1.version
+    c.p1.move_unit(u.id, free); c.p1.remove_static(c.p1.static[0].id); c.p1.add_unit("Tank", (0,1))
+    assert indexes(e.p1)==before==scan(e.p1) and e.p1.version==version
+    assert indexes(c.p1)==scan(c.p1) and c.p1.unit_index[free].id==u.id and c.p1.version>version
@@ -0,0 +1,29 @@
+import pytest
+import main
+from ui_helpers import frames
+
+def battle_screen(g, board="classic"):
+    g.goto(main.STATE_SELECT); frames(g, 2)
+    g.dd_p1.selected, g.dd_p2.selected = "United States", "Russia"; g.dd_map.selected=board
+    g.confirm_countries(); g.finish_deploy(); g.state=main.STATE_PLAYER
+
+def test_reveal_layer_repaints_only_on_change(game, monkeypatch):
+    g=game; battle_screen(g, "theatre"); b=g.board; paints=[]
+    visible_of=b.visible_of; monkeypatch.setattr(b, "visible_of", lambda tiles: paints.append(1) or visible_of(tiles))
+    def painted():
+        del paints[:]; layer=b.reveal; g.draw_reveal_overlay(); return len(paints), b.reveal is layer
+    g.draw_reveal_overlay(); assert painted()==(0, True)
+    t=next((x, b.cy) for x in range(b.cx+b.cols-1, b.cx, -1) if (x, b.cy) not in g.reveal_tiles())
+    g.revealed_p1.add(t); assert painted()==(1, True)   # a newly seen tile
+    px=((t[0]-b.cx)*b.tile+1, (t[1]-b.cy)*b.tile+1); assert b.reveal.get_at(px).a==38
+    assert painted()==(0, True)
+    b.pan(0, 1); assert painted()==(1, True)   # the camera moved
+    b.zoom(-1); assert painted()==(1, False)   # a new view size needs a new layer
+
+@pytest.mark.parametrize("overlay", ["market", "help"])
+def test_modal_backdrops_are_built_once(game, overlay):
+    g=game; battle_screen(g)
+    draw=g.draw_market_overlay if overlay=="market" else g.draw_help_overlay
+    draw(); built=dict(g.backdrops)
+    for _ in range(3): draw()
+    assert len(built)==1 and g.backdrops==built and all(g.backdrops[a] is s for a,s in built.items())
@@ -0,0 +1,36 @@
+import random
+from engine import Missile, RadarCoverage
+from conftest import battle
+
+def rebuilt(cov):
+    fresh=RadarCoverage(cov.cols, cov.h)
+    for pos,r in cov.radars.items(): fresh.add(pos, r)
+    return fresh
+
+def test_incremental_counts_match_a_rebuild():
+    rng=random.Random(5); cov=RadarCoverage(range(10, 20), 12)
+    for _ in range(400):
+        op=rng.random()
+        pos=(rng.randrange(0, 20), rng.randrange(12))
+        if op<0.5 and pos not in cov.radars: cov.add(pos, rng.randrange(0, 5))   # one static a tile
+        elif op<0.9 and cov.radars: cov.remove(rng.choice(sorted(cov.radars)))
+        else: cov.set_range(rng.randrange(0, 5))
+        fresh=rebuilt(cov)
+        assert cov.count==fresh.count and cov.tiles==fresh.tiles==set(fresh.count)
+
+def test_engine_coverage_matches_a_rebuild():
+    # Radars placed, retracted and bombed and radar range bought, checked against rebuild_vision().
+    rng=random.Random(9)
+    e=battle(seed=2, p1="United States", p2="Russia")
+    for _ in range(300):
+        key=rng.choice(("p1", "p2")); side=e.side(key); op=rng.random()
+        pos=(rng.choice(e.own_cols(key)), rng.randrange(e.h))
+        if op<0.4:
+            if side.mobile_at(*pos)[0] is None and not side.has_static_at(*pos): e.add_static(side, "Radar", pos)
+        elif op<0.6 and side.radar_sites: e.retract(key, rng.choice(sorted(side.radar_sites)))
+        elif op<0.7: e.buy(key, {"name":"Radar", "price":0, "grant":"Radar"})
+        elif side.radar_sites: e.resolve_missile(e.enemy(key), side, rng.choice(sorted(side.radar_sites)), Missile("M", 500, radius_tiles=1))
+        c=e.copy(); c.rebuild_vision()
+        for k in ("p1", "p2"):
+            assert e.coverage[k].radars==c.coverage[k].radars and e.coverage[k].count==c.coverage[k].count
+            assert e.radar_cover(k)==c.radar_cover(k)
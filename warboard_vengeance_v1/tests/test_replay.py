@@ -0,0 +1,70 @@
+import random, pytest
+import savegame
+from engine import ActionLog, LOG_OP, replay
+from conftest import played
+
+@pytest.mark.parametrize("scenario", [None, "theatre"])
+def test_seeded_self_play_is_deterministic(scenario):
+    assert played(scenario).replay_bytes()==played(scenario).replay_bytes()!=played(scenario, seed=6).replay_bytes()
+
+@pytest.mark.parametrize("scenario", [None, "theatre"])
+def test_replay_rebuilds_the_match(scenario):
+    # Replay makes no AI calls, so only the AI's dice are taken from the live match.
+    e=played(scenario); r=replay(e.replay_bytes()); r.ai_rng.setstate(e.ai_rng.getstate())
+    assert savegame.save(r)==savegame.save(e)
+    for _ in range(40):
+        if e.over: break
+        e.ai_step(); r.ai_step()
+    assert savegame.save(r)==savegame.save(e) and r.replay_bytes()==e.replay_bytes()
+
+def narrowed(e):
+    # e's replay in the version 2 layout: 8-bit missile indexes, 16-bit unit ids.
+    out=bytearray(e.replay_bytes()[:-len(bytes(e.log))]); out[3]=2
+    for i in range(len(e.log)):
+        r=e.log.record_bytes(i); op=r[0]>>1
+        out+=r[:1]+r[2:] if op==LOG_OP["fire"] else r[:1]+r[3:] if op==LOG_OP["move"] else r
+    return bytes(out)
+
+@pytest.mark.parametrize("scenario", [None, "theatre"])
+def test_version_2_replays_still_load(scenario):
+    e=played(scenario); assert {a[0] for _,a in e.log}>={"fire", "move"}
+    assert replay(narrowed(e)).replay_bytes()==e.replay_bytes()
+
+def test_wide_unit_ids_are_logged():
+    e=played(steps=0); e.p1.next_id=70000; e.add_unit(e.p1, "Tank", (2,5)); e.turn="p1"
+    path=[(3,5)]; e.step(("move", 70000, path), "p1")
+    assert e.p1.unit(70000).pos==(3,5) and e.log[-1]==("p1", ("move", 70000, path))
+    assert replay(e.replay_bytes()).log[-1]==e.log[-1]
+
+BAD_ACTIONS=[("place", "Foo", (1,1)), ("place", "Tank", (-1,0)), ("retract", (1,)), ("buy", -1), ("buy", 999),
+             ("fire", 99, (1,1), (20,1)), ("fire", 0, (1,1), (300,1)), ("move", 70000, [(1,1)]),
+             ("move", 2**40, [(1,1)]), ("move", 1, [(1,1,1)]), ("move", 1, [(1,1)]*300), ("bogus",),
+             ("intercept", True, (1,1))]
+
+@pytest.mark.parametrize("action", BAD_ACTIONS)
+def test_bad_actions_leave_a_replayable_log(action):
+    e=played(steps=4); n=len(e.log)
+    e.step(action, "p1"); e.step(action, e.turn)
+    assert len(ActionLog(bytes(e.log)))==len(e.log)>=n
+    for _ in range(6): e.ai_step()
+    assert replay(e.replay_bytes()).replay_bytes()==e.replay_bytes()
+
+def test_record_the_rules_do_not_log_is_a_divergence():
+    # A "start" in the battle phase changes nothing and logs nothing; replay must not spin on it.
+    data=played().replay_bytes()+bytes((LOG_OP["start"]<<1,))
+    with pytest.raises(ValueError, match="replayed nothing"): replay(data)
+
+@pytest.mark.parametrize("data", [bytes((len(LOG_OP)<<1,)), bytes((LOG_OP["place"]<<1, 200, 1, 1)),
+                                  bytes((LOG_OP["move"]<<1, 0)), bytes((LOG_OP["fire"]<<1, 0, 1))])
+def test_action_log_rejects_bad_records(data):
+    with pytest.raises(ValueError): ActionLog(data)
+
+@pytest.mark.parametrize("scenario", [None, "theatre"])
+def test_corrupt_replays_raise_value_error(scenario):
+    data=played(scenario).replay_bytes(); rnd=random.Random(0)
+    for _ in range(300):
+        bad=bytearray(data)
+        for _ in range(rnd.randrange(1, 3)): bad[rnd.randrange(len(bad))]=rnd.randrange(256)
+        if rnd.random()<0.2: bad=bad[:rnd.randrange(len(bad))]
+        try: replay(bytes(bad))
+        except ValueError: pass
@@ -0,0 +1,44 @@
+import random, pytest
+import savegame
+from conftest import battle
+
+def test_tile_bits_match_the_bitset_layout():
+    # Bit y*w+x of the little-endian bitset is tile (x, y).
+    rnd=random.Random(0)
+    for w,h in ((28,13), (300,150), (7,3)):
+        tiles={(rnd.randrange(w), rnd.randrange(h)) for _ in range(rnd.randrange(1, w*h))}
+        expected=sum(1<<(y*w+x) for x,y in tiles).to_bytes(savegame.tile_bytes(w, h), "little")
+        assert savegame.tile_bits(tiles, w, h)==expected
+        assert savegame.bit_tiles(expected, w, h)==tiles
+    assert savegame.bit_tiles(savegame.tile_bits(set(), 28, 13), 28, 13)==set()
+
+@pytest.mark.parametrize("scenario", [None, "theatre"])
+def test_loaded_match_plays_on_identically(scenario):
+    e=battle(scenario)
+    for _ in range(30): e.ai_step()
+    data=savegame.save(e); back=savegame.load(data)
+    assert savegame.save(back)==data
+    for _ in range(40):
+        if e.over: break
+        e.ai_step(); back.ai_step()
+    assert savegame.save(back)==savegame.save(e) and bytes(back.log)==bytes(e.log)
+
+def test_wide_side_fields_round_trip():
+    e=battle(); e.p1.next_id=70000; e.p1.aa_range_bonus=300
+    data=savegame.save(e); back=savegame.load(data)
+    assert (back.p1.next_id, back.p1.aa_range_bonus)==(70000, 300) and savegame.save(back)==data
+
+def test_save_rejects_values_that_do_not_fit():
+    e=battle(); e.p1.money=2**40
+    with pytest.raises(ValueError): savegame.save(e)
+
+def test_corrupt_files_raise_value_error():
+    data=savegame.save(battle()); rnd=random.Random(1)
+    phase=savegame.HEAD.size-savegame.struct.calcsize("<BHBQ")-1   # the phase byte in the header
+    with pytest.raises(ValueError, match="phase"): savegame.load(data[:phase]+b"\x09"+data[phase+1:])
+    for _ in range(500):
+        bad=bytearray(data)
+        for _ in range(rnd.randrange(1, 4)): bad[rnd.randrange(len(bad))]=rnd.randrange(256)
+        if rnd.random()<0.2: bad=bad[:rnd.randrange(len(bad))]
+        try: savegame.load(bytes(bad))
+        except ValueError: pass
@@ -0,0 +1,51 @@
+import json, pytest
+import engine, main
+from engine import Missile, load_scenario, scenarios
+from conftest import battle
+
+def test_scenario_files_load():
+    assert scenarios()[0]=="classic" and {"front", "theatre"}<=set(scenarios())
+    s=load_scenario("theatre"); assert (s.w, s.h, s.km_per_tile)==(300, 150, 10) and s.wide
+    e=battle("theatre"); assert (e.w, e.h, e.mid_x)==(300, 150, 150) and e.log.wide
+    # Every piece stays on its own half of the big board, and ranges are in its tiles.
+    for key,side in (("p1", e.p1), ("p2", e.p2)):
+        cols=e.own_cols(key)
+        assert all(p.pos[0] in cols and 0<=p.pos[1]<e.h for p in side.units+side.static+side.facilities)
+        assert all(m.range_tiles==max(1, int(m.range_km/10)) for m in side.missiles)
+    assert Missile("x", 300, km_per_tile=10).range_tiles==30
+
+@pytest.mark.parametrize("raw", [{"width":4, "height":20, "km_per_tile":10}, {"width":64, "height":20}, [64, 20, 10], "not json"])
+def test_bad_scenario_files_are_refused(raw, tmp_path, monkeypatch):
+    monkeypatch.setattr(engine, "SCENARIO_DIR", str(tmp_path)); load_scenario.cache_clear()
+    (tmp_path/"bad.json").write_text(raw if isinstance(raw, str) else json.dumps(raw))
+    try:
+        assert scenarios()==["classic", "bad"]
+        with pytest.raises(ValueError, match="bad.json"): load_scenario("bad")
+    finally: load_scenario.cache_clear()
+
+def test_missing_map_keeps_the_player_on_the_country_screen(game):
+    g=game; g.goto(main.STATE_SELECT)
+    g.dd_p1.selected, g.dd_p2.selected = "India", "Pakistan"; g.dd_map.selected="nowhere"
+    g.confirm_countries(); assert g.state==main.STATE_SELECT and g.info=="Could not load that map."
+    g.dd_map.selected="front"; g.confirm_countries()
+    assert g.state==main.STATE_DEPLOY and (g.engine.w, g.engine.h)==(g.board.w, g.board.h)==(96, 48)
+
+def test_camera_over_a_theatre_board():
+    b=main.Board(300, 150); assert b.scrolls and b.tile==main.TILE
+    assert (b.cols, b.rows)==(28, 13) and b.visible(150, 75) and not b.visible(0, 0)   # opens on the midline
+    b.look_at(0, 0); assert (b.cx, b.cy)==(0, 0)
+    b.look_at(10**6, 10**6); assert (b.cx+b.cols, b.cy+b.rows)==(300, 150)   # clamped to the board
+    b.look_at(150, 75); centre=(b.cx+b.cols//2, b.cy+b.rows//2)
+    b.zoom(-1); assert b.tile<main.TILE and b.cols>28 and (b.cx+b.cols//2, b.cy+b.rows//2)==centre
+    for _ in range(10): b.zoom(-1)
+    assert b.tile==min(b.zooms); b.zoom(1); assert b.tile>min(b.zooms)
+    cx=b.cx; b.pan(1, 0); assert b.cx==cx+max(1, b.cols//4)
+    for gx,gy in ((b.cx, b.cy), (b.cx+b.cols-1, b.cy+b.rows-1)):
+        x,y=b.pixel_of_grid(gx, gy); assert b.grid_at_pixel((x+1, y+1))==(gx, gy)
+    assert b.grid_at_pixel(b.pixel_of_grid(b.cx+b.cols, b.cy)) is None   # just off the view
+    c=(b.cx+1, b.cy+2); near={(x,y) for x in range(300) for y in range(150) if abs(x-c[0])+abs(y-c[1])<=5}
+    assert set(b.tiles_within(c, 5))==set(b.visible_of(near)) and len(b.visible_of(near))<len(near)
+
+def test_classic_board_is_shown_whole():
+    b=main.Board(); assert not b.scrolls and b.view==(0, 0, 28, 13) and b.zooms==[main.TILE]
+    b.pan(1, 1); b.zoom(-1); assert b.view==(0, 0, 28, 13)
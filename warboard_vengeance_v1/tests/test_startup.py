@@ -0,0 +1,20 @@
+import os, subprocess, sys
+import pygame
+import main
+
+def test_import_does_no_pygame_font_or_data_work():
+    # A fresh interpreter: importing the UI leaves pygame down, fonts closed and the data unread.
+    code=("import pygame, engine, main\n"
+          "assert not pygame.display.get_init() and not pygame.font.get_init()\n"
+          "assert all(f.font is None for f in (main.FONT_XL, main.FONT_L, main.FONT, main.FONT_S, main.FONT_XS))\n"
+          "assert engine.load_catalog.cache_info().currsize==0\n"
+          "assert [label for label,_ in main.STARTUP.marks]==['imports']\n")
+    env=dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    run=subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, timeout=60)
+    assert run.returncode==0, run.stderr
+
+def test_game_brings_up_only_display_and_fonts(game):
+    assert pygame.display.get_init() and pygame.font.get_init()
+    assert not pygame.mixer.get_init() and not pygame.joystick.get_init()
+    game.render(); report=main.STARTUP.report().splitlines()
+    assert report[0]=="startup:" and any("pygame init" in l for l in report) and any("window" in l for l in report)
@@ -0,0 +1,22 @@
+import pytest
+import main
+from ui_helpers import frames
+
+def test_lru_eviction_and_counters():
+    c=main.TextCache(capacity=2); f=main.FONT_S
+    a=c.render(f, "a", (255,255,255)); c.render(f, "b", (255,255,255))
+    assert c.render(f, "a", (255,255,255)) is a   # a hit, and now the most recent
+    c.render(f, "c", (255,255,255))               # evicts b, the least recent
+    assert list(c.surfs)==[(f, "a", (255,255,255)), (f, "c", (255,255,255))]
+    assert c.render(f, "a", (0,0,0)) is not a      # colour is part of the key
+    assert c.stats()=={"size":2, "capacity":2, "hits":1, "misses":4, "hit_rate":0.2}
+    c.clear(); assert c.stats()["size"]==c.hits==c.misses==0
+
+@pytest.mark.parametrize("market", [False, True])
+def test_a_repeated_frame_rasterises_no_text(game, monkeypatch, market):
+    g=game; g.goto(main.STATE_SELECT); frames(g, 2)
+    g.dd_p1.selected, g.dd_p2.selected = "United States", "Russia"; g.confirm_countries(); g.finish_deploy()
+    g.market_open=market; g.draw_scene(); hits=main.TEXT_CACHE.hits
+    def rasterise(*a): raise AssertionError("text rendered outside the cache")
+    monkeypatch.setattr(main.LazyFont, "render", rasterise)   # every UI font is a LazyFont
+    g.draw_scene(); assert main.TEXT_CACHE.hits>hits
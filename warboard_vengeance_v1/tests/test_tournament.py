@@ -0,0 +1,21 @@
+import json
+import tournament
+
+def test_two_game_tournament(tmp_path, capsys):
+    out=tmp_path/"tournament_results.jsonl"
+    tournament.main(["--countries", "India,Pakistan", "--games", "2", "--workers", "1", "--max-rounds", "20", "--out", str(out)])
+    results=[json.loads(line) for line in out.read_text().splitlines()]
+    assert len(results)==2 and all(r["ai"]==["heuristic", "heuristic"] for r in results)
+    # One pair, seats swapped on the second game, consecutive seeds.
+    assert sorted((r["seed"], r["p1"], r["p2"]) for r in results)==[(0, "India", "Pakistan"), (1, "Pakistan", "India")]
+    for r in results:
+        assert r["winner"] in (r["p1"], r["p2"], None) and 1<=r["rounds"]<=20 and len(r["damage"])==r["rounds"]
+        assert all(a[0]<=b[0] and a[1]<=b[1] for a,b in zip(r["damage"], r["damage"][1:]))   # damage only grows
+    report=capsys.readouterr().out
+    assert report.startswith(tournament.summarize(sorted(results, key=lambda r: r["seed"]))+f"\n\nResults: {out}")
+    wins={c: sum(r["winner"]==c for r in results) for c in ("India", "Pakistan")}
+    assert "2 matches, 2 countries, 1 pairs" in report and f"India vs Pakistan: {wins['India']}-{wins['Pakistan']} of 2" in report
+    # Same seed, same matches.
+    again=tmp_path/"again.jsonl"
+    tournament.main(["--countries", "India,Pakistan", "--games", "2", "--workers", "1", "--max-rounds", "20", "--out", str(again)])
+    assert sorted(map(json.loads, again.read_text().splitlines()), key=lambda r: r["seed"])==sorted(results, key=lambda r: r["seed"])
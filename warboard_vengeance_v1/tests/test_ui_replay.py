@@ -0,0 +1,70 @@
+import pygame, pytest
+import main
+from engine import replay
+from ui_helpers import frames, click, key, buy, wait_for
+
+def deploy(g):
+    g.goto(main.STATE_SELECT); frames(g, 2)
+    g.dd_p1.selected, g.dd_p2.selected = "United States", "Russia"
+    g.confirm_countries(); frames(g, 2)
+    for k,tile in ((pygame.K_1,(3,3)),(pygame.K_3,(5,6)),(pygame.K_5,(6,6)),(pygame.K_6,(8,6))): key(g, k); click(g, *tile)
+    click(g, 3, 3, button=3)    # retract
+
+def test_ui_match_replays_as_played(game):
+    g=game; deploy(g)
+    buy(g, 0); g.finish_deploy(); frames(g)
+    mid=0
+    for turn in range(12):
+        wait_for(g, (main.STATE_PLAYER, main.STATE_GAME_OVER))
+        if g.state==main.STATE_GAME_OVER: break
+        jets=[u for u in g.p1.units if u.type=="Jet"]
+        if turn%2==0:
+            g.selected_missile=g.p1.missiles[0]; click(g, 12, 6); click(g, 20, 6)
+        elif jets:
+            click(g, *jets[0].pos); x,y=jets[0].pos; click(g, min(x+3, g.board.mid_x-1), y)
+        else:
+            key(g, pygame.K_2); click(g, 1, turn%13)
+        if g.state in (main.STATE_ANIM_MISSILE, main.STATE_ANIM_MOVES):
+            buy(g, 5); buy(g, 1); mid+=1   # mid-animation: applied once the action resolves
+        frames(g, 3)
+        buy(g, 3)   # during the AI's turn or on our own: applied at once
+    assert mid
+    r=replay(g.engine.replay_bytes())
+    state=lambda e: [(s.money, s.damage, len(s.missiles), [tuple(u) for u in s.units], [tuple(x) for x in s.static])
+                     for s in (e.p1, e.p2)]
+    assert state(r)==state(g.engine) and r.round==g.engine.round
+    assert any(a[0]=="buy" for _,a in g.engine.log)
+
+@pytest.mark.parametrize("speed", range(len(main.GAME_SPEEDS)))
+def test_message_timers_keep_real_time_at_every_speed(game, speed):
+    # 10.5 ticks of wall-clock time, in uneven frames: the timers lose 10 ticks at every speed,
+    # play runs 10.5 ticks per 1x of speed, and instant speed finishes the animation at once.
+    g=game; deploy(g); g.finish_deploy(); wait_for(g, (main.STATE_PLAYER,))
+    g.speed_idx=speed; g.selected_missile=g.p1.missiles[0]; click(g, 12, 6); click(g, 20, 6)
+    assert g.state==main.STATE_ANIM_MISSILE
+    ticks=[]; play=g.update_play; g.update_play=lambda: (ticks.append(g.state), play())
+    g.radar_flash_timer=100   # (info messages end with the state)
+    for dt in (0.5, 3, 0.25, 4, 2.75): g.advance(dt*main.TICK_S)
+    assert g.radar_flash_timer==90
+    if main.GAME_SPEEDS[speed]: assert len(ticks)==int(10.5*main.GAME_SPEEDS[speed])
+    else: assert main.STATE_ANIM_MISSILE in ticks and g.state!=main.STATE_ANIM_MISSILE
+
+class Scripted:
+    # An agent that plays whatever `pick(engine)` returns.
+    def __init__(self, pick): self.pick=pick
+    def choose(self, e, key): return self.pick(e)
+    def cancel(self): pass
+
+@pytest.mark.parametrize("pick", [
+    lambda e: ("fire", 0, (e.w-1, 0), (e.w-2, 0)),                      # at its own half
+    lambda e: ("fire", 40, (e.w-1, 0), (e.w//2-1, 0)),                  # no such missile
+    lambda e: ("move", 9999, [(e.w-2, 0)]),                             # no such unit
+    lambda e: ("move", e.p2.units[0].id, [(e.p2.units[0].pos[0]-2, e.p2.units[0].pos[1])]),   # skips a tile
+    lambda e: ("buy", 0),
+])
+def test_refused_ai_actions_pass_like_the_engine(game, pick):
+    g=game; deploy(g); g.finish_deploy(); wait_for(g, (main.STATE_PLAYER,))
+    g.ai=Scripted(pick); money=g.p2.money
+    g.play("p1", ("pass",)); g.after_player_action(); wait_for(g, (main.STATE_PLAYER,))
+    assert g.engine.log[-1]==("p2", ("pass",)) and g.p2.money==money and g.engine.turn=="p1"
+    assert replay(g.engine.replay_bytes()).replay_bytes()==g.engine.replay_bytes()
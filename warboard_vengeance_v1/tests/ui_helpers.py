@@ -0,0 +1,23 @@
+# Drive a main.Game the way a player would: clicks, keys and frames.
+import pygame
+
+def frames(g, n=1):
+    for _ in range(n): g.render(); g.advance(1/60)
+
+def click(g, gx, gy, button=1):
+    x,y=g.board.pixel_of_grid(gx, gy)
+    g.player_click(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=(x+5,y+5), button=button))
+
+def key(g, k): g.player_click(pygame.event.Event(pygame.KEYDOWN, key=k))
+
+def buy(g, i):
+    # Click market item i through the overlay, as a player would.
+    g.market_open=True; g.draw_scene()
+    g.player_click(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=g.market_clickzones[i][0].center, button=1))
+    g.market_open=False
+
+def wait_for(g, states, limit=2000):
+    for _ in range(limit):
+        if g.state in states: return
+        frames(g)
+    raise AssertionError(f"stuck in {g.state}")
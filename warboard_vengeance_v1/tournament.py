@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# WarBoard: Vengeance (v1) — AI-vs-AI balance tournament
+#
+# Notes:
+# - Plays N seeded matches for every pair of countries in data/countries.json on all cores.
+# - Seats alternate within a pair (even games: first country is p1), so side bias cancels out.
+# - Each finished match is appended to --out as one JSON line; the summary is printed at the end.
+# - Same seed + same country list => same results, whatever the worker count (for searching
+#   AIs like mcts only up to their time budget; give --iterations to pin them down).
+# - --replays DIR saves every match as DIR/<seed>.wbr; replay.py re-runs them without the AIs.
+#
+#   python tournament.py --games 20 --out results.jsonl
+#   python tournament.py --countries "India,Pakistan,China" --games 200 --workers 4
+#   python tournament.py --ai-p1 mcts --ai-p2 heuristic --budget 0.1 --games 4
+#   python tournament.py --countries "India,Pakistan" --games 50 --replays replays/
+
+import os, sys, json, argparse, itertools, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from engine import Engine, countries
+from ai import AGENTS, make_agent
+
+def make_player(name, seed, opts):
+    # Searching AIs take the budget options and a per-match seed; the heuristic needs neither.
+    return make_agent(name, seed=seed, **opts) if name=="mcts" else make_agent(name)
+
+def play_match(job):
+    a, b, seed, max_rounds, ais, opts, replays = job
+    e=Engine(); e.new_match(a, b, p1_human=False, p2_human=False, seed=seed); e.start_battle()
+    agents={"p1":make_player(ais[0], seed, opts), "p2":make_player(ais[1], seed+1, opts)}
+    curve=[]
+    while not e.over and e.round<=max_rounds:
+        key=e.turn; e.step(agents[key].choose(e, key))
+        if key=="p2" or e.over: curve.append([e.p1.damage, e.p2.damage])
+    winner = e.side(e.winner).name if e.winner else None
+    if replays:
+        with open(os.path.join(replays, f"{seed}.wbr"), "wb") as f: f.write(e.replay_bytes())
+    return {"p1":a, "p2":b, "ai":list(ais), "seed":seed, "winner":winner, "rounds":len(curve), "damage":curve}
+
+def make_jobs(names, games, seed, max_rounds, ais=("heuristic","heuristic"), opts=None, replays=None):
+    jobs=[]
+    for i,(a,b) in enumerate(itertools.combinations(names, 2)):
+        for g in range(games):
+            p1,p2 = (a,b) if g%2==0 else (b,a)
+            jobs.append((p1, p2, seed*1_000_003 + i*games + g, max_rounds, ais, opts or {}, replays))
+    return jobs
+
+def summarize(results, curve_points=10):
+    stats={}; pairs={}
+    for r in results:
+        for seat in ("p1","p2"):
+            s=stats.setdefault(r[seat], {"games":0,"wins":0,"draws":0,"rounds":0})
+            s["games"]+=1; s["rounds"]+=r["rounds"]
+            if r["winner"]==r[seat]: s["wins"]+=1
+            elif r["winner"] is None: s["draws"]+=1
+        key=tuple(sorted((r["p1"],r["p2"])))
+        p=pairs.setdefault(key, {"games":0, key[0]:0, key[1]:0})
+        p["games"]+=1
+        if r["winner"]: p[r["winner"]]+=1
+    lines=[]
+    lines.append(f"{len(results)} matches, {len(stats)} countries, {len(pairs)} pairs")
+    ais=set(tuple(r.get("ai",())) for r in results)
+    if len(ais)==1 and len(set(next(iter(ais))))==2:
+        a1,a2=next(iter(ais)); won={a1:0, a2:0}
+        for r in results:
+            if r["winner"]: won[a1 if r["winner"]==r["p1"] else a2]+=1
+        lines.append(f"AI wins: {a1} (p1) {won[a1]}, {a2} (p2) {won[a2]}")
+    lines.append("")
+    lines.append(f"{'Country':<16}{'Games':>7}{'Win%':>8}{'Draw%':>8}{'AvgRounds':>11}")
+    for name,s in sorted(stats.items(), key=lambda kv: -kv[1]["wins"]/max(1,kv[1]["games"])):
+        lines.append(f"{name:<16}{s['games']:>7}{100*s['wins']/s['games']:>7.1f}%{100*s['draws']/s['games']:>7.1f}%{s['rounds']/s['games']:>11.1f}")
+    lines.append("")
+    lopsided=sorted(pairs.items(), key=lambda kv: -abs(kv[1][kv[0][0]]-kv[1][kv[0][1]])/kv[1]["games"])[:10]
+    lines.append("Most lopsided pairs:")
+    for (a,b),p in lopsided:
+        lines.append(f"  {a} vs {b}: {p[a]}-{p[b]} of {p['games']}")
+    lines.append("")
+    # Damage curves: mean damage taken by each seat after round r (finished matches hold their final value).
+    lines.append(f"{'Round':>6}{'p1 dmg':>9}{'p2 dmg':>9}{'Ongoing':>9}")
+    longest=max((r["rounds"] for r in results), default=0)
+    for rnd in sorted(set(max(1, longest*k//curve_points) for k in range(1, curve_points+1))):
+        d1=d2=0.0; alive=0
+        for r in results:
+            c=r["damage"]
+            if not c: continue
+            v=c[min(rnd, len(c))-1]; d1+=v[0]; d2+=v[1]
+            if len(c)>=rnd: alive+=1
+        n=max(1,len(results))
+        lines.append(f"{rnd:>6}{d1/n:>8.1f}%{d2/n:>8.1f}%{alive:>9}")
+    return "\n".join(lines)
+
+def main(argv=None):
+    ap=argparse.ArgumentParser(description="Play seeded AI-vs-AI matches for every country pair.")
+    ap.add_argument("--games", type=int, default=10, help="matches per country pair (seats alternate)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--max-rounds", type=int, default=300, help="rounds before a match is scored a draw")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--countries", default="", help="comma-separated subset (default: all)")
+    ap.add_argument("--out", default="tournament_results.jsonl")
+    ap.add_argument("--ai-p1", default="heuristic", choices=sorted(AGENTS))
+    ap.add_argument("--ai-p2", default="heuristic", choices=sorted(AGENTS))
+    ap.add_argument("--budget", type=float, default=0.1, help="seconds per decision for searching AIs")
+    ap.add_argument("--iterations", type=int, default=None, help="fixed search iterations per decision (reproducible)")
+    ap.add_argument("--replays", default=None, metavar="DIR", help="save every match's replay log in DIR")
+    args=ap.parse_args(argv)
+
+    names=[c.strip() for c in args.countries.split(",") if c.strip()] or list(countries())
+    unknown=[c for c in names if c not in countries()]
+    if unknown: ap.error("unknown countries: " + ", ".join(unknown))
+    if len(names)<2: ap.error("need at least two countries")
+
+    opts={"budget":None if args.iterations else args.budget, "iterations":args.iterations}
+    if args.replays: os.makedirs(args.replays, exist_ok=True)
+    jobs=make_jobs(names, args.games, args.seed, args.max_rounds, (args.ai_p1, args.ai_p2), opts, args.replays)
+    t0=time.perf_counter(); results=[]
+    with open(args.out, "w", encoding="utf-8") as out, ProcessPoolExecutor(max_workers=max(1,args.workers)) as pool:
+        futures=[pool.submit(play_match, j) for j in jobs]
+        for n,fut in enumerate(as_completed(futures), 1):
+            r=fut.result(); results.append(r)
+            out.write(json.dumps(r, separators=(",",":"))+"\n"); out.flush()
+            if n%200==0 or n==len(jobs):
+                print(f"\r{n}/{len(jobs)} matches  {n/(time.perf_counter()-t0):.0f}/s", end="", file=sys.stderr, flush=True)
+    print(file=sys.stderr)
+    results.sort(key=lambda r: r["seed"])
+    print(summarize(results))
+    print(f"\nResults: {args.out}  ({time.perf_counter()-t0:.1f}s)")
+
+if __name__=="__main__":
+    main()